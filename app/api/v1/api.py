@@ -2,7 +2,9 @@ from fastapi import APIRouter
 
 from app.api.v1.routes import (
     account_holders,
+    admin,
     accounts,
+    audit_logs,
     auth,
     cards,
     statements,
@@ -18,3 +20,5 @@ api_router.include_router(transactions.router, prefix="/transactions", tags=["tr
 api_router.include_router(transfers.router, prefix="/transfers", tags=["transfers"])
 api_router.include_router(cards.router, prefix="/cards", tags=["cards"])
 api_router.include_router(statements.router, prefix="/statements", tags=["statements"])
+api_router.include_router(audit_logs.router, prefix="/audit-logs", tags=["audit-logs"])
+api_router.include_router(admin.router, prefix="/admin", tags=["admin"])
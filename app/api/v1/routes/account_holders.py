@@ -1,25 +1,38 @@
 from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.core.deps import get_current_user, get_db
+from app.core.deps import (
+    get_async_read_db,
+    get_current_holder,
+    get_current_holder_async,
+    get_current_user,
+    get_db,
+)
+from app.core.principal import Principal
+from app.db.query_stats import query_budget
 from app.models.account_holder import AccountHolder
-from app.models.user import User
 from app.schemas.account_holder import (
     AccountHolderCreate,
     AccountHolderResponse,
     AccountHolderUpdate,
 )
-from app.services.audit_service import log_action
+from app.services.audit_service import log_action, log_event
 
 router = APIRouter()
 
 
-@router.post("/", response_model=AccountHolderResponse, status_code=status.HTTP_201_CREATED)
+@router.post(
+    "/",
+    response_model=AccountHolderResponse,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(query_budget(5))],
+)
 def create_account_holder(
     payload: AccountHolderCreate,
     request: Request,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
     existing = db.scalar(select(AccountHolder).where(AccountHolder.user_id == current_user.id))
@@ -32,9 +45,8 @@ def create_account_holder(
     holder = AccountHolder(user_id=current_user.id, **payload.model_dump())
     db.add(holder)
     db.commit()
-    db.refresh(holder)
 
-    log_action(
+    log_event(
         db,
         user_id=current_user.id,
         action="create_account_holder",
@@ -42,38 +54,26 @@ def create_account_holder(
         resource_id=holder.id,
         ip_address=request.client.host if request.client else None,
     )
-    db.commit()
 
     return holder
 
 
-@router.get("/me", response_model=AccountHolderResponse)
-def get_me(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+@router.get("/me", response_model=AccountHolderResponse, dependencies=[Depends(query_budget(3))])
+async def get_me(
+    current_user: Principal = Depends(get_current_holder_async),
+    db: AsyncSession = Depends(get_async_read_db),
 ):
-    holder = db.scalar(select(AccountHolder).where(AccountHolder.user_id == current_user.id))
-    if not holder:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Account holder profile not found",
-        )
-    return holder
+    return await db.get(AccountHolder, current_user.holder_id)
 
 
-@router.put("/me", response_model=AccountHolderResponse)
+@router.put("/me", response_model=AccountHolderResponse, dependencies=[Depends(query_budget(5))])
 def update_me(
     payload: AccountHolderUpdate,
     request: Request,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_holder),
     db: Session = Depends(get_db),
 ):
-    holder = db.scalar(select(AccountHolder).where(AccountHolder.user_id == current_user.id))
-    if not holder:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Account holder profile not found",
-        )
+    holder = db.get(AccountHolder, current_user.holder_id)
 
     updates = payload.model_dump(exclude_unset=True)
     for field, value in updates.items():
@@ -88,6 +88,5 @@ def update_me(
         ip_address=request.client.host if request.client else None,
     )
     db.commit()
-    db.refresh(holder)
 
     return holder
@@ -1,39 +1,67 @@
+from datetime import datetime
+
 from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
-from sqlalchemy import func, select
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.core.deps import get_account_for_user, get_current_holder, get_current_user, get_db
+from app.core.deps import (
+    get_account_for_user,
+    get_account_for_user_async,
+    get_async_read_db,
+    get_async_shard_read_db,
+    get_current_holder,
+    get_current_holder_async,
+    get_current_user,
+    get_current_user_async,
+    get_shard_db,
+)
+from app.core.metrics import DEPOSITS
+from app.core.principal import Principal
+from app.db.query_stats import query_budget
+from app.db.sharding import shard_router
 from app.models.account import Account
 from app.models.enums import AccountStatus, TransactionType
-from app.models.transaction import Transaction
-from app.models.user import User
-from app.schemas.account import AccountCreate, AccountResponse, AccountStatusUpdate
+from app.schemas.account import (
+    AccountCreate,
+    AccountResponse,
+    AccountStatusUpdate,
+    BalanceAsOfResponse,
+    BalanceBatchRequest,
+    BalanceBatchResponse,
+)
 from app.schemas.transaction import (
     DepositRequest,
     TransactionListResponse,
     TransactionResponse,
+    TotalMode,
 )
-from app.services.account_service import create_account
+from app.services.account_service import balances_as_of_async, create_account
 from app.services.audit_service import log_action
-from app.services.transaction_service import apply_deposit
+from app.services.transaction_service import apply_deposit, list_transactions_page_async
 
 router = APIRouter()
 
 
-@router.post("/", response_model=AccountResponse, status_code=status.HTTP_201_CREATED)
+@router.post(
+    "/",
+    response_model=AccountResponse,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(query_budget(8))],
+)
 def create_account_endpoint(
     payload: AccountCreate,
     request: Request,
-    current_user: User = Depends(get_current_user),
-    holder=Depends(get_current_holder),
-    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_holder),
+    db: Session = Depends(get_shard_db),
 ):
     account = create_account(
         db,
-        holder,
+        current_user.holder_id,
         account_type=payload.account_type,
         currency=payload.currency,
         initial_deposit_cents=payload.initial_deposit_cents,
+        number_shard=shard_router.account_number_shard(current_user.holder_id),
     )
     log_action(
         db,
@@ -44,42 +72,95 @@ def create_account_endpoint(
         ip_address=request.client.host if request.client else None,
     )
     db.commit()
-    db.refresh(account)
     return account
 
 
-@router.get("/", response_model=list[AccountResponse])
-def list_accounts(
-    holder=Depends(get_current_holder),
-    db: Session = Depends(get_db),
+@router.get("/", response_model=list[AccountResponse], dependencies=[Depends(query_budget(2))])
+async def list_accounts(
+    current_user: Principal = Depends(get_current_holder_async),
+    db: AsyncSession = Depends(get_async_shard_read_db),
 ):
-    return db.scalars(select(Account).where(Account.holder_id == holder.id)).all()
+    result = await db.scalars(select(Account).where(Account.holder_id == current_user.holder_id))
+    return result.all()
 
 
 @router.get("/all", response_model=list[AccountResponse])
-def list_all_accounts(
-    db: Session = Depends(get_db),
+async def list_all_accounts(
+    db: AsyncSession = Depends(get_async_read_db),
 ):
     """List all active accounts in the system (for transfer destinations)."""
-    return db.scalars(select(Account).where(Account.status == AccountStatus.active)).all()
+    stmt = select(Account).where(Account.status == AccountStatus.active)
+    if not shard_router.enabled:
+        return (await db.scalars(stmt)).all()
+    accounts = []
+    for index in shard_router.indexes:
+        async with shard_router.async_session(index) as shard_db:
+            accounts.extend((await shard_db.scalars(stmt)).all())
+    return accounts
+
+
+@router.post(
+    "/balances",
+    response_model=BalanceBatchResponse,
+    dependencies=[Depends(query_budget(2))],
+)
+async def get_balances_as_of(
+    payload: BalanceBatchRequest,
+    current_user: Principal = Depends(get_current_holder_async),
+    db: AsyncSession = Depends(get_async_shard_read_db),
+):
+    """Point-in-time balances for many accounts resolved in a single query."""
+    balances = await balances_as_of_async(
+        db, current_user.holder_id, payload.account_ids, payload.as_of
+    )
+    return BalanceBatchResponse(
+        as_of=payload.as_of,
+        balances=[
+            BalanceAsOfResponse(account_id=account_id, as_of=payload.as_of, balance_cents=balance)
+            for account_id, balance in balances.items()
+        ],
+    )
+
+
+@router.get(
+    "/{account_id}",
+    response_model=AccountResponse,
+    dependencies=[Depends(query_budget(3))],
+)
+async def get_account(
+    account_id: str,
+    current_user: Principal = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_shard_read_db),
+):
+    return await get_account_for_user_async(account_id, current_user, db)
 
 
-@router.get("/{account_id}", response_model=AccountResponse)
-def get_account(
+@router.get(
+    "/{account_id}/balance",
+    response_model=BalanceAsOfResponse,
+    dependencies=[Depends(query_budget(2))],
+)
+async def get_balance_as_of(
     account_id: str,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    as_of: datetime = Query(...),
+    current_user: Principal = Depends(get_current_holder_async),
+    db: AsyncSession = Depends(get_async_shard_read_db),
 ):
-    return get_account_for_user(account_id, current_user, db)
+    balances = await balances_as_of_async(db, current_user.holder_id, [account_id], as_of)
+    return BalanceAsOfResponse(account_id=account_id, as_of=as_of, balance_cents=balances[account_id])
 
 
-@router.patch("/{account_id}/status", response_model=AccountResponse)
+@router.patch(
+    "/{account_id}/status",
+    response_model=AccountResponse,
+    dependencies=[Depends(query_budget(4))],
+)
 def update_account_status(
     account_id: str,
     payload: AccountStatusUpdate,
     request: Request,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+    db: Session = Depends(get_shard_db),
 ):
     account = get_account_for_user(account_id, current_user, db)
     if payload.status == AccountStatus.closed and account.balance_cents != 0:
@@ -99,17 +180,20 @@ def update_account_status(
         ip_address=request.client.host if request.client else None,
     )
     db.commit()
-    db.refresh(account)
     return account
 
 
-@router.post("/{account_id}/deposit", response_model=TransactionResponse)
+@router.post(
+    "/{account_id}/deposit",
+    response_model=TransactionResponse,
+    dependencies=[Depends(query_budget(6))],
+)
 def deposit_to_account(
     account_id: str,
     payload: DepositRequest,
     request: Request,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+    db: Session = Depends(get_shard_db),
 ):
     account = get_account_for_user(account_id, current_user, db)
     tx = apply_deposit(db, account, payload.amount_cents, payload.description)
@@ -124,31 +208,32 @@ def deposit_to_account(
         ip_address=request.client.host if request.client else None,
     )
     db.commit()
-    db.refresh(tx)
+    DEPOSITS.inc()
     return tx
 
 
-@router.get("/{account_id}/transactions", response_model=TransactionListResponse)
-def list_account_transactions(
+@router.get(
+    "/{account_id}/transactions",
+    response_model=TransactionListResponse,
+    dependencies=[Depends(query_budget(4))],
+)
+async def list_account_transactions(
     account_id: str,
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
     transaction_type: TransactionType | None = None,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    cursor: str | None = None,
+    total_mode: TotalMode = TotalMode.exact,
+    current_user: Principal = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_shard_read_db),
 ):
-    account = get_account_for_user(account_id, current_user, db)
-    stmt = select(Transaction).where(Transaction.account_id == account.id)
-    if transaction_type:
-        stmt = stmt.where(Transaction.transaction_type == transaction_type)
-
-    total = db.scalar(select(func.count()).select_from(stmt.subquery())) or 0
-    items = (
-        db.scalars(
-            stmt.order_by(Transaction.created_at.desc())
-            .offset((page - 1) * page_size)
-            .limit(page_size)
-        )
-        .all()
+    account = await get_account_for_user_async(account_id, current_user, db)
+    return await list_transactions_page_async(
+        db,
+        account.id,
+        page=page,
+        page_size=page_size,
+        transaction_type=transaction_type,
+        cursor=cursor,
+        total_mode=total_mode,
     )
-    return TransactionListResponse(items=items, page=page, page_size=page_size, total=total)
@@ -0,0 +1,60 @@
+import uuid
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse
+
+from app.core.config import settings
+from app.core.deps import get_current_admin
+from app.core.principal import Principal
+from app.core.profiling import StackSampler, profile_lock, profile_path
+from app.db.query_stats import query_budget
+
+router = APIRouter()
+
+
+@router.get("/profile", response_class=PlainTextResponse, dependencies=[Depends(query_budget(3))])
+def profile_worker(
+    seconds: float = Query(10, gt=0),
+    interval_ms: int = Query(None, ge=1, le=1000),
+    app_only: bool = True,
+    current_user: Principal = Depends(get_current_admin),
+):
+    """Sample this worker's threads for ``seconds`` and return collapsed stacks."""
+    if seconds > settings.profiling_max_seconds:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"seconds must be at most {settings.profiling_max_seconds}",
+        )
+    if not profile_lock.acquire(blocking=False):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A profile is already running on this worker",
+        )
+    try:
+        # Sync handler: sampling runs on a threadpool thread, off the event loop.
+        interval = (interval_ms or settings.profiling_interval_ms) / 1000
+        return StackSampler(interval, app_only=app_only).run(seconds)
+    finally:
+        profile_lock.release()
+
+
+@router.get(
+    "/profiles/{profile_id}",
+    response_class=PlainTextResponse,
+    dependencies=[Depends(query_budget(3))],
+)
+def get_profile(
+    profile_id: str,
+    current_user: Principal = Depends(get_current_admin),
+):
+    """Collapsed stacks saved for a request sent with the X-Profile header."""
+    try:
+        path = profile_path(str(uuid.UUID(profile_id)))
+    except ValueError:
+        path = None
+    if path is None or not path.exists():
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Profile not found",
+        )
+    return path.read_text()
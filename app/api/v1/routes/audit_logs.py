@@ -0,0 +1,55 @@
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+
+from app.core.deps import get_current_user, get_read_db
+from app.core.principal import Principal
+from app.db.sharding import shard_router
+from app.schemas.audit_log import AuditLogListResponse
+from app.services.audit_service import list_audit_logs, list_audit_logs_merged
+
+router = APIRouter()
+
+
+@router.get("/", response_model=AuditLogListResponse)
+def get_audit_logs(
+    page_size: int = Query(50, ge=1, le=500),
+    cursor: str | None = None,
+    user_id: str | None = None,
+    resource_type: str | None = None,
+    resource_id: str | None = None,
+    action: str | None = None,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    current_user: Principal = Depends(get_current_user),
+    db: Session = Depends(get_read_db),
+):
+    """Admins may query any user's trail; everyone else only sees their own."""
+    if not current_user.is_admin:
+        if user_id is not None and user_id != current_user.id:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Admin privileges required",
+            )
+        user_id = current_user.id
+
+    filters = dict(
+        cursor=cursor,
+        user_id=user_id,
+        resource_type=resource_type,
+        resource_id=resource_id,
+        action=action,
+        start=start,
+        end=end,
+    )
+    if not shard_router.enabled:
+        return list_audit_logs(db, page_size=page_size, **filters)
+
+    # Ledger actions are logged on the shard that was written; auth events on the primary.
+    shard_sessions = [shard_router.session(index) for index in shard_router.indexes]
+    try:
+        return list_audit_logs_merged([db, *shard_sessions], page_size=page_size, **filters)
+    finally:
+        for shard_db in shard_sessions:
+            shard_db.close()
@@ -1,81 +1,145 @@
-from fastapi import APIRouter, Depends, HTTPException, Request, status
-from sqlalchemy import select
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.core.deps import get_current_user, get_db
+from app.core.deps import get_async_read_db, get_current_user_async, get_db
+from app.core.hashing import HashingSaturatedError, password_hasher
+from app.core.principal import Principal
 from app.core.security import (
     create_access_token,
     create_refresh_token,
     decode_token,
     get_password_hash,
-    verify_password,
+    get_password_hash_async,
+    password_needs_rehash,
+    verify_password_async,
 )
+from app.db.query_stats import query_budget
+from app.db.routing import pin_to_primary
 from app.models.account_holder import AccountHolder
 from app.models.user import User
 from app.schemas.auth import LoginRequest, MeResponse, RefreshRequest, SignupRequest, TokenResponse
-from app.services.audit_service import log_action
+from app.services.audit_service import log_event
 
 router = APIRouter()
 
 
-@router.post("/signup", response_model=TokenResponse, status_code=status.HTTP_201_CREATED)
-def signup(payload: SignupRequest, request: Request, db: Session = Depends(get_db)):
+def _find_user_by_email(db: Session, email: str) -> User | None:
+    return db.scalar(select(User).where(User.email == email))
+
+
+def _register_user(db: Session, email: str, hashed_password: str, ip_address: str | None) -> str:
+    user = User(email=email, hashed_password=hashed_password)
+    db.add(user)
+    db.commit()
+    user_id = user.id
+    pin_to_primary(user_id)
+
+    log_event(
+        db,
+        user_id=user_id,
+        action="signup",
+        resource_type="user",
+        resource_id=user_id,
+        ip_address=ip_address,
+    )
+    return user_id
+
+
+def _store_password_hash(db: Session, user_id: str, old_hash: str, new_hash: str) -> None:
+    try:
+        # Only replace the hash we verified against, never a newer password.
+        db.execute(
+            update(User)
+            .where(User.id == user_id, User.hashed_password == old_hash)
+            .values(hashed_password=new_hash)
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+async def _upgrade_password_hash(db: Session, user_id: str, old_hash: str, password: str) -> None:
+    try:
+        new_hash = await password_hasher.run(get_password_hash, password)
+    except HashingSaturatedError:
+        # Best effort: the next login will try again.
+        return
+    await run_in_threadpool(_store_password_hash, db, user_id, old_hash, new_hash)
+
+
+# signup/login are async so that waiting on bcrypt (in the dedicated hashing
+# pool) does not hold a request threadpool thread; DB work still runs there.
+@router.post(
+    "/signup",
+    response_model=TokenResponse,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(query_budget(4))],
+)
+async def signup(payload: SignupRequest, request: Request, db: Session = Depends(get_db)):
     email = payload.email.lower()
-    existing = db.scalar(select(User).where(User.email == email))
+    existing = await run_in_threadpool(_find_user_by_email, db, email)
     if existing:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered",
         )
 
-    user = User(email=email, hashed_password=get_password_hash(payload.password))
-    db.add(user)
-    db.commit()
-    db.refresh(user)
-
-    log_action(
+    hashed_password = await get_password_hash_async(payload.password)
+    user_id = await run_in_threadpool(
+        _register_user,
         db,
-        user_id=user.id,
-        action="signup",
-        resource_type="user",
-        resource_id=user.id,
-        ip_address=request.client.host if request.client else None,
+        email,
+        hashed_password,
+        request.client.host if request.client else None,
     )
-    db.commit()
 
     return TokenResponse(
-        access_token=create_access_token(user.id),
-        refresh_token=create_refresh_token(user.id),
+        access_token=create_access_token(user_id),
+        refresh_token=create_refresh_token(user_id),
     )
 
 
-@router.post("/login", response_model=TokenResponse)
-def login(payload: LoginRequest, request: Request, db: Session = Depends(get_db)):
+@router.post("/login", response_model=TokenResponse, dependencies=[Depends(query_budget(4))])
+async def login(
+    payload: LoginRequest,
+    request: Request,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+):
     email = payload.email.lower()
-    user = db.scalar(select(User).where(User.email == email))
-    if not user or not verify_password(payload.password, user.hashed_password):
+    user = await run_in_threadpool(_find_user_by_email, db, email)
+    if not user or not await verify_password_async(payload.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid credentials",
         )
 
-    log_action(
+    user_id, hashed_password = user.id, user.hashed_password
+    log_event(
         db,
-        user_id=user.id,
+        user_id=user_id,
         action="login",
         resource_type="user",
-        resource_id=user.id,
+        resource_id=user_id,
         ip_address=request.client.host if request.client else None,
     )
-    db.commit()
+    if password_needs_rehash(hashed_password):
+        # get_db has exited by the time background tasks run; the task
+        # reopens and closes the session itself.
+        background_tasks.add_task(
+            _upgrade_password_hash, db, user_id, hashed_password, payload.password
+        )
 
     return TokenResponse(
-        access_token=create_access_token(user.id),
-        refresh_token=create_refresh_token(user.id),
+        access_token=create_access_token(user_id),
+        refresh_token=create_refresh_token(user_id),
     )
 
 
-@router.post("/refresh", response_model=TokenResponse)
+@router.post("/refresh", response_model=TokenResponse, dependencies=[Depends(query_budget(2))])
 def refresh(payload: RefreshRequest, db: Session = Depends(get_db)):
     token_data = decode_token(payload.refresh_token)
     if token_data.get("type") != "refresh":
@@ -97,7 +161,15 @@ def refresh(payload: RefreshRequest, db: Session = Depends(get_db)):
     )
 
 
-@router.get("/me", response_model=MeResponse)
-def me(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    holder = db.scalar(select(AccountHolder).where(AccountHolder.user_id == current_user.id))
-    return {"user": current_user, "holder": holder}
+@router.get("/me", response_model=MeResponse, dependencies=[Depends(query_budget(3))])
+async def me(
+    current_user: Principal = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    result = await db.execute(
+        select(User, AccountHolder)
+        .outerjoin(AccountHolder, AccountHolder.user_id == User.id)
+        .where(User.id == current_user.id)
+    )
+    user, holder = result.one()
+    return {"user": user, "holder": holder}
@@ -2,11 +2,12 @@ from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy import func, select
 from sqlalchemy.orm import Session
 
-from app.core.deps import get_account_for_user, get_current_holder, get_current_user, get_db
+from app.core.deps import get_account_for_user, get_current_holder, get_shard_db, get_shard_read_db
+from app.core.principal import Principal
+from app.db.query_stats import query_budget
 from app.models.account import Account
 from app.models.card import Card
 from app.models.enums import CardStatus
-from app.models.user import User
 from app.schemas.card import CardCreate, CardLimitUpdate, CardResponse, CardStatusUpdate
 from app.services.audit_service import log_action
 from app.utils.card_utils import hash_card_number, last_four
@@ -29,13 +30,17 @@ def _get_card_for_holder(card_id: str, holder_id: str, db: Session) -> Card:
     return card
 
 
-@router.post("/", response_model=CardResponse, status_code=status.HTTP_201_CREATED)
+@router.post(
+    "/",
+    response_model=CardResponse,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(query_budget(5))],
+)
 def create_card(
     payload: CardCreate,
     request: Request,
-    current_user: User = Depends(get_current_user),
-    holder=Depends(get_current_holder),
-    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_holder),
+    db: Session = Depends(get_shard_db),
 ):
     account = get_account_for_user(payload.account_id, current_user, db)
     active_count = db.scalar(
@@ -73,42 +78,44 @@ def create_card(
         ip_address=request.client.host if request.client else None,
     )
     db.commit()
-    db.refresh(card)
     return card
 
 
-@router.get("/", response_model=list[CardResponse])
+@router.get("/", response_model=list[CardResponse], dependencies=[Depends(query_budget(2))])
 def list_cards(
-    holder=Depends(get_current_holder),
-    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_holder),
+    db: Session = Depends(get_shard_read_db),
 ):
     stmt = (
         select(Card)
         .join(Account, Card.account_id == Account.id)
-        .where(Account.holder_id == holder.id)
+        .where(Account.holder_id == current_user.holder_id)
     )
     return db.scalars(stmt).all()
 
 
-@router.get("/{card_id}", response_model=CardResponse)
+@router.get("/{card_id}", response_model=CardResponse, dependencies=[Depends(query_budget(3))])
 def get_card(
     card_id: str,
-    holder=Depends(get_current_holder),
-    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_holder),
+    db: Session = Depends(get_shard_read_db),
 ):
-    return _get_card_for_holder(card_id, holder.id, db)
+    return _get_card_for_holder(card_id, current_user.holder_id, db)
 
 
-@router.patch("/{card_id}/status", response_model=CardResponse)
+@router.patch(
+    "/{card_id}/status",
+    response_model=CardResponse,
+    dependencies=[Depends(query_budget(5))],
+)
 def update_card_status(
     card_id: str,
     payload: CardStatusUpdate,
     request: Request,
-    current_user: User = Depends(get_current_user),
-    holder=Depends(get_current_holder),
-    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_holder),
+    db: Session = Depends(get_shard_db),
 ):
-    card = _get_card_for_holder(card_id, holder.id, db)
+    card = _get_card_for_holder(card_id, current_user.holder_id, db)
     if payload.status == CardStatus.active and card.status != CardStatus.active:
         active_count = db.scalar(
             select(func.count()).select_from(Card).where(
@@ -133,20 +140,22 @@ def update_card_status(
         ip_address=request.client.host if request.client else None,
     )
     db.commit()
-    db.refresh(card)
     return card
 
 
-@router.patch("/{card_id}/limit", response_model=CardResponse)
+@router.patch(
+    "/{card_id}/limit",
+    response_model=CardResponse,
+    dependencies=[Depends(query_budget(4))],
+)
 def update_card_limit(
     card_id: str,
     payload: CardLimitUpdate,
     request: Request,
-    current_user: User = Depends(get_current_user),
-    holder=Depends(get_current_holder),
-    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_holder),
+    db: Session = Depends(get_shard_db),
 ):
-    card = _get_card_for_holder(card_id, holder.id, db)
+    card = _get_card_for_holder(card_id, current_user.holder_id, db)
     card.daily_limit = round(payload.daily_limit, 2)
 
     log_action(
@@ -159,19 +168,21 @@ def update_card_limit(
         ip_address=request.client.host if request.client else None,
     )
     db.commit()
-    db.refresh(card)
     return card
 
 
-@router.delete("/{card_id}", status_code=status.HTTP_204_NO_CONTENT)
+@router.delete(
+    "/{card_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    dependencies=[Depends(query_budget(4))],
+)
 def delete_card(
     card_id: str,
     request: Request,
-    current_user: User = Depends(get_current_user),
-    holder=Depends(get_current_holder),
-    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_holder),
+    db: Session = Depends(get_shard_db),
 ):
-    card = _get_card_for_holder(card_id, holder.id, db)
+    card = _get_card_for_holder(card_id, current_user.holder_id, db)
     
     log_action(
         db,
@@ -1,36 +1,63 @@
 from datetime import date
 
 from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.core.deps import get_account_for_user, get_current_user, get_db
-from app.models.user import User
-from app.schemas.statement import StatementResponse
-from app.services.audit_service import log_action
-from app.services.statement_service import build_statement
+from app.core.deps import (
+    get_account_for_user,
+    get_account_for_user_async,
+    get_async_shard_read_db,
+    get_current_user,
+    get_current_user_async,
+    get_shard_read_db,
+)
+from app.core.principal import Principal
+from app.db.query_stats import query_budget
+from app.schemas.statement import ExportFormat, StatementResponse
+from app.services.audit_service import log_event
+from app.services.statement_service import (
+    build_statement_async,
+    build_statement_summary_async,
+    iter_statement_records,
+)
+from app.utils.export import STATEMENT_CSV_FIELDS, iter_csv, iter_ndjson
 
 router = APIRouter()
 
 
-@router.get("/{account_id}", response_model=StatementResponse)
-def get_statement(
-    account_id: str,
-    request: Request,
-    start: date = Query(...),
-    end: date = Query(...),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
-):
+def _ensure_valid_range(start: date, end: date) -> None:
     if start > end:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="start must be before end",
         )
 
-    account = get_account_for_user(account_id, current_user, db)
-    result = build_statement(db, account.id, start, end)
 
-    log_action(
+@router.get(
+    "/{account_id}",
+    response_model=StatementResponse,
+    dependencies=[Depends(query_budget(4))],
+)
+async def get_statement(
+    account_id: str,
+    request: Request,
+    start: date = Query(...),
+    end: date = Query(...),
+    summary_only: bool = False,
+    current_user: Principal = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_shard_read_db),
+):
+    _ensure_valid_range(start, end)
+
+    account = await get_account_for_user_async(account_id, current_user, db)
+    if summary_only:
+        result = await build_statement_summary_async(db, account.id, start, end)
+    else:
+        result = await build_statement_async(db, account.id, start, end)
+
+    log_event(
         db,
         user_id=current_user.id,
         action="statement",
@@ -39,6 +66,56 @@ def get_statement(
         details=f"start={start} end={end}",
         ip_address=request.client.host if request.client else None,
     )
-    db.commit()
 
     return result
+
+
+@router.get("/{account_id}/export", dependencies=[Depends(query_budget(4))])
+def export_statement(
+    account_id: str,
+    request: Request,
+    start: date = Query(...),
+    end: date = Query(...),
+    export_format: ExportFormat = Query(ExportFormat.ndjson, alias="format"),
+    current_user: Principal = Depends(get_current_user),
+    db: Session = Depends(get_shard_read_db),
+):
+    _ensure_valid_range(start, end)
+
+    account = get_account_for_user(account_id, current_user, db)
+    account_id, account_number = account.id, account.account_number
+    log_event(
+        db,
+        user_id=current_user.id,
+        action="statement_export",
+        resource_type="account",
+        resource_id=account_id,
+        details=f"start={start} end={end} format={export_format.value}",
+        ip_address=request.client.host if request.client else None,
+    )
+
+    # The session dependency has closed ``db`` by the time the body streams, so
+    # the body reads through a session of its own on the same database.
+    bind = db.get_bind()
+
+    def body():
+        stream_db = Session(bind=bind, autoflush=False)
+        try:
+            records = iter_statement_records(stream_db, account_id, start, end)
+            if export_format == ExportFormat.csv:
+                yield from iter_csv(records, STATEMENT_CSV_FIELDS)
+            else:
+                yield from iter_ndjson(records)
+        finally:
+            stream_db.close()
+
+    if export_format == ExportFormat.csv:
+        media_type = "text/csv"
+    else:
+        media_type = "application/x-ndjson"
+    filename = f"statement_{account_number}_{start}_{end}.{export_format.value}"
+    return StreamingResponse(
+        body(),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -1,95 +1,191 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
-from sqlalchemy import func, select
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.core.deps import get_account_for_user, get_current_user, get_db
+from app.core.deps import (
+    get_account_for_user,
+    get_account_for_user_async,
+    get_accounts_for_user,
+    get_async_shard_read_db,
+    get_current_user,
+    get_current_user_async,
+    get_shard_db,
+)
+from app.core.metrics import DEPOSITS, INSUFFICIENT_FUNDS, WITHDRAWALS
+from app.core.principal import Principal
+from app.db.query_stats import query_budget
 from app.models.account import Account
 from app.models.enums import TransactionType
 from app.models.transaction import Transaction
-from app.models.user import User
 from app.schemas.transaction import (
+    BatchMode,
+    BatchOperationType,
     DepositRequest,
+    TransactionBatchRequest,
+    TransactionBatchResponse,
     TransactionListResponse,
     TransactionResponse,
+    TotalMode,
     WithdrawRequest,
 )
-from app.services.audit_service import log_action
-from app.services.transaction_service import apply_deposit, apply_withdrawal
+from app.services.audit_service import log_action, log_actions
+from app.services.transaction_service import (
+    apply_batch,
+    apply_deposit,
+    apply_withdrawal,
+    list_transactions_page_async,
+)
+from app.services.write_queue import run_write
 
 router = APIRouter()
 
 
-@router.post("/{account_id}/deposit", response_model=TransactionResponse)
+@router.post(
+    "/{account_id}/deposit",
+    response_model=TransactionResponse,
+    dependencies=[Depends(query_budget(7))],
+)
 def deposit(
     account_id: str,
     payload: DepositRequest,
     request: Request,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+    db: Session = Depends(get_shard_db),
 ):
     account = get_account_for_user(account_id, current_user, db)
-    tx = apply_deposit(db, account, payload.amount_cents, payload.description)
-    db.flush()
-    log_action(
-        db,
-        user_id=current_user.id,
-        action="deposit",
-        resource_type="transaction",
-        resource_id=tx.id,
-        details=f"account_id={account.id}",
-        ip_address=request.client.host if request.client else None,
-    )
-    db.commit()
-    db.refresh(tx)
+    ip_address = request.client.host if request.client else None
+
+    def _deposit(session: Session) -> Transaction:
+        target = session.get(Account, account.id)
+        tx = apply_deposit(session, target, payload.amount_cents, payload.description)
+        session.flush()
+        log_action(
+            session,
+            user_id=current_user.id,
+            action="deposit",
+            resource_type="transaction",
+            resource_id=tx.id,
+            details=f"account_id={target.id}",
+            ip_address=ip_address,
+        )
+        return tx
+
+    tx = run_write(db, _deposit)
+    DEPOSITS.inc()
     return tx
 
 
-@router.post("/{account_id}/withdraw", response_model=TransactionResponse)
+@router.post(
+    "/{account_id}/withdraw",
+    response_model=TransactionResponse,
+    dependencies=[Depends(query_budget(7))],
+)
 def withdraw(
     account_id: str,
     payload: WithdrawRequest,
     request: Request,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+    db: Session = Depends(get_shard_db),
 ):
     account = get_account_for_user(account_id, current_user, db)
-    tx = apply_withdrawal(db, account, payload.amount_cents, payload.description)
-    db.flush()
-    log_action(
-        db,
-        user_id=current_user.id,
-        action="withdraw",
-        resource_type="transaction",
-        resource_id=tx.id,
-        details=f"account_id={account.id}",
-        ip_address=request.client.host if request.client else None,
-    )
-    db.commit()
-    db.refresh(tx)
+    ip_address = request.client.host if request.client else None
+
+    def _withdraw(session: Session) -> Transaction:
+        target = session.get(Account, account.id)
+        tx = apply_withdrawal(session, target, payload.amount_cents, payload.description)
+        session.flush()
+        log_action(
+            session,
+            user_id=current_user.id,
+            action="withdraw",
+            resource_type="transaction",
+            resource_id=tx.id,
+            details=f"account_id={target.id}",
+            ip_address=ip_address,
+        )
+        return tx
+
+    tx = run_write(db, _withdraw)
+    WITHDRAWALS.inc()
     return tx
 
 
-@router.get("/{account_id}", response_model=TransactionListResponse)
-def list_transactions(
+@router.post(
+    "/batch",
+    response_model=TransactionBatchResponse,
+    dependencies=[Depends(query_budget(8))],
+)
+def batch(
+    payload: TransactionBatchRequest,
+    request: Request,
+    response: Response,
+    current_user: Principal = Depends(get_current_user),
+    db: Session = Depends(get_shard_db),
+):
+    """Deposits and withdrawals applied in order with a constant number of statements.
+
+    ``atomic`` applies everything or nothing (400 when anything fails);
+    ``best_effort`` applies what it can. Every operation gets a result.
+    """
+    accounts = get_accounts_for_user([op.account_id for op in payload.operations], current_user, db)
+    ip_address = request.client.host if request.client else None
+    atomic = payload.mode == BatchMode.atomic
+
+    def _batch(session: Session) -> list[dict]:
+        results = apply_batch(session, payload.operations, set(accounts), atomic)
+        log_actions(session, [
+            {
+                "user_id": current_user.id,
+                "action": payload.operations[result["index"]].type.value,
+                "resource_type": "transaction",
+                "resource_id": result["transaction"]["id"],
+                "details": f"account_id={result['transaction']['account_id']} batch",
+                "ip_address": ip_address,
+            }
+            for result in results
+            if result["applied"]
+        ])
+        return results
+
+    results = run_write(db, _batch)
+    applied = [payload.operations[r["index"]].type for r in results if r["applied"]]
+    DEPOSITS.inc(applied.count(BatchOperationType.deposit))
+    WITHDRAWALS.inc(applied.count(BatchOperationType.withdraw))
+    if not atomic:
+        # An atomic batch with a refusal is rolled back whole, so nothing was refused.
+        INSUFFICIENT_FUNDS.inc(sum(1 for r in results if r.get("error") == "Insufficient funds"))
+    if atomic and not applied:
+        response.status_code = status.HTTP_400_BAD_REQUEST
+    return {
+        "mode": payload.mode,
+        "applied": len(applied),
+        "failed": sum(1 for r in results if r.get("error")),
+        "results": results,
+    }
+
+
+@router.get(
+    "/{account_id}",
+    response_model=TransactionListResponse,
+    dependencies=[Depends(query_budget(4))],
+)
+async def list_transactions(
     account_id: str,
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
     transaction_type: TransactionType | None = None,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    cursor: str | None = None,
+    total_mode: TotalMode = TotalMode.exact,
+    current_user: Principal = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_shard_read_db),
 ):
-    account = get_account_for_user(account_id, current_user, db)
-    stmt = select(Transaction).where(Transaction.account_id == account.id)
-    if transaction_type:
-        stmt = stmt.where(Transaction.transaction_type == transaction_type)
-
-    total = db.scalar(select(func.count()).select_from(stmt.subquery())) or 0
-    items = (
-        db.scalars(
-            stmt.order_by(Transaction.created_at.desc())
-            .offset((page - 1) * page_size)
-            .limit(page_size)
-        )
-        .all()
+    account = await get_account_for_user_async(account_id, current_user, db)
+    return await list_transactions_page_async(
+        db,
+        account.id,
+        page=page,
+        page_size=page_size,
+        transaction_type=transaction_type,
+        cursor=cursor,
+        total_mode=total_mode,
     )
-    return TransactionListResponse(items=items, page=page, page_size=page_size, total=total)
@@ -1,25 +1,53 @@
+import logging
+
 from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
 from uuid import uuid4
 
-from app.core.deps import get_account_for_user, get_current_user, get_db
+from app.core.deps import get_account_for_user, get_current_user, get_shard_db
+from app.core.metrics import TRANSFERS
+from app.core.principal import Principal
+from app.db.query_stats import query_budget
+from app.db.sharding import shard_router
 from app.models.account import Account
 from app.models.transfer import Transfer
-from app.models.user import User
 from app.schemas.transfer import TransferCreate, TransferResponse
 from app.services.audit_service import log_action
-from app.services.transfer_service import create_transfer
+from app.services.transfer_service import create_transfer, open_cross_shard_transfer, settle_transfer
+from app.services.write_queue import run_write
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 
-@router.post("/", response_model=TransferResponse, status_code=status.HTTP_201_CREATED)
+def _destination_shard(account_id: str, db: Session) -> int | None:
+    """Shard index of the destination, or None when it is on the caller's database."""
+    if not shard_router.enabled:
+        return None
+    index = shard_router.locate_account(account_id)
+    if index is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Destination account not found",
+        )
+    return None if shard_router.engines[index] is db.get_bind() else index
+
+
+# Cross-shard transfers also locate the destination and settle it inline.
+@router.post(
+    "/",
+    response_model=TransferResponse,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(query_budget(16))],
+)
 def transfer_funds(
     payload: TransferCreate,
     request: Request,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+    db: Session = Depends(get_shard_db),
 ):
     idempotency_key = payload.idempotency_key or str(uuid4())
     existing = db.scalar(select(Transfer).where(Transfer.idempotency_key == idempotency_key))
@@ -28,30 +56,61 @@ def transfer_funds(
         return existing
 
     from_account = get_account_for_user(payload.from_account_id, current_user, db)
-    to_account = db.scalar(select(Account).where(Account.id == payload.to_account_id))
-    if not to_account:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Destination account not found",
-        )
-    transfer = create_transfer(
-        db,
-        from_account,
-        to_account,
-        idempotency_key=idempotency_key,
-        amount_cents=payload.amount_cents,
-        description=payload.description,
-    )
-
-    log_action(
-        db,
-        user_id=current_user.id,
-        action="transfer",
-        resource_type="transfer",
-        resource_id=transfer.id,
-        details=f"from={from_account.id} to={to_account.id}",
-        ip_address=request.client.host if request.client else None,
-    )
-    db.commit()
-    db.refresh(transfer)
-    return transfer
+    destination_shard = _destination_shard(payload.to_account_id, db)
+    destination_db = db if destination_shard is None else shard_router.session(destination_shard)
+    try:
+        to_account = destination_db.scalar(select(Account).where(Account.id == payload.to_account_id))
+        if not to_account:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Destination account not found",
+            )
+        ip_address = request.client.host if request.client else None
+
+        def _transfer(session: Session) -> Transfer:
+            source = session.get(Account, from_account.id)
+            if destination_shard is None:
+                destination = session.get(Account, to_account.id)
+                transfer = create_transfer(
+                    session,
+                    source,
+                    destination,
+                    idempotency_key=idempotency_key,
+                    amount_cents=payload.amount_cents,
+                    description=payload.description,
+                )
+            else:
+                transfer = open_cross_shard_transfer(
+                    session,
+                    source,
+                    to_account,
+                    idempotency_key=idempotency_key,
+                    amount_cents=payload.amount_cents,
+                    description=payload.description,
+                )
+            log_action(
+                session,
+                user_id=current_user.id,
+                action="transfer",
+                resource_type="transfer",
+                resource_id=transfer.id,
+                details=f"from={source.id} to={to_account.id}",
+                ip_address=ip_address,
+            )
+            return transfer
+
+        transfer = run_write(db, _transfer)
+        if destination_shard is not None:
+            try:
+                transfer = settle_transfer(db, destination_db, transfer.id)
+            except SQLAlchemyError:
+                # The debit is committed and the transfer stays pending;
+                # app.commands.settle_transfers finishes it later.
+                logger.exception("Settling transfer %s failed", transfer.id)
+                db.rollback()
+                transfer = db.get(Transfer, transfer.id)
+        TRANSFERS.labels(transfer.status.value).inc()
+        return transfer
+    finally:
+        if destination_db is not db:
+            destination_db.close()
@@ -0,0 +1,45 @@
+"""Archive closed months of audit_logs into gzipped NDJSON files.
+
+Usage: python -m app.commands.archive_audit_logs [--keep-months N] [--archive-dir DIR]
+Run it from a daily or monthly scheduler to keep the hot table small. With
+sharding on, each shard's entries are archived under DIR/shard_<n>.
+"""
+import argparse
+from functools import partial
+from pathlib import Path
+
+from app.core.config import settings
+from app.db.session import SessionLocal, init_db
+from app.db.sharding import shard_router
+from app.services.audit_retention_service import archive_audit_logs
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--keep-months", type=int, default=settings.audit_retention_months)
+    parser.add_argument("--archive-dir", default=settings.audit_archive_dir)
+    args = parser.parse_args(argv)
+
+    init_db()
+    shard_router.init_schema()
+    archive_dir = Path(args.archive_dir)
+    # The primary keeps any entries written before sharding was switched on.
+    targets = [(SessionLocal, archive_dir)]
+    targets.extend(
+        (partial(shard_router.session, i), archive_dir / f"shard_{i}") for i in shard_router.indexes
+    )
+    paths = []
+    for factory, directory in targets:
+        db = factory()
+        try:
+            paths.extend(archive_audit_logs(db, directory, args.keep_months))
+        finally:
+            db.close()
+    for path in paths:
+        print(f"Archived {path}")
+    if not paths:
+        print("Nothing to archive")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""Rebuild the daily_balances rollup from the transaction ledger.
+
+Usage: python -m app.commands.backfill_daily_balances [--account-id ID]
+
+Stop writes (deposits, withdrawals, transfers) while it runs: rows are deleted
+and rebuilt from the ledger, so a write landing in between is either counted
+twice or dropped from the rollup. Then set STATEMENT_USE_DAILY_BALANCES=true.
+"""
+import argparse
+from functools import partial
+
+from app.db.session import SessionLocal, init_db
+from app.db.sharding import shard_router
+from app.services.daily_balance_service import backfill_daily_balances
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--account-id", help="Only rebuild this account's rows")
+    args = parser.parse_args(argv)
+
+    init_db()
+    shard_router.init_schema()
+    written = 0
+    # The primary keeps any ledger written before sharding was switched on.
+    factories = [SessionLocal, *(partial(shard_router.session, i) for i in shard_router.indexes)]
+    for factory in factories:
+        db = factory()
+        try:
+            written += backfill_daily_balances(db, account_id=args.account_id)
+            db.commit()
+        finally:
+            db.close()
+    print(f"Wrote {written} daily balance rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Compare the sync (threadpool) and async request paths under many concurrent clients.
+
+Usage: python -m app.commands.benchmark_async_reads [--clients 1000] [--requests 5000]
+
+Both paths serve the same transaction page through the same service code, on
+a throwaway SQLite database; only the session type and handler kind differ.
+Requests are driven in-process through the ASGI interface, so the numbers
+isolate the app from network and server overhead.
+"""
+import argparse
+import asyncio
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.commands.benchmark_sqlite_profiles import _seed_accounts
+from app.db.base import Base
+from app.db.session import create_async_db_engine, create_db_engine
+from app.models import Account
+from app.services.transaction_service import (
+    apply_deposit,
+    list_transactions_page,
+    list_transactions_page_async,
+)
+
+
+def build_app(path: Path) -> tuple[FastAPI, str]:
+    url = f"sqlite:///{path}"
+    engine = create_db_engine(url)
+    Base.metadata.create_all(bind=engine)
+    SyncSession = sessionmaker(bind=engine, autoflush=False)
+    AsyncSessionFactory = async_sessionmaker(create_async_db_engine(url), expire_on_commit=False)
+
+    account_id = _seed_accounts(SyncSession, 1)[0]
+    with SyncSession() as db:
+        account = db.get(Account, account_id)
+        for _ in range(200):
+            apply_deposit(db, account, 100)
+        db.commit()
+
+    def get_sync_db():
+        db = SyncSession()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    async def get_async_db():
+        async with AsyncSessionFactory() as db:
+            yield db
+
+    bench = FastAPI()
+
+    @bench.get("/sync/{account_id}")
+    def sync_page(account_id: str, db: Session = Depends(get_sync_db)):
+        return {"count": len(list_transactions_page(db, account_id)["items"])}
+
+    @bench.get("/async/{account_id}")
+    async def async_page(account_id: str, db: AsyncSession = Depends(get_async_db)):
+        return {"count": len((await list_transactions_page_async(db, account_id))["items"])}
+
+    return bench, account_id
+
+
+async def drive(bench: FastAPI, path: str, clients: int, total: int) -> dict:
+    latencies: list[float] = []
+    remaining = iter(range(total))
+    limits = httpx.Limits(max_connections=None)
+    transport = httpx.ASGITransport(app=bench)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", limits=limits) as client:
+
+        async def worker() -> None:
+            for _ in remaining:
+                started = time.perf_counter()
+                response = await client.get(path)
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(clients)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests_per_s": len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+    }
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=5000)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        bench, account_id = build_app(Path(tmp) / "bench.db")
+        print(f"{'path':<8}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}")
+        for kind in ("sync", "async"):
+            result = asyncio.run(drive(bench, f"/{kind}/{account_id}", args.clients, args.requests))
+            print(
+                f"{kind:<8}{result['requests_per_s']:>10.0f}"
+                f"{result['p50_ms']:>10.1f}{result['p99_ms']:>10.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""Microbenchmarks for service-layer hot paths on a seeded SQLite database.
+
+Usage: python -m app.commands.benchmark_services [--holders 1000] [--transactions 100]
+    [--seconds 2] [--only NAME] [--output results.json]
+
+Seeds a throwaway database with app.commands.load_test's bulk seeder, then
+times each operation in a loop for ``--seconds`` and reports ops/s. A second,
+shorter pass under tracemalloc reports the peak memory one call allocates and
+what it leaves allocated (a steadily positive figure points at a leak or an
+unbounded cache). Writes commit after every call, as the endpoints do.
+"""
+import argparse
+import gc
+import json
+import tempfile
+import time
+import tracemalloc
+import uuid
+from datetime import date, timedelta
+from pathlib import Path
+
+from sqlalchemy.orm import sessionmaker
+from starlette.requests import Request
+
+from app.commands.load_test import seed
+from app.core.deps import get_current_user
+from app.core.principal import principal_cache
+from app.core.security import create_access_token, decode_token
+from app.db.base import Base
+from app.db.session import create_db_engine
+from app.models import Account, AccountHolder
+from app.schemas.statement import StatementResponse
+from app.schemas.transaction import TransactionListResponse
+from app.services.statement_service import build_statement
+from app.services.transaction_service import apply_deposit, apply_withdrawal, list_transactions_page
+from app.services.transfer_service import create_transfer
+
+WARMUP_CALLS = 20
+ALLOCATION_CALLS = 200
+
+
+def _committed(db, fn):
+    def call():
+        fn()
+        db.commit()
+
+    return call
+
+
+def benchmarks(db, account_ids: list[str]) -> dict:
+    source, destination = db.get(Account, account_ids[0]), db.get(Account, account_ids[-1])
+    apply_deposit(db, source, 10_000_000)
+    db.commit()
+    # Reads use an account the write benchmarks leave alone, so order does not matter.
+    reader = db.get(Account, account_ids[len(account_ids) // 2])
+    user_id = db.get(AccountHolder, reader.holder_id).user_id
+    token = create_access_token(user_id)
+    request = Request({"type": "http", "method": "GET", "headers": []})
+    end = date.today()
+    start = end - timedelta(days=30)
+    statement = build_statement(db, reader.id, start, end)
+    page = list_transactions_page(db, reader.id, page_size=50)
+
+    def current_user_cache_miss():
+        principal_cache.pop(user_id)
+        return get_current_user(request, token, db)
+
+    return {
+        "apply_deposit": _committed(db, lambda: apply_deposit(db, source, 100)),
+        "apply_withdrawal": _committed(db, lambda: apply_withdrawal(db, source, 1)),
+        "create_transfer": _committed(
+            db, lambda: create_transfer(db, source, destination, str(uuid.uuid4()), 1, None)
+        ),
+        "build_statement (30 days)": lambda: build_statement(db, reader.id, start, end),
+        "decode_token": lambda: decode_token(token),
+        "get_current_user (cached)": lambda: get_current_user(request, token, db),
+        "get_current_user (cache miss)": current_user_cache_miss,
+        "serialize TransactionListResponse (50)": lambda: TransactionListResponse.model_validate(
+            page, from_attributes=True
+        ).model_dump_json(),
+        f"serialize StatementResponse ({len(statement['transactions'])})": (
+            lambda: StatementResponse.model_validate(statement, from_attributes=True).model_dump_json()
+        ),
+    }
+
+
+def measure(fn, seconds: float) -> dict:
+    for _ in range(WARMUP_CALLS):
+        fn()
+    calls = 0
+    started = time.perf_counter()
+    deadline = started + seconds
+    while time.perf_counter() < deadline:
+        fn()
+        calls += 1
+    elapsed = time.perf_counter() - started
+
+    gc.collect()
+    tracemalloc.start()
+    peak_total = 0
+    retained_from = tracemalloc.get_traced_memory()[0]
+    for _ in range(ALLOCATION_CALLS):
+        before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        fn()
+        peak_total += tracemalloc.get_traced_memory()[1] - before
+    # ORM state is cyclic; collect it so only memory that is really kept counts.
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0] - retained_from
+    tracemalloc.stop()
+
+    return {
+        "ops_per_s": round(calls / elapsed, 1),
+        "mean_us": round(elapsed / calls * 1e6, 1),
+        "peak_kib_per_op": round(peak_total / ALLOCATION_CALLS / 1024, 2),
+        "retained_b_per_op": round(retained / ALLOCATION_CALLS, 1),
+    }
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--holders", type=int, default=1000)
+    parser.add_argument("--transactions", type=int, default=100, help="Ledger rows per account")
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--seconds", type=float, default=2)
+    parser.add_argument("--only", help="Run benchmarks whose name contains this")
+    parser.add_argument("--output", type=Path)
+    args = parser.parse_args(argv)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_db_engine(f"sqlite:///{Path(tmp) / 'bench.db'}")
+        Base.metadata.create_all(bind=engine)
+        Session = sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+        account_ids = seed(Session, args.holders, args.transactions, args.days)
+
+        print(f"{'benchmark':<44}{'ops/s':>10}{'mean us':>10}{'peak KiB':>10}{'retained B':>12}")
+        with Session() as db:
+            for name, fn in benchmarks(db, account_ids).items():
+                if args.only and args.only not in name:
+                    continue
+                result = results[name] = measure(fn, args.seconds)
+                print(
+                    f"{name:<44}{result['ops_per_s']:>10.0f}{result['mean_us']:>10.1f}"
+                    f"{result['peak_kib_per_op']:>10.1f}{result['retained_b_per_op']:>12.0f}"
+                )
+        engine.dispose()
+
+    if args.output:
+        config = {"holders": args.holders, "transactions": args.transactions, "seconds": args.seconds}
+        args.output.write_text(json.dumps({"config": config, "benchmarks": results}, indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()
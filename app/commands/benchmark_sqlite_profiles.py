@@ -0,0 +1,132 @@
+"""Compare SQLite write throughput across PRAGMA profiles.
+
+Usage: python -m app.commands.benchmark_sqlite_profiles [--threads 8] [--deposits 200]
+
+Each profile gets a fresh database file; every thread commits single deposits
+to its own account, as the deposit endpoint does.
+"""
+import argparse
+import statistics
+import tempfile
+import threading
+import time
+from datetime import date
+from pathlib import Path
+
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from app.db.base import Base
+from app.db.session import create_db_engine, sqlite_pragmas
+from app.models import Account, AccountHolder, User
+from app.models.enums import AccountType
+from app.services.transaction_service import apply_deposit
+
+
+def profiles() -> dict[str, dict[str, str | int]]:
+    tuned = sqlite_pragmas()
+    return {
+        "baseline": {"foreign_keys": "ON", "journal_mode": "WAL"},
+        "tuned": tuned,
+        "tuned+synchronous=FULL": {**tuned, "synchronous": "FULL"},
+    }
+
+
+def _seed_accounts(Session, count: int) -> list[str]:
+    db = Session()
+    try:
+        ids = []
+        for i in range(count):
+            user = User(email=f"bench{i}@example.com", hashed_password="x")
+            holder = AccountHolder(
+                user=user,
+                first_name="Bench",
+                last_name=str(i),
+                date_of_birth=date(1990, 1, 1),
+                phone="5550000000",
+                address="1 Bench St",
+                ssn_last_four="0000",
+            )
+            account = Account(
+                holder=holder,
+                account_number=f"{i:010d}",
+                account_type=AccountType.checking,
+            )
+            db.add(account)
+            db.flush()
+            ids.append(account.id)
+        db.commit()
+        return ids
+    finally:
+        db.close()
+
+
+def run_profile(path: Path, pragmas: dict, threads: int, deposits: int) -> dict:
+    engine = create_db_engine(f"sqlite:///{path}", pragmas=pragmas)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+    account_ids = _seed_accounts(Session, threads)
+    latencies: list[float] = []
+    errors = 0
+    lock = threading.Lock()
+
+    def worker(account_id: str) -> None:
+        nonlocal errors
+        local, failed = [], 0
+        db = Session()
+        try:
+            account = db.get(Account, account_id)
+            for _ in range(deposits):
+                started = time.perf_counter()
+                try:
+                    apply_deposit(db, account, 100)
+                    db.commit()
+                except OperationalError:
+                    db.rollback()
+                    failed += 1
+                    continue
+                local.append(time.perf_counter() - started)
+        finally:
+            db.close()
+        with lock:
+            latencies.extend(local)
+            errors += failed
+
+    pool = [threading.Thread(target=worker, args=(a,)) for a in account_ids]
+    started = time.perf_counter()
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    elapsed = time.perf_counter() - started
+    engine.dispose()
+
+    latencies.sort()
+    return {
+        "commits_per_s": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": statistics.median(latencies) * 1000 if latencies else 0.0,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000 if latencies else 0.0,
+        "locked_errors": errors,
+    }
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--deposits", type=int, default=200, help="Deposits per thread")
+    parser.add_argument("--dir", help="Directory for the database files (default: a temp dir)")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmp:
+        print(f"{'profile':<24}{'commits/s':>12}{'p50 ms':>10}{'p99 ms':>10}{'locked':>8}")
+        for name, pragmas in profiles().items():
+            path = Path(tmp) / f"{name.replace('+', '_').replace('=', '_')}.db"
+            result = run_profile(path, pragmas, args.threads, args.deposits)
+            print(
+                f"{name:<24}{result['commits_per_s']:>12.0f}{result['p50_ms']:>10.2f}"
+                f"{result['p99_ms']:>10.2f}{result['locked_errors']:>8}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,24 @@
+"""Report the bcrypt cost that hits the target hash time on this machine.
+
+Usage: python -m app.commands.calibrate_bcrypt [--target-ms 100]
+Set the result as BCRYPT_ROUNDS for the environment.
+"""
+import argparse
+
+from app.core.config import settings
+from app.core.security import calibrate_bcrypt_rounds
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--target-ms", type=int, default=settings.bcrypt_target_hash_ms)
+    parser.add_argument("--min-rounds", type=int, default=settings.bcrypt_min_rounds)
+    parser.add_argument("--max-rounds", type=int, default=settings.bcrypt_max_rounds)
+    args = parser.parse_args(argv)
+
+    rounds = calibrate_bcrypt_rounds(args.target_ms, args.min_rounds, args.max_rounds)
+    print(f"BCRYPT_ROUNDS={rounds}")
+
+
+if __name__ == "__main__":
+    main()
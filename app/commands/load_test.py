@@ -0,0 +1,355 @@
+"""Seed a database at scale and load-test the API with concurrent clients.
+
+Usage:
+    python -m app.commands.load_test seed [--holders 100000] [--transactions 100]
+    python -m app.commands.load_test run [--clients 50] [--duration 60] [--output results.json]
+        [--baseline baseline.json] [--max-regression 0.2] [--base-url URL]
+
+Both subcommands use DATABASE_URL, so point it at a scratch database. ``seed``
+bulk-inserts users, holders, one checking account each and a ledger spread over
+the last ``--days`` days with matching daily_balances rows; every seeded user's
+password is LOAD_PASSWORD. ``run`` starts the real ASGI app in-process (or
+targets a running server with --base-url) and has each client either sign up or
+log in as a seeded user, then repeat deposit -> transfer -> statement until the
+duration is over. Per-endpoint throughput and p50/p95/p99 are printed and
+written as JSON; with --baseline the command exits 1 when an endpoint's p95 or
+the overall throughput is worse than the baseline by more than --max-regression.
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import sys
+import time
+import uuid
+from collections import Counter, defaultdict
+from datetime import date, timedelta
+from pathlib import Path
+
+import httpx
+from sqlalchemy import func, insert, select
+
+from app.core.security import get_password_hash
+from app.db.session import SessionLocal, engine, init_db
+from app.db.sharding import shard_router
+from app.models import Account, AccountHolder, Transaction, User
+from app.models.daily_balance import DailyBalance
+from app.models.enums import AccountType, TransactionType
+from app.models.mixins import utcnow
+from app.services.daily_balance_service import utc_day
+from app.utils.ids import new_id
+
+LOAD_PASSWORD = "LoadTest1!"
+SEED_EMAIL = "load{}@example.com"
+SEED_BATCH_HOLDERS = 1000
+API = "/api/v1"
+
+
+def _ledger(rng: random.Random, account_id: str, count: int, days: int):
+    """Transactions for one account, oldest first, and their daily rollup rows."""
+    now = utcnow()
+    times = sorted(now - timedelta(seconds=rng.uniform(0, days * 86400)) for _ in range(count))
+    balance = 0
+    transactions, daily = [], {}
+    for created_at in times:
+        if balance >= 2000 and rng.random() < 0.4:
+            kind, amount = TransactionType.withdrawal, rng.randint(100, balance // 2)
+            balance -= amount
+        else:
+            kind, amount = TransactionType.deposit, rng.randint(100, 50_000)
+            balance += amount
+        transactions.append({
+            "id": new_id(),
+            "account_id": account_id,
+            "transaction_type": kind,
+            "amount_cents": amount,
+            "balance_after_cents": balance,
+            "created_at": created_at,
+        })
+        day = utc_day(created_at)
+        row = daily.setdefault(day, {
+            "account_id": account_id,
+            "day": day,
+            "total_deposits_cents": 0,
+            "total_withdrawals_cents": 0,
+            "transaction_count": 0,
+        })
+        row["closing_balance_cents"] = balance
+        row["total_deposits_cents" if kind == TransactionType.deposit else "total_withdrawals_cents"] += amount
+        row["transaction_count"] += 1
+    return balance, transactions, list(daily.values())
+
+
+def seed(Session, holders: int, transactions: int, days: int, rng_seed: int = 0) -> list[str]:
+    """Bulk-insert ``holders`` users with one account and ``transactions`` ledger rows each.
+
+    Returns the new account ids.
+    """
+    rng = random.Random(rng_seed)
+    hashed_password = get_password_hash(LOAD_PASSWORD)
+    account_ids = []
+    with Session() as db:
+        first = db.scalar(
+            select(func.count()).select_from(User).where(User.email.like(SEED_EMAIL.format("%")))
+        )
+
+    for batch_start in range(first, first + holders, SEED_BATCH_HOLDERS):
+        users, profiles, accounts, ledger, daily = [], [], [], [], []
+        for i in range(batch_start, min(batch_start + SEED_BATCH_HOLDERS, first + holders)):
+            user_id, holder_id, account_id = new_id(), new_id(), new_id()
+            balance, rows, days_rows = _ledger(rng, account_id, transactions, days)
+            users.append({"id": user_id, "email": SEED_EMAIL.format(i), "hashed_password": hashed_password})
+            profiles.append({
+                "id": holder_id,
+                "user_id": user_id,
+                "first_name": "Load",
+                "last_name": str(i),
+                "date_of_birth": date(1990, 1, 1),
+                "phone": "+14155550100",
+                "address": "1 Load St",
+                "ssn_last_four": "0000",
+            })
+            accounts.append({
+                "id": account_id,
+                "holder_id": holder_id,
+                "account_number": str(9_000_000_000 + i),
+                "account_type": AccountType.checking,
+                "balance_cents": balance,
+            })
+            ledger.extend(rows)
+            daily.extend(days_rows)
+            account_ids.append(account_id)
+
+        with Session() as db:
+            for model, rows in (
+                (User, users),
+                (AccountHolder, profiles),
+                (Account, accounts),
+                (Transaction, ledger),
+                (DailyBalance, daily),
+            ):
+                db.execute(insert(model), rows)
+            db.commit()
+        done = min(batch_start + SEED_BATCH_HOLDERS, first + holders) - first
+        print(f"seeded {done}/{holders} holders", file=sys.stderr)
+    return account_ids
+
+
+def percentile(ordered: list[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+
+class Recorder:
+    def __init__(self) -> None:
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.errors: Counter[str] = Counter()
+
+    async def call(self, client: httpx.AsyncClient, name: str, method: str, url: str, **kwargs):
+        started = time.perf_counter()
+        response = await client.request(method, url, **kwargs)
+        self.latencies[name].append(time.perf_counter() - started)
+        if response.status_code >= 400:
+            self.errors[name] += 1
+        return response
+
+    def report(self, elapsed: float) -> dict:
+        endpoints = {}
+        for name, values in sorted(self.latencies.items()):
+            values.sort()
+            endpoints[name] = {
+                "requests": len(values),
+                "errors": self.errors[name],
+                "requests_per_s": round(len(values) / elapsed, 2),
+                "p50_ms": round(percentile(values, 0.50) * 1000, 2),
+                "p95_ms": round(percentile(values, 0.95) * 1000, 2),
+                "p99_ms": round(percentile(values, 0.99) * 1000, 2),
+            }
+        total = sum(len(values) for values in self.latencies.values())
+        return {
+            "elapsed_s": round(elapsed, 2),
+            "requests": total,
+            "errors": sum(self.errors.values()),
+            "requests_per_s": round(total / elapsed, 2),
+            "endpoints": endpoints,
+        }
+
+
+async def _open_session(client, recorder: Recorder, rng: random.Random, seeded, new_user_share: float):
+    """Log in as a seeded user or sign up a new one; returns (headers, account id)."""
+    if seeded and rng.random() >= new_user_share:
+        email, account_id = rng.choice(seeded)
+        r = await recorder.call(client, "POST /auth/login", "POST", f"{API}/auth/login",
+                                json={"email": email, "password": LOAD_PASSWORD})
+        if r.status_code != 200:
+            return None
+        return {"Authorization": f"Bearer {r.json()['access_token']}"}, account_id
+
+    r = await recorder.call(client, "POST /auth/signup", "POST", f"{API}/auth/signup",
+                            json={"email": f"run-{uuid.uuid4().hex}@example.com", "password": LOAD_PASSWORD})
+    if r.status_code != 201:
+        return None
+    headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+    r = await recorder.call(client, "POST /account-holders/", "POST", f"{API}/account-holders/", headers=headers, json={
+        "first_name": "Run",
+        "last_name": "Client",
+        "date_of_birth": "1990-01-15",
+        "phone": "+14155550100",
+        "address": "1 Market St, San Francisco, CA 94105",
+        "ssn_last_four": "1234",
+    })
+    if r.status_code != 201:
+        return None
+    r = await recorder.call(client, "POST /accounts/", "POST", f"{API}/accounts/", headers=headers,
+                            json={"account_type": "checking", "initial_deposit_cents": 100_000})
+    if r.status_code != 201:
+        return None
+    return headers, r.json()["id"]
+
+
+async def _client(client, recorder: Recorder, rng: random.Random, seeded, targets: list[str],
+                  deadline: float, new_user_share: float) -> None:
+    session = await _open_session(client, recorder, rng, seeded, new_user_share)
+    if session is None:
+        return
+    headers, account_id = session
+    targets.append(account_id)
+    today = date.today()
+    statement = {"start": str(today - timedelta(days=30)), "end": str(today)}
+    while time.monotonic() < deadline:
+        await recorder.call(client, "POST /transactions/{account_id}/deposit", "POST",
+                            f"{API}/transactions/{account_id}/deposit", headers=headers,
+                            json={"amount_cents": rng.randint(100, 10_000)})
+        to_account_id = rng.choice(targets)
+        if to_account_id != account_id:
+            await recorder.call(client, "POST /transfers/", "POST", f"{API}/transfers/", headers=headers, json={
+                "from_account_id": account_id,
+                "to_account_id": to_account_id,
+                "amount_cents": rng.randint(1, 100),
+            })
+        await recorder.call(client, "GET /statements/{account_id}", "GET",
+                            f"{API}/statements/{account_id}", headers=headers, params=statement)
+
+
+def _seeded_sample(size: int) -> list[tuple[str, str]]:
+    stmt = (
+        select(User.email, Account.id)
+        .join(AccountHolder, AccountHolder.user_id == User.id)
+        .join(Account, Account.holder_id == AccountHolder.id)
+        .where(User.email.like(SEED_EMAIL.format("%")))
+        .order_by(func.random())
+        .limit(size)
+    )
+    with SessionLocal() as db:
+        return [tuple(row) for row in db.execute(stmt)]
+
+
+async def run(clients: int, duration: float, new_user_share: float, base_url: str | None,
+              rng_seed: int = 0) -> dict:
+    rng = random.Random(rng_seed)
+    seeded = _seeded_sample(max(clients * 10, 1000))
+    targets = [account_id for _, account_id in seeded]
+    recorder = Recorder()
+    limits = httpx.Limits(max_connections=None)
+    if base_url:
+        transport, app = httpx.AsyncHTTPTransport(limits=limits), None
+    else:
+        from app.main import app
+
+        transport, base_url = httpx.ASGITransport(app=app), "http://load-test"
+        await app.router.startup()
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url=base_url, limits=limits, timeout=60) as client:
+            started = time.monotonic()
+            deadline = started + duration
+            await asyncio.gather(*(
+                _client(client, recorder, random.Random(rng.random()), seeded, targets, deadline, new_user_share)
+                for _ in range(clients)
+            ))
+            elapsed = time.monotonic() - started
+    finally:
+        if app is not None:
+            await app.router.shutdown()
+
+    result = recorder.report(elapsed)
+    result["config"] = {
+        "clients": clients,
+        "duration_s": duration,
+        "new_user_share": new_user_share,
+        "target": base_url,
+        "database": engine.dialect.name,
+        "seeded_users_sampled": len(seeded),
+    }
+    return result
+
+
+def regressions(result: dict, baseline: dict, max_regression: float) -> list[str]:
+    """Endpoints whose p95 grew, or an overall throughput that fell, by more than max_regression."""
+    found = []
+    for name, current in result["endpoints"].items():
+        before = baseline.get("endpoints", {}).get(name)
+        if before and current["p95_ms"] > before["p95_ms"] * (1 + max_regression):
+            found.append(f"{name}: p95 {before['p95_ms']:.1f} ms -> {current['p95_ms']:.1f} ms")
+    if result["requests_per_s"] < baseline["requests_per_s"] * (1 - max_regression):
+        found.append(
+            f"throughput {baseline['requests_per_s']:.0f} -> {result['requests_per_s']:.0f} req/s"
+        )
+    return found
+
+
+def _print_report(result: dict) -> None:
+    print(f"{'endpoint':<42}{'req':>8}{'err':>6}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    for name, e in result["endpoints"].items():
+        print(
+            f"{name:<42}{e['requests']:>8}{e['errors']:>6}{e['requests_per_s']:>9.1f}"
+            f"{e['p50_ms']:>9.1f}{e['p95_ms']:>9.1f}{e['p99_ms']:>9.1f}"
+        )
+    print(f"{'total':<42}{result['requests']:>8}{result['errors']:>6}{result['requests_per_s']:>9.1f}")
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    seed_parser = commands.add_parser("seed")
+    seed_parser.add_argument("--holders", type=int, default=100_000)
+    seed_parser.add_argument("--transactions", type=int, default=100, help="Ledger rows per account")
+    seed_parser.add_argument("--days", type=int, default=365)
+    run_parser = commands.add_parser("run")
+    run_parser.add_argument("--clients", type=int, default=50)
+    run_parser.add_argument("--duration", type=float, default=60)
+    run_parser.add_argument("--new-user-share", type=float, default=0.2,
+                            help="Share of clients that sign up instead of logging in as a seeded user")
+    run_parser.add_argument("--base-url", help="Load a running server instead of the in-process app")
+    run_parser.add_argument("--output", type=Path)
+    run_parser.add_argument("--baseline", type=Path)
+    run_parser.add_argument("--max-regression", type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    if shard_router.enabled:
+        parser.error("the load test seeds and samples the primary only; unset SHARD_DATABASE_URLS")
+    init_db()
+
+    if args.command == "seed":
+        started = time.perf_counter()
+        seed(SessionLocal, args.holders, args.transactions, args.days)
+        elapsed = time.perf_counter() - started
+        rows = args.holders * args.transactions
+        print(f"Seeded {args.holders} holders and {rows} transactions in {elapsed:.1f}s "
+              f"({rows / elapsed:.0f} rows/s)")
+        return
+
+    result = asyncio.run(run(args.clients, args.duration, args.new_user_share, args.base_url))
+    _print_report(result)
+    if args.output:
+        args.output.write_text(json.dumps(result, indent=2) + "\n")
+    if args.baseline:
+        found = regressions(result, json.loads(args.baseline.read_text()), args.max_regression)
+        for line in found:
+            print(f"REGRESSION {line}")
+        if found:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
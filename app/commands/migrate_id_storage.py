@@ -0,0 +1,67 @@
+"""Copy a database into a fresh one that stores ids as ID_STORAGE says.
+
+Usage: ID_STORAGE=binary python -m app.commands.migrate_id_storage --source URL --target URL
+
+Existing ids keep their values, so clients' stored ids and the audit trail stay
+valid; only new rows get ID_STRATEGY keys. Run it with the service stopped, then
+point DATABASE_URL (or SHARD_DATABASE_URLS) at the target.
+"""
+import argparse
+import uuid
+
+from sqlalchemy import MetaData, Table, insert, inspect, select
+
+from app.core.config import settings
+from app.db.base import Base
+from app.db.session import create_db_engine
+from app.models.mixins import IdType
+
+
+def _as_text(value):
+    """An id read without IdType, in whatever storage the source used, as text."""
+    if isinstance(value, (bytes, memoryview)):
+        return str(uuid.UUID(bytes=bytes(value)))
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    return value
+
+
+def copy_table(source_conn, target_conn, name: str, batch: int) -> int:
+    target_table = Base.metadata.tables[name]
+    source_table = Table(name, MetaData(), autoload_with=source_conn)
+    id_columns = [c.name for c in target_table.columns if isinstance(c.type, IdType)]
+    copied = 0
+    rows = source_conn.execute(select(source_table)).mappings()
+    while chunk := rows.fetchmany(batch):
+        values = [
+            {**row, **{column: _as_text(row[column]) for column in id_columns}}
+            for row in chunk
+        ]
+        target_conn.execute(insert(target_table), values)
+        copied += len(values)
+    return copied
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--source", required=True)
+    parser.add_argument("--target", required=True)
+    parser.add_argument("--batch", type=int, default=1_000)
+    args = parser.parse_args(argv)
+
+    import app.models  # noqa: F401
+
+    source = create_db_engine(args.source)
+    target = create_db_engine(args.target)
+    Base.metadata.create_all(bind=target)
+    present = set(inspect(source).get_table_names())
+    with source.connect() as source_conn, target.begin() as target_conn:
+        for table in Base.metadata.sorted_tables:
+            if table.name in present:
+                copied = copy_table(source_conn, target_conn, table.name, args.batch)
+                print(f"{table.name}: {copied} rows")
+    print(f"Target stores ids as {settings.id_storage}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+"""Finish cross-shard transfers left pending after their source was debited.
+
+Usage: python -m app.commands.settle_transfers [--older-than-seconds N]
+Run it from a scheduler when SHARD_DATABASE_URLS is set; settling is idempotent.
+"""
+import argparse
+
+from app.db.sharding import shard_router
+from app.models.transfer import Transfer
+from app.services.transfer_service import pending_transfer_ids, settle_transfer
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--older-than-seconds", type=int, default=30)
+    args = parser.parse_args(argv)
+
+    if not shard_router.enabled:
+        print("Sharding is not enabled")
+        return
+    shard_router.init_schema()
+    counts: dict[str, int] = {}
+    for index in shard_router.indexes:
+        with shard_router.session(index) as source:
+            for transfer_id in pending_transfer_ids(source, args.older_than_seconds):
+                to_account_id = source.get(Transfer, transfer_id).to_account_id
+                destination_index = shard_router.locate_account(to_account_id)
+                if destination_index is None:
+                    destination_index = index
+                with shard_router.session(destination_index) as destination:
+                    transfer = settle_transfer(source, destination, transfer_id)
+                counts[transfer.status.value] = counts.get(transfer.status.value, 0) + 1
+    print(f"Settled transfers: {counts or 'none pending'}")
+
+
+if __name__ == "__main__":
+    main()
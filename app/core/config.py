@@ -1,4 +1,7 @@
 from pathlib import Path
+from typing import Literal
+
+from pydantic import field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -9,10 +12,93 @@ class Settings(BaseSettings):
     access_token_expire_minutes: int = 30
     refresh_token_expire_days: int = 7
     cors_origins: list[str] = ["*"]
+    database_url: str = ""
+    # uuid7 keys are time-ordered, so inserts append to the primary key index
+    # instead of splitting random pages. Both keep the canonical UUID text.
+    id_strategy: Literal["uuid7", "uuid4"] = "uuid7"
+    # "binary" stores ids in 16 bytes (native uuid on PostgreSQL). Fixed once a
+    # database has data; move an existing one with app.commands.migrate_id_storage.
+    id_storage: Literal["text", "binary"] = "text"
+    # Databases holding accounts and ledgers, partitioned by holder id. Empty
+    # keeps everything on the primary.
+    shard_database_urls: list[str] = []
+    # Optional replica for GET handlers; empty reads from the primary.
+    replica_database_url: str = ""
+    # After a write, that user's reads stay on the primary this long.
+    read_your_writes_seconds: int = 5
+    # Pool profile for server databases (PostgreSQL). SQLite keeps its own settings.
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    db_pool_timeout_seconds: int = 30
+    db_pool_recycle_seconds: int = 1800
+    db_pool_pre_ping: bool = True
+    db_statement_timeout_ms: int = 30_000
+    # SQLite PRAGMA profile. synchronous=NORMAL is durable against application
+    # crashes in WAL mode; only an OS crash/power loss can drop the last commits.
+    sqlite_synchronous: Literal["OFF", "NORMAL", "FULL", "EXTRA"] = "NORMAL"
+    sqlite_busy_timeout_ms: int = 5_000
+    sqlite_cache_size_kib: int = 65_536
+    sqlite_mmap_size_bytes: int = 268_435_456
+    sqlite_temp_store: Literal["DEFAULT", "FILE", "MEMORY"] = "MEMORY"
+    sqlite_wal_autocheckpoint_pages: int = 1_000
+    sqlite_journal_size_limit_bytes: int = 67_108_864
+    sqlite_checkpoint_interval_seconds: int = 60
+    sqlite_checkpoint_mode: Literal["PASSIVE", "FULL", "RESTART", "TRUNCATE"] = "PASSIVE"
+    # Serialise deposits, withdrawals and transfers through one writer thread
+    # with group commit. Meant for single-node SQLite deployments.
+    write_queue_enabled: bool = False
+    write_queue_max_batch: int = 64
+    write_queue_max_wait_ms: int = 2
+    write_queue_size: int = 1_000
+    # Most operations one POST /transactions/batch may carry.
+    transaction_batch_max_size: int = 1_000
+    # Prometheus /metrics endpoint and request/DB instrumentation. Set the
+    # PROMETHEUS_MULTIPROC_DIR environment variable when running several workers.
+    metrics_enabled: bool = True
+    # Per-request SQL accounting: Server-Timing header and a log line per request.
+    # A statement repeated this often in one request is logged as a likely N+1.
+    query_stats_enabled: bool = True
+    n_plus_one_threshold: int = 10
+    # Raise instead of logging when an endpoint exceeds its query_budget (tests).
+    query_budget_strict: bool = False
+    # Stack sampling. Admins profile a worker for up to profiling_max_seconds via
+    # /api/v1/admin/profile; a request sent with X-Profile: <profiling_header_secret>
+    # is sampled on its own and saved to profile_dir. An empty secret disables the header.
+    profiling_max_seconds: int = 60
+    profiling_interval_ms: int = 5
+    profiling_request_interval_ms: int = 1
+    profiling_header_secret: str = ""
+    profile_dir: str = "profiles"
+    admin_emails: list[str] = []
+    transaction_count_cache_ttl_seconds: int = 30
+    principal_cache_ttl_seconds: int = 60
+    principal_cache_maxsize: int = 10_000
+    password_hash_workers: int = 4
+    password_hash_queue_size: int = 16
+    bcrypt_rounds: int = 12
+    # When enabled, startup replaces bcrypt_rounds with the highest cost whose
+    # hash time stays under bcrypt_target_hash_ms on this hardware.
+    bcrypt_calibrate_on_startup: bool = False
+    bcrypt_target_hash_ms: int = 100
+    bcrypt_min_rounds: int = 10
+    bcrypt_max_rounds: int = 16
+    audit_async_enabled: bool = True
+    audit_batch_size: int = 200
+    audit_flush_interval_ms: int = 500
+    audit_queue_size: int = 10_000
+    audit_retention_months: int = 12
+    audit_archive_dir: str = "audit_archive"
+    # Answer statement balances/totals from the daily_balances rollup. Off by
+    # default: on a database with earlier history the rollup is incomplete until
+    # `python -m app.commands.backfill_daily_balances` has run with writes stopped.
+    statement_use_daily_balances: bool = False
 
-    @property
-    def database_url(self) -> str:
-        """Generate database URL with data_db folder."""
+    @field_validator("database_url")
+    @classmethod
+    def _default_database_url(cls, value: str) -> str:
+        """Fall back to a SQLite file in the data_db folder."""
+        if value:
+            return value
         db_dir = Path(__file__).parent.parent / "data_db"
         db_dir.mkdir(exist_ok=True)
         db_path = db_dir / "banking.db"
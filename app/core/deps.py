@@ -1,15 +1,22 @@
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
+from app.core.principal import Principal, invalidate_principal, load_principal
 from app.core.security import decode_token
-from app.db.session import SessionLocal
+from app.db.routing import is_pinned_to_primary, pin_to_primary
+from app.db.session import AsyncReadSessionLocal, AsyncSessionLocal, ReadSessionLocal, SessionLocal
+from app.db.sharding import shard_router
 from app.models.account import Account
 from app.models.account_holder import AccountHolder
-from app.models.user import User
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
+# Only used to pick a read session; authentication proper still goes through oauth2_scheme.
+_optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login", auto_error=False)
+
+_SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
 
 
 def get_db():
@@ -20,10 +27,36 @@ def get_db():
         db.close()
 
 
-def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db),
-) -> User:
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def _reads_from_primary(token: str | None) -> bool:
+    if not token:
+        return False
+    try:
+        return is_pinned_to_primary(_user_id_from_token(token))
+    except HTTPException:
+        return False
+
+
+def get_read_db(token: str | None = Depends(_optional_oauth2_scheme)):
+    """Session for GET handlers: the replica, unless the caller wrote recently."""
+    db = SessionLocal() if _reads_from_primary(token) else ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_read_db(token: str | None = Depends(_optional_oauth2_scheme)):
+    factory = AsyncSessionLocal if _reads_from_primary(token) else AsyncReadSessionLocal
+    async with factory() as db:
+        yield db
+
+
+def _user_id_from_token(token: str) -> str:
     payload = decode_token(token)
     if payload.get("type") != "access":
         raise HTTPException(
@@ -36,42 +69,175 @@ def get_current_user(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid token",
         )
-    user = db.scalar(select(User).where(User.id == user_id))
-    if not user or not user.is_active:
+    return user_id
+
+
+def _ensure_active_principal(principal: Principal | None) -> Principal:
+    if not principal or not principal.is_active:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Inactive user",
         )
-    return user
+    return principal
 
 
-def get_current_holder(
-    current_user: User = Depends(get_current_user),
+def get_current_user(
+    request: Request,
+    token: str = Depends(oauth2_scheme),
     db: Session = Depends(get_db),
-) -> AccountHolder:
-    holder = db.scalar(select(AccountHolder).where(AccountHolder.user_id == current_user.id))
-    if not holder:
+) -> Principal:
+    user_id = _user_id_from_token(token)
+    principal = _ensure_active_principal(load_principal(db, user_id))
+    if request.method not in _SAFE_METHODS:
+        pin_to_primary(principal.id)
+    return principal
+
+
+async def get_current_user_async(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_async_db),
+) -> Principal:
+    # Principals are cached, so they are always resolved from the primary: a
+    # lagging replica would otherwise cache a missing holder or a stale is_active.
+    user_id = _user_id_from_token(token)
+    return _ensure_active_principal(await db.run_sync(load_principal, user_id))
+
+
+def _ensure_holder(current_user: Principal) -> Principal:
+    if not current_user.holder_id:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Account holder profile not found",
         )
-    return holder
+    return current_user
 
 
-def get_account_for_user(
-    account_id: str,
-    current_user: User,
-    db: Session,
-) -> Account:
-    stmt = (
-        select(Account)
-        .join(AccountHolder, Account.holder_id == AccountHolder.id)
-        .where(Account.id == account_id, AccountHolder.user_id == current_user.id)
+def _refresh_holder(current_user: Principal, db: Session) -> Principal:
+    if not current_user.holder_id:
+        # A missing holder may have been created through another worker since
+        # this principal was cached; only positive lookups are trusted.
+        invalidate_principal(current_user.id)
+        current_user = load_principal(db, current_user.id) or current_user
+    return current_user
+
+
+async def _refresh_holder_async(current_user: Principal, db: AsyncSession) -> Principal:
+    if not current_user.holder_id:
+        return await db.run_sync(lambda session: _refresh_holder(current_user, session))
+    return current_user
+
+
+def get_current_holder(
+    current_user: Principal = Depends(get_current_user),
+    db: Session = Depends(get_db),
+) -> Principal:
+    return _ensure_holder(_refresh_holder(current_user, db))
+
+
+async def get_current_holder_async(
+    current_user: Principal = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
+) -> Principal:
+    return _ensure_holder(await _refresh_holder_async(current_user, db))
+
+
+def _shard_session(current_user: Principal, db: Session):
+    holder_id = shard_router.enabled and _refresh_holder(current_user, db).holder_id
+    if not holder_id:
+        # Unsharded, or no holder and therefore nothing to find on any shard.
+        yield db
+        return
+    shard_db = shard_router.session_for(holder_id)
+    try:
+        yield shard_db
+    finally:
+        shard_db.close()
+
+
+def get_shard_db(
+    current_user: Principal = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """Session on the caller's shard for accounts, ledger, cards and transfers."""
+    yield from _shard_session(current_user, db)
+
+
+def get_shard_read_db(
+    current_user: Principal = Depends(get_current_user),
+    db: Session = Depends(get_read_db),
+):
+    yield from _shard_session(current_user, db)
+
+
+async def get_async_shard_read_db(
+    current_user: Principal = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_read_db),
+    primary_db: AsyncSession = Depends(get_async_db),
+):
+    holder_id = shard_router.enabled and (await _refresh_holder_async(current_user, primary_db)).holder_id
+    if not holder_id:
+        yield db
+        return
+    async with shard_router.async_session_for(holder_id) as shard_db:
+        yield shard_db
+
+
+def get_current_admin(
+    current_user: Principal = Depends(get_current_user),
+) -> Principal:
+    if not current_user.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin privileges required",
+        )
+    return current_user
+
+
+def _owned_accounts_stmt(current_user: Principal):
+    stmt = select(Account)
+    if current_user.holder_id:
+        # No join, so the check also works on shards, which have no holder table.
+        return stmt.where(Account.holder_id == current_user.holder_id)
+    return stmt.join(AccountHolder, Account.holder_id == AccountHolder.id).where(
+        AccountHolder.user_id == current_user.id
     )
-    account = db.scalar(stmt)
+
+
+def _account_for_user_stmt(account_id: str, current_user: Principal):
+    return _owned_accounts_stmt(current_user).where(Account.id == account_id)
+
+
+def _ensure_account_found(account: Account | None) -> Account:
     if not account:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Account not found",
         )
     return account
+
+
+def get_account_for_user(
+    account_id: str,
+    current_user: Principal,
+    db: Session,
+) -> Account:
+    return _ensure_account_found(db.scalar(_account_for_user_stmt(account_id, current_user)))
+
+
+def get_accounts_for_user(
+    account_ids: list[str],
+    current_user: Principal,
+    db: Session,
+) -> dict[str, Account]:
+    """The caller's accounts among ``account_ids`` in one query; others are left out."""
+    stmt = _owned_accounts_stmt(current_user).where(Account.id.in_(set(account_ids)))
+    return {account.id: account for account in db.scalars(stmt)}
+
+
+async def get_account_for_user_async(
+    account_id: str,
+    current_user: Principal,
+    db: AsyncSession,
+) -> Account:
+    account = await db.scalar(_account_for_user_stmt(account_id, current_user))
+    return _ensure_account_found(account)
@@ -0,0 +1,103 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Any, Callable
+
+from app.core.config import settings
+from app.core.metrics import HASH_IN_FLIGHT, HASH_LATENCY, HASH_QUEUE_DEPTH, HASH_REJECTED, HASH_WAIT
+
+
+class HashingSaturatedError(Exception):
+    """Raised when the hashing queue is full and the caller should back off."""
+
+
+@dataclass
+class HashingStats:
+    submitted: int = 0
+    completed: int = 0
+    rejected: int = 0
+    in_flight: int = 0
+    queue_depth: int = 0
+    wait_seconds_total: float = 0.0
+    hash_seconds_total: float = 0.0
+    hash_seconds_max: float = 0.0
+
+
+class PasswordHasher:
+    """Runs bcrypt on its own small thread pool with a bounded queue.
+
+    bcrypt releases the GIL, so threads give real parallelism. Capacity is
+    ``max_workers + max_queue`` outstanding jobs; beyond that ``submit`` fails
+    fast instead of letting a login storm occupy the request threadpool.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int):
+        self.max_workers = max_workers
+        self.capacity = max_workers + max_queue
+        self._executor: ThreadPoolExecutor | None = None
+        self._lock = threading.Lock()
+        self._stats = HashingStats()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="password-hash"
+            )
+        return self._executor
+
+    def submit(self, fn: Callable[..., Any], *args: Any) -> Future:
+        enqueued_at = time.perf_counter()
+        with self._lock:
+            outstanding = self._stats.in_flight + self._stats.queue_depth
+            if outstanding >= self.capacity:
+                self._stats.rejected += 1
+                HASH_REJECTED.inc()
+                raise HashingSaturatedError("Password hashing queue is full")
+            self._stats.submitted += 1
+            self._stats.queue_depth += 1
+            HASH_QUEUE_DEPTH.inc()
+            executor = self._get_executor()
+
+        def job():
+            started_at = time.perf_counter()
+            with self._lock:
+                self._stats.queue_depth -= 1
+                self._stats.in_flight += 1
+                self._stats.wait_seconds_total += started_at - enqueued_at
+            HASH_QUEUE_DEPTH.dec()
+            HASH_IN_FLIGHT.inc()
+            HASH_WAIT.observe(started_at - enqueued_at)
+            try:
+                return fn(*args)
+            finally:
+                elapsed = time.perf_counter() - started_at
+                with self._lock:
+                    self._stats.in_flight -= 1
+                    self._stats.completed += 1
+                    self._stats.hash_seconds_total += elapsed
+                    self._stats.hash_seconds_max = max(self._stats.hash_seconds_max, elapsed)
+                HASH_IN_FLIGHT.dec()
+                HASH_LATENCY.observe(elapsed)
+
+        return executor.submit(job)
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        return await asyncio.wrap_future(self.submit(fn, *args))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return asdict(self._stats)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+password_hasher = PasswordHasher(
+    max_workers=settings.password_hash_workers,
+    max_queue=settings.password_hash_queue_size,
+)
@@ -0,0 +1,131 @@
+"""Prometheus metrics for the service.
+
+With PROMETHEUS_MULTIPROC_DIR set (before the process starts) every uvicorn
+worker writes its samples to memory-mapped files in that directory and
+``render_metrics`` aggregates all of them, whichever worker serves the scrape.
+"""
+import os
+import time
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+_REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+_DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0, 5.0)
+_HASH_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Request latency by route template",
+    ["method", "route"],
+    buckets=_REQUEST_BUCKETS,
+)
+REQUESTS = Counter("http_requests_total", "Responses by route template and status", ["method", "route", "status"])
+IN_FLIGHT = Gauge("http_requests_in_progress", "Requests being handled", multiprocess_mode="livesum")
+POOL_CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds", "Time spent waiting for a pooled connection", buckets=_DB_BUCKETS
+)
+COMMIT_LATENCY = Histogram(
+    "db_commit_duration_seconds", "Session commit time, including its final flush", buckets=_DB_BUCKETS
+)
+DEPOSITS = Counter("bank_deposits_total", "Committed deposits")
+WITHDRAWALS = Counter("bank_withdrawals_total", "Committed withdrawals")
+TRANSFERS = Counter("bank_transfers_total", "Transfers created, by resulting status", ["status"])
+INSUFFICIENT_FUNDS = Counter("bank_insufficient_funds_total", "Debits refused for insufficient funds")
+HASH_QUEUE_DEPTH = Gauge(
+    "password_hash_queue_depth", "Hash jobs waiting for a hashing thread", multiprocess_mode="livesum"
+)
+HASH_IN_FLIGHT = Gauge("password_hash_in_progress", "Hash jobs running", multiprocess_mode="livesum")
+HASH_REJECTED = Counter("password_hash_rejected_total", "Hash jobs refused with 429 because the queue was full")
+HASH_WAIT = Histogram(
+    "password_hash_wait_seconds", "Time a hash job waited for a hashing thread", buckets=_HASH_BUCKETS
+)
+HASH_LATENCY = Histogram("password_hash_duration_seconds", "Time spent hashing or verifying", buckets=_HASH_BUCKETS)
+
+UNMATCHED_ROUTE = "unmatched"
+
+
+class RouteMetrics:
+    """Per-route metric children, created up front so the hot path is a dict lookup.
+
+    ``labels()`` takes the metric's lock on every call; the children it returns
+    are reused here instead.
+    """
+
+    def __init__(self):
+        self._latency: dict[tuple[str, str], object] = {}
+        self._responses: dict[tuple[str, str, int], object] = {}
+
+    def preallocate(self, routes) -> None:
+        for route in routes:
+            for method in getattr(route, "methods", None) or ():
+                self._latency_child(method, route.path)
+        for method in ("GET", "POST"):
+            self._latency_child(method, UNMATCHED_ROUTE)
+
+    def _latency_child(self, method: str, route: str):
+        child = self._latency.get((method, route))
+        if child is None:
+            child = self._latency[(method, route)] = REQUEST_LATENCY.labels(method, route)
+        return child
+
+    def observe(self, method: str, route: str, status_code: int, seconds: float) -> None:
+        self._latency_child(method, route).observe(seconds)
+        key = (method, route, status_code)
+        child = self._responses.get(key)
+        if child is None:
+            child = self._responses[key] = REQUESTS.labels(method, route, str(status_code))
+        child.inc()
+
+
+route_metrics = RouteMetrics()
+
+
+def _before_commit(session):
+    session.info["commit_started"] = time.perf_counter()
+
+
+def _after_commit(session):
+    started = session.info.pop("commit_started", None)
+    if started is not None:
+        COMMIT_LATENCY.observe(time.perf_counter() - started)
+
+
+def _after_rollback(session, previous_transaction):
+    session.info.pop("commit_started", None)
+
+
+def instrument_commits() -> None:
+    if not event.contains(Session, "before_commit", _before_commit):
+        event.listen(Session, "before_commit", _before_commit)
+        event.listen(Session, "after_commit", _after_commit)
+        event.listen(Session, "after_soft_rollback", _after_rollback)
+
+
+def _multiprocess_dir() -> str | None:
+    return os.environ.get("PROMETHEUS_MULTIPROC_DIR") or os.environ.get("prometheus_multiproc_dir")
+
+
+def render_metrics() -> tuple[bytes, str]:
+    if _multiprocess_dir():
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def mark_worker_dead() -> None:
+    """Drop this worker's live gauges from the shared files when it exits."""
+    if _multiprocess_dir():
+        multiprocess.mark_process_dead(os.getpid())
@@ -0,0 +1,143 @@
+import hmac
+import logging
+import time
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import MutableHeaders
+
+from app.core.config import settings
+from app.core.metrics import IN_FLIGHT, UNMATCHED_ROUTE, route_metrics
+from app.core.profiling import StackSampler, save_profile
+from app.db.query_stats import QueryBudgetExceededError, QueryStats, track_queries
+from app.utils.ids import new_id
+
+logger = logging.getLogger(__name__)
+
+
+class MetricsMiddleware:
+    """Records latency, status and in-flight count per route template."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status_code = 500
+
+        async def _send(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, _send)
+        finally:
+            IN_FLIGHT.dec()
+            # The router records the matched route in the scope; templates keep label counts bounded.
+            route = getattr(scope.get("route"), "path", UNMATCHED_ROUTE)
+            route_metrics.observe(scope["method"], route, status_code, time.perf_counter() - started)
+
+
+class ProfilingMiddleware:
+    """Samples one request sent with ``X-Profile: <profiling_header_secret>``.
+
+    The stacks are saved under profile_dir and the response carries their id in
+    X-Profile-Id; admins fetch them from /api/v1/admin/profiles/{id}.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        secret = settings.profiling_header_secret
+        if scope["type"] != "http" or not secret:
+            await self.app(scope, receive, send)
+            return
+        requested = dict(scope["headers"]).get(b"x-profile")
+        if requested is None or not hmac.compare_digest(requested, secret.encode()):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = new_id()
+
+        async def _send(message):
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).append("X-Profile-Id", profile_id)
+            await send(message)
+
+        sampler = StackSampler(settings.profiling_request_interval_ms / 1000).start()
+        try:
+            await self.app(scope, receive, _send)
+        finally:
+            # Joining the sampler and writing the file would stall the event loop.
+            await run_in_threadpool(sampler.stop)
+            await run_in_threadpool(save_profile, profile_id, f"{scope['method']} {scope['path']}", sampler)
+
+
+class QueryStatsMiddleware:
+    """Counts the SQL each request runs and reports it in Server-Timing and the log.
+
+    The header is sent with the response start, so SQL run later (streamed
+    bodies, background tasks) is only in the log line. A strict budget is
+    enforced at the response start too, while the client can still get a 500;
+    statements run after it can only be logged.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status_code = 500
+        with track_queries() as stats:
+
+            async def _send(message):
+                nonlocal status_code
+                if message["type"] == "http.response.start":
+                    if settings.query_budget_strict and _over_budget(stats):
+                        raise QueryBudgetExceededError(_budget_message(scope, stats))
+                    status_code = message["status"]
+                    elapsed_ms = (time.perf_counter() - started) * 1000
+                    MutableHeaders(scope=message).append(
+                        "Server-Timing",
+                        f'db;dur={stats.db_seconds * 1000:.2f};desc="{stats.count} queries", '
+                        f"app;dur={elapsed_ms:.2f}",
+                    )
+                await send(message)
+
+            await self.app(scope, receive, _send)
+        _report(scope, status_code, stats)
+
+
+def _endpoint(scope) -> str:
+    return f"{scope['method']} {getattr(scope.get('route'), 'path', scope['path'])}"
+
+
+def _over_budget(stats: QueryStats) -> bool:
+    return stats.budget is not None and stats.count > stats.budget
+
+
+def _budget_message(scope, stats: QueryStats) -> str:
+    return f"{_endpoint(scope)} ran {stats.count} SQL statements, budget is {stats.budget}"
+
+
+def _report(scope, status_code: int, stats: QueryStats) -> None:
+    endpoint = _endpoint(scope)
+    logger.info(
+        "%s %d queries=%d db_ms=%.2f", endpoint, status_code, stats.count, stats.db_seconds * 1000
+    )
+    for statement, times in stats.repeated(settings.n_plus_one_threshold):
+        logger.warning("Possible N+1 in %s: ran %d times: %s", endpoint, times, statement)
+    if _over_budget(stats):
+        # The response has been sent, so raising here would reach no client.
+        logger.warning(_budget_message(scope, stats))
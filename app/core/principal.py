@@ -0,0 +1,82 @@
+from dataclasses import dataclass
+
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.account_holder import AccountHolder
+from app.models.user import User
+from app.utils.cache import TTLCache
+
+_PENDING_KEY = "principal_invalidations"
+
+
+@dataclass(frozen=True)
+class Principal:
+    """The authenticated caller, resolved once per request from the token ``sub``."""
+
+    id: str
+    is_active: bool
+    holder_id: str | None
+    is_admin: bool = False
+
+
+principal_cache = TTLCache(
+    maxsize=settings.principal_cache_maxsize,
+    ttl_seconds=settings.principal_cache_ttl_seconds,
+)
+
+
+def load_principal(db: Session, user_id: str) -> Principal | None:
+    cached = principal_cache.get(user_id)
+    if cached is not None:
+        return cached
+    row = db.execute(
+        select(User.id, User.is_active, AccountHolder.id, User.email)
+        .outerjoin(AccountHolder, AccountHolder.user_id == User.id)
+        .where(User.id == user_id)
+    ).first()
+    if row is None:
+        return None
+    admin_emails = {email.lower() for email in settings.admin_emails}
+    principal = Principal(
+        id=row[0],
+        is_active=row[1],
+        holder_id=row[2],
+        is_admin=row[3].lower() in admin_emails,
+    )
+    principal_cache.set(user_id, principal)
+    return principal
+
+
+def invalidate_principal(user_id: str) -> None:
+    principal_cache.pop(user_id)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_principal_changes(session, flush_context):
+    # Users whose is_active flipped and users who just got a holder profile
+    # must not keep serving the cached principal once the change commits.
+    pending = session.info.setdefault(_PENDING_KEY, set())
+    for obj in session.dirty:
+        if isinstance(obj, User) and inspect(obj).attrs.is_active.history.has_changes():
+            pending.add(obj.id)
+    for obj in session.new:
+        if isinstance(obj, AccountHolder):
+            pending.add(obj.user_id)
+    for obj in session.deleted:
+        if isinstance(obj, User):
+            pending.add(obj.id)
+        elif isinstance(obj, AccountHolder):
+            pending.add(obj.user_id)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_principal_invalidations(session):
+    for user_id in session.info.pop(_PENDING_KEY, ()):
+        invalidate_principal(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_principal_invalidations(session):
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,156 @@
+"""Wall-clock stack sampling for a live worker.
+
+cProfile only sees the thread that enabled it, and sync handlers run on
+threadpool threads, so the sampler periodically snapshots every thread's stack
+instead. Results are collapsed stacks, one ``root;...;leaf count`` line per
+distinct stack, which flamegraph.pl and speedscope read directly.
+"""
+import logging
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from types import CodeType
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_APP_DIR = str(Path(__file__).resolve().parents[1])
+_API_DIR = str(Path(_APP_DIR) / "api")
+_PROJECT_DIR = str(Path(_APP_DIR).parent)
+_WAITS = ("threading.py", "selectors.py")
+
+# One on-demand profile per worker; each sample walks every thread.
+profile_lock = threading.Lock()
+
+# The sampler can only look at stacks while it holds the GIL. With the default
+# 5 ms switch interval a busy event loop keeps it until its next I/O wait, so
+# every sample would land in epoll; a short interval lets samples interrupt it.
+_SAMPLING_SWITCH_INTERVAL = 0.0001
+_sampling = 0
+_switch_lock = threading.Lock()
+_default_switch_interval = sys.getswitchinterval()
+
+
+def _begin_sampling() -> None:
+    global _sampling
+    with _switch_lock:
+        _sampling += 1
+        sys.setswitchinterval(min(_default_switch_interval, _SAMPLING_SWITCH_INTERVAL))
+
+
+def _end_sampling() -> None:
+    global _sampling
+    with _switch_lock:
+        _sampling -= 1
+        if not _sampling:
+            sys.setswitchinterval(_default_switch_interval)
+
+
+def _location(filename: str) -> str:
+    if filename.startswith(_PROJECT_DIR):
+        return filename[len(_PROJECT_DIR) + 1:]
+    _, marker, tail = filename.rpartition("site-packages/")
+    return tail if marker else Path(filename).name
+
+
+def _in_app(codes: list[CodeType]) -> bool:
+    """Leaf-first stack runs app code and is not a background thread waiting for work."""
+    if not any(code.co_filename.startswith(_APP_DIR) for code in codes):
+        return False
+    if codes[0].co_filename.endswith(_WAITS):
+        return any(code.co_filename.startswith(_API_DIR) for code in codes)
+    return True
+
+
+class StackSampler:
+    """Counts the stacks of all other threads every ``interval`` seconds.
+
+    With ``app_only`` (the default) only stacks passing through the app package
+    are kept, minus app daemons (audit writer, checkpointer) parked in a wait;
+    this drops idle threadpool workers and the idle event loop. Stacks of
+    concurrent requests are mixed, so profile a quiet worker.
+    """
+
+    def __init__(self, interval: float = 0.005, app_only: bool = True):
+        self.interval = interval
+        self.app_only = app_only
+        self.samples = 0
+        self.stacks: Counter[str] = Counter()
+        self._labels: dict[CodeType, str] = {}
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def _label(self, code: CodeType) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            label = f"{code.co_qualname} ({_location(code.co_filename)}:{code.co_firstlineno})"
+            self._labels[code] = label
+        return label
+
+    def sample(self, skip: int | None = None) -> None:
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == skip:
+                continue
+            codes = []
+            while frame is not None:
+                codes.append(frame.f_code)
+                frame = frame.f_back
+            if self.app_only and not _in_app(codes):
+                continue
+            labels = [names.get(ident, str(ident))]
+            labels.extend(self._label(code) for code in reversed(codes))
+            self.stacks[";".join(labels)] += 1
+        self.samples += 1
+
+    def run(self, seconds: float) -> str:
+        """Sample from the calling thread for ``seconds`` and return collapsed stacks."""
+        me = threading.get_ident()
+        deadline = time.monotonic() + seconds
+        _begin_sampling()
+        try:
+            while time.monotonic() < deadline:
+                self.sample(skip=me)
+                time.sleep(self.interval)
+        finally:
+            _end_sampling()
+        return self.collapsed()
+
+    def start(self) -> "StackSampler":
+        _begin_sampling()
+        self._thread = threading.Thread(target=self._loop, name="stack-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> str:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+            _end_sampling()
+        return self.collapsed()
+
+    def _loop(self) -> None:
+        me = threading.get_ident()
+        while True:
+            self.sample(skip=me)
+            if self._stop.wait(self.interval):
+                return
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+def profile_path(profile_id: str) -> Path:
+    return Path(settings.profile_dir) / f"{profile_id}.folded"
+
+
+def save_profile(profile_id: str, endpoint: str, sampler: StackSampler) -> Path:
+    path = profile_path(profile_id)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(sampler.collapsed())
+    logger.info("Profiled %s: %d samples written to %s", endpoint, sampler.samples, path)
+    return path
@@ -1,3 +1,4 @@
+import time
 from datetime import datetime, timedelta, timezone
 
 from fastapi import HTTPException, status
@@ -5,8 +6,13 @@ from jose import JWTError, jwt
 from passlib.context import CryptContext
 
 from app.core.config import settings
+from app.core.hashing import HashingSaturatedError, password_hasher
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=settings.bcrypt_rounds,
+)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -17,6 +23,57 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+def configure_bcrypt_rounds(rounds: int) -> None:
+    pwd_context.update(bcrypt__rounds=rounds)
+    settings.bcrypt_rounds = rounds
+
+
+def calibrate_bcrypt_rounds(target_ms: int, min_rounds: int, max_rounds: int) -> int:
+    """Highest bcrypt cost whose hash time stays within ``target_ms`` (at least ``min_rounds``).
+
+    Each extra round doubles the work, so one timed hash at ``min_rounds`` is
+    enough to extrapolate.
+    """
+    probe = CryptContext(schemes=["bcrypt"], bcrypt__rounds=min_rounds)
+    started_at = time.perf_counter()
+    probe.hash("calibration-probe")
+    elapsed_ms = max((time.perf_counter() - started_at) * 1000, 1e-3)
+
+    rounds = min_rounds
+    while rounds < max_rounds and elapsed_ms * 2 <= target_ms:
+        rounds += 1
+        elapsed_ms *= 2
+    return rounds
+
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    """True when the stored hash uses a lower bcrypt cost than the current setting."""
+    try:
+        rounds = int(hashed_password.split("$")[2])
+    except (IndexError, ValueError):
+        return pwd_context.needs_update(hashed_password)
+    return rounds < settings.bcrypt_rounds
+
+
+async def _run_hasher(fn, *args):
+    try:
+        return await password_hasher.run(fn, *args)
+    except HashingSaturatedError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many authentication requests, retry shortly",
+            headers={"Retry-After": "1"},
+        ) from exc
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await _run_hasher(verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    return await _run_hasher(get_password_hash, password)
+
+
 def _create_token(subject: str, token_type: str, expires_delta: timedelta) -> str:
     now = datetime.now(timezone.utc)
     payload = {
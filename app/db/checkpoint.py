@@ -0,0 +1,65 @@
+import logging
+import threading
+
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+from app.db.session import engine
+
+logger = logging.getLogger(__name__)
+
+
+class WalCheckpointer:
+    """Checkpoints a SQLite WAL on a timer, off the request path.
+
+    SQLite's own autocheckpoint runs inside whichever commit crosses
+    ``wal_autocheckpoint`` and cannot finish while readers hold old snapshots,
+    so under steady traffic the WAL keeps growing and reads slow down.
+    """
+
+    def __init__(self, bind: Engine, interval_seconds: float, mode: str = "PASSIVE"):
+        self.bind = bind
+        self.interval_seconds = interval_seconds
+        self.mode = mode
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    def checkpoint(self) -> tuple[int, int, int]:
+        """Run one checkpoint; returns (busy, wal_pages, checkpointed_pages)."""
+        with self.bind.connect() as conn:
+            busy, log, checkpointed = conn.exec_driver_sql(
+                f"PRAGMA wal_checkpoint({self.mode})"
+            ).one()
+        if busy:
+            logger.info("WAL checkpoint blocked by readers (%d/%d pages)", checkpointed, log)
+        return busy, log, checkpointed
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_seconds):
+            try:
+                self.checkpoint()
+            except Exception:
+                logger.exception("WAL checkpoint failed")
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="wal-checkpoint", daemon=True)
+            self._thread.start()
+
+    def shutdown(self) -> None:
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._stop.set()
+            thread.join()
+
+
+wal_checkpointer = WalCheckpointer(
+    engine,
+    interval_seconds=settings.sqlite_checkpoint_interval_seconds,
+    mode=settings.sqlite_checkpoint_mode,
+)
@@ -0,0 +1,81 @@
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+class QueryBudgetExceededError(Exception):
+    pass
+
+
+@dataclass
+class QueryStats:
+    """SQL run on behalf of one request, across every engine."""
+
+    count: int = 0
+    db_seconds: float = 0.0
+    budget: int | None = None
+    statements: Counter = field(default_factory=Counter)
+
+    def repeated(self, threshold: int) -> list[tuple[str, int]]:
+        """Statements run at least ``threshold`` times: the signature of an N+1 loop."""
+        return [(sql, n) for sql, n in self.statements.most_common() if n >= threshold]
+
+
+_current: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+
+def current_query_stats() -> QueryStats | None:
+    return _current.get()
+
+
+@contextmanager
+def track_queries():
+    stats = QueryStats()
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None and _current.get() is not None:
+        context._query_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    started = getattr(context, "_query_started", None)
+    if stats is None or started is None:
+        return
+    stats.count += 1
+    stats.db_seconds += time.perf_counter() - started
+    stats.statements[statement] += 1
+
+
+def instrument_engines() -> None:
+    """Hook every engine, including the sync side of async ones and shard engines."""
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def query_budget(max_queries: int):
+    """Route dependency declaring how many SQL statements the endpoint may run.
+
+    Exceeding it is logged. With QUERY_BUDGET_STRICT (meant for the test
+    suite) it also raises QueryBudgetExceededError before the response starts,
+    so the request fails with a 500.
+    """
+
+    async def _declare_budget() -> None:
+        stats = _current.get()
+        if stats is not None:
+            stats.budget = max_queries
+
+    return _declare_budget
@@ -0,0 +1,22 @@
+from app.core.config import settings
+from app.utils.cache import TTLCache
+
+# Per worker, like the principal cache: a user whose write landed on another
+# worker can still read from the replica inside the window.
+_recent_writers = TTLCache(
+    maxsize=settings.principal_cache_maxsize,
+    ttl_seconds=settings.read_your_writes_seconds,
+)
+
+
+def pin_to_primary(user_id: str) -> None:
+    """Send ``user_id``'s reads to the primary for the read-your-writes window."""
+    _recent_writers.set(user_id, True)
+
+
+def is_pinned_to_primary(user_id: str) -> bool:
+    return _recent_writers.get(user_id, False)
+
+
+def clear_pins() -> None:
+    _recent_writers.clear()
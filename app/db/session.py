@@ -1,26 +1,202 @@
+import time
+
 from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 
 from app.core.config import settings
+from app.core.metrics import POOL_CHECKOUT_WAIT
 from app.db.base import Base
 
-engine = create_engine(
-    settings.database_url,
-    connect_args={"check_same_thread": False},
-    future=True,
+
+def sqlite_pragmas() -> dict[str, str | int]:
+    """PRAGMAs run on every new SQLite connection, in this order."""
+    return {
+        "foreign_keys": "ON",
+        # Set before switching journal mode so that step also waits on locks.
+        "busy_timeout": settings.sqlite_busy_timeout_ms,
+        "journal_mode": "WAL",
+        "synchronous": settings.sqlite_synchronous,
+        "wal_autocheckpoint": settings.sqlite_wal_autocheckpoint_pages,
+        "journal_size_limit": settings.sqlite_journal_size_limit_bytes,
+        # Negative cache_size is in KiB rather than pages.
+        "cache_size": -settings.sqlite_cache_size_kib,
+        "mmap_size": settings.sqlite_mmap_size_bytes,
+        "temp_store": settings.sqlite_temp_store,
+    }
+
+
+def _sqlite_pragma_listener(pragmas: dict[str, str | int]):
+    def _set_sqlite_pragma(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+    return _set_sqlite_pragma
+
+
+class _CheckoutTimer:
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            POOL_CHECKOUT_WAIT.observe(time.perf_counter() - started)
+
+
+class TimedQueuePool(_CheckoutTimer, QueuePool):
+    """QueuePool that reports how long each checkout waited for a connection."""
+
+
+class TimedAsyncAdaptedQueuePool(_CheckoutTimer, AsyncAdaptedQueuePool):
+    pass
+
+
+def _pool_class(url: str) -> dict:
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:"):
+        # In-memory SQLite keeps SQLAlchemy's single-connection pool.
+        return {}
+    return {"poolclass": TimedQueuePool}
+
+
+def _engine_options(url: str) -> dict:
+    backend = make_url(url).get_backend_name()
+    if backend == "sqlite":
+        return {"connect_args": {"check_same_thread": False}}
+    options = {
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout_seconds,
+        "pool_recycle": settings.db_pool_recycle_seconds,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+    }
+    if backend == "postgresql":
+        # Sent as a startup parameter, so it costs no extra round trip per connection.
+        options["connect_args"] = {
+            "options": f"-c statement_timeout={settings.db_statement_timeout_ms}",
+            "application_name": settings.app_name,
+        }
+    return options
+
+
+def create_db_engine(url: str, pragmas: dict[str, str | int] | None = None) -> Engine:
+    """Build an engine with the pool profile and hooks for the URL's backend.
+
+    ``pragmas`` replaces the settings-driven SQLite profile (ignored elsewhere).
+    """
+    db_engine = create_engine(url, future=True, **_pool_class(url), **_engine_options(url))
+    if db_engine.dialect.name == "sqlite":
+        listener = _sqlite_pragma_listener(sqlite_pragmas() if pragmas is None else pragmas)
+        event.listen(db_engine, "connect", listener)
+    return db_engine
+
+
+_ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg"}
+
+
+def async_database_url(url: str) -> str:
+    """The same database addressed through its asyncio driver."""
+    parsed = make_url(url)
+    return parsed.set(drivername=_ASYNC_DRIVERS[parsed.get_backend_name()]).render_as_string(
+        hide_password=False
+    )
+
+
+def _async_engine_options(url: str) -> dict:
+    backend = make_url(url).get_backend_name()
+    options = {
+        # Also keeps aiosqlite from opening (and re-PRAGMAing) a connection per checkout.
+        "poolclass": TimedAsyncAdaptedQueuePool,
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout_seconds,
+    }
+    if backend == "sqlite":
+        return options
+    options["pool_recycle"] = settings.db_pool_recycle_seconds
+    options["pool_pre_ping"] = settings.db_pool_pre_ping
+    if backend == "postgresql":
+        options["connect_args"] = {
+            "server_settings": {
+                "statement_timeout": str(settings.db_statement_timeout_ms),
+                "application_name": settings.app_name,
+            }
+        }
+    return options
+
+
+def create_async_db_engine(url: str, pragmas: dict[str, str | int] | None = None) -> AsyncEngine:
+    """Async counterpart of create_db_engine; ``url`` may name the sync driver."""
+    url = async_database_url(url)
+    db_engine = create_async_engine(url, **_async_engine_options(url))
+    if db_engine.dialect.name == "sqlite":
+        listener = _sqlite_pragma_listener(sqlite_pragmas() if pragmas is None else pragmas)
+        event.listen(db_engine.sync_engine, "connect", listener)
+    return db_engine
+
+
+engine = create_db_engine(settings.database_url)
+# Ids and timestamps are generated client-side, so a committed object already
+# holds every column and routes can serialise it without reloading it.
+SessionLocal = sessionmaker(
+    bind=engine, autocommit=False, autoflush=False, expire_on_commit=False, future=True
+)
+
+async_engine = create_async_db_engine(settings.database_url)
+# ``write_bind`` is the sync primary engine; code that hands writes to
+# background threads (the audit writer) uses it whatever session it was given.
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, autoflush=False, expire_on_commit=False, info={"write_bind": engine}
+)
+
+if settings.replica_database_url:
+    read_engine = create_db_engine(settings.replica_database_url)
+    async_read_engine = create_async_db_engine(settings.replica_database_url)
+else:
+    read_engine, async_read_engine = engine, async_engine
+ReadSessionLocal = sessionmaker(
+    bind=read_engine,
+    autocommit=False,
+    autoflush=False,
+    expire_on_commit=False,
+    info={"write_bind": engine},
 )
-SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False, future=True)
+AsyncReadSessionLocal = async_sessionmaker(
+    async_read_engine, autoflush=False, expire_on_commit=False, info={"write_bind": engine}
+)
+
+
+# PRAGMA user_version once second-precision timestamps have been rewritten.
+_SQLITE_TIMESTAMPS_NORMALIZED = 1
+
 
+def normalize_sqlite_timestamps(bind: Engine) -> None:
+    """Rewrite created_at values left by SQLite's CURRENT_TIMESTAMP default.
 
-@event.listens_for(engine, "connect")
-def _set_sqlite_pragma(dbapi_connection, connection_record):
-    cursor = dbapi_connection.cursor()
-    cursor.execute("PRAGMA foreign_keys=ON")
-    cursor.execute("PRAGMA journal_mode=WAL")
-    cursor.close()
+    Rows written before created_at was set client-side hold 'YYYY-MM-DD HH:MM:SS',
+    which sorts before the same instant bound as 'YYYY-MM-DD HH:MM:SS.000000', so
+    keyset cursors over them never moved forward. Runs once per database.
+    """
+    if bind.dialect.name != "sqlite":
+        return
+    with bind.begin() as conn:
+        if conn.exec_driver_sql("PRAGMA user_version").scalar() >= _SQLITE_TIMESTAMPS_NORMALIZED:
+            return
+        for table in Base.metadata.sorted_tables:
+            if "created_at" in table.c:
+                conn.exec_driver_sql(
+                    f"UPDATE {table.name} SET created_at = created_at || '.000000' "
+                    "WHERE length(created_at) = 19"
+                )
+        conn.exec_driver_sql(f"PRAGMA user_version = {_SQLITE_TIMESTAMPS_NORMALIZED}")
 
 
 def init_db() -> None:
     import app.models  # noqa: F401
 
     Base.metadata.create_all(bind=engine)
+    normalize_sqlite_timestamps(engine)
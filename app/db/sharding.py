@@ -0,0 +1,115 @@
+import hashlib
+
+from sqlalchemy import inspect, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.schema import CreateIndex, CreateTable
+
+from app.core.config import settings
+from app.db.base import Base
+from app.db.session import create_async_db_engine, create_db_engine
+from app.models.account import Account
+
+# Holder-owned tables, in creation order. Users and holders stay on the primary.
+SHARDED_TABLES = ("accounts", "transfers", "transactions", "daily_balances", "cards", "audit_logs")
+
+# Foreign keys whose target row can live in another database: holders and users
+# are on the primary and a transfer's destination may be on another shard.
+_CROSS_SHARD_FOREIGN_KEYS = {
+    ("accounts", "holder_id"),
+    ("transfers", "to_account_id"),
+    ("audit_logs", "user_id"),
+}
+
+
+def create_shard_schema(bind: Engine) -> None:
+    """Create the holder-owned tables on a shard, minus cross-shard foreign keys."""
+    import app.models  # noqa: F401
+
+    existing = set(inspect(bind).get_table_names())
+    with bind.begin() as conn:
+        for name in SHARDED_TABLES:
+            if name in existing:
+                continue
+            table = Base.metadata.tables[name]
+            local_fks = [
+                fk
+                for fk in table.foreign_key_constraints
+                if (name, fk.column_keys[0]) not in _CROSS_SHARD_FOREIGN_KEYS
+            ]
+            conn.execute(CreateTable(table, include_foreign_key_constraints=local_fks))
+            for index in table.indexes:
+                conn.execute(CreateIndex(index))
+
+
+class ShardRouter:
+    """Maps an account holder to the database that holds its accounts and ledger.
+
+    A holder's accounts, transactions, daily balances, cards and outgoing
+    transfers all live on one shard, chosen by a stable hash of the holder id.
+    With no shard URLs configured the router is inactive and callers use the
+    primary session they already have.
+    """
+
+    def __init__(self, urls: list[str]):
+        self.configure(urls)
+
+    def configure(self, urls: list[str]) -> None:
+        self.engines = [create_db_engine(url) for url in urls]
+        self.async_engines = [create_async_db_engine(url) for url in urls]
+        self._sessions = [
+            sessionmaker(bind=engine, autocommit=False, autoflush=False, expire_on_commit=False)
+            for engine in self.engines
+        ]
+        self._async_sessions = [
+            async_sessionmaker(
+                async_engine, autoflush=False, expire_on_commit=False, info={"write_bind": engine}
+            )
+            for engine, async_engine in zip(self.engines, self.async_engines)
+        ]
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.engines)
+
+    @property
+    def indexes(self) -> range:
+        return range(len(self.engines))
+
+    def index_for(self, holder_id: str) -> int:
+        digest = hashlib.blake2b(holder_id.encode(), digest_size=8).digest()
+        return int.from_bytes(digest, "big") % len(self.engines)
+
+    def session(self, index: int) -> Session:
+        return self._sessions[index]()
+
+    def async_session(self, index: int) -> AsyncSession:
+        return self._async_sessions[index]()
+
+    def session_for(self, holder_id: str) -> Session:
+        return self.session(self.index_for(holder_id))
+
+    def async_session_for(self, holder_id: str) -> AsyncSession:
+        return self.async_session(self.index_for(holder_id))
+
+    def account_number_shard(self, holder_id: str) -> tuple[int, int]:
+        """``(index, count)`` for generate_account_number: each shard issues its own residue class."""
+        if not self.enabled:
+            return 0, 1
+        return self.index_for(holder_id), len(self.engines)
+
+    def locate_account(self, account_id: str) -> int | None:
+        """Index of the shard holding ``account_id``, found by asking each shard."""
+        for index in self.indexes:
+            with self.session(index) as db:
+                if db.scalar(select(Account.id).where(Account.id == account_id)):
+                    return index
+        return None
+
+    def init_schema(self) -> None:
+        for engine in self.engines:
+            create_shard_schema(engine)
+
+
+shard_router = ShardRouter(settings.shard_database_urls)
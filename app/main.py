@@ -1,13 +1,25 @@
+import logging
 from pathlib import Path
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import FileResponse
 from fastapi.staticfiles import StaticFiles
 
 from app.api.v1.api import api_router
 from app.core.config import settings
-from app.db.session import init_db
+from app.core.hashing import password_hasher
+from app.core.metrics import instrument_commits, mark_worker_dead, render_metrics, route_metrics
+from app.core.middleware import MetricsMiddleware, ProfilingMiddleware, QueryStatsMiddleware
+from app.core.security import calibrate_bcrypt_rounds, configure_bcrypt_rounds
+from app.db.checkpoint import wal_checkpointer
+from app.db.query_stats import instrument_engines
+from app.db.session import async_engine, engine, init_db
+from app.db.sharding import shard_router
+from app.services.audit_writer import audit_writer
+from app.services.write_queue import write_queue
+
+logger = logging.getLogger(__name__)
 
 
 def create_app() -> FastAPI:
@@ -19,6 +31,19 @@ def create_app() -> FastAPI:
         allow_methods=["*"],
         allow_headers=["*"],
     )
+    app.add_middleware(ProfilingMiddleware)
+    if settings.query_stats_enabled:
+        instrument_engines()
+        app.add_middleware(QueryStatsMiddleware)
+    if settings.metrics_enabled:
+        instrument_commits()
+        app.add_middleware(MetricsMiddleware)
+
+        @app.get("/metrics", include_in_schema=False)
+        def metrics() -> Response:
+            body, content_type = render_metrics()
+            return Response(content=body, media_type=content_type)
+
     app.include_router(api_router, prefix="/api/v1")
 
     frontend_dir = Path(__file__).resolve().parents[1] / "frontend"
@@ -52,7 +77,33 @@ def create_app() -> FastAPI:
     @app.on_event("startup")
     def _startup() -> None:
         init_db()
+        shard_router.init_schema()
+        if engine.dialect.name == "sqlite" and settings.sqlite_checkpoint_interval_seconds > 0:
+            wal_checkpointer.start()
+        if settings.bcrypt_calibrate_on_startup:
+            rounds = calibrate_bcrypt_rounds(
+                settings.bcrypt_target_hash_ms,
+                settings.bcrypt_min_rounds,
+                settings.bcrypt_max_rounds,
+            )
+            configure_bcrypt_rounds(rounds)
+            logger.info(
+                "bcrypt calibrated to %d rounds (target %d ms)",
+                rounds,
+                settings.bcrypt_target_hash_ms,
+            )
+
+    @app.on_event("shutdown")
+    async def _shutdown() -> None:
+        password_hasher.shutdown()
+        audit_writer.shutdown()
+        wal_checkpointer.shutdown()
+        write_queue.shutdown()
+        await async_engine.dispose()
+        mark_worker_dead()
 
+    if settings.metrics_enabled:
+        route_metrics.preallocate(app.routes)
     return app
 
 
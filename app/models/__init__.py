@@ -2,6 +2,7 @@ from app.models.account import Account
 from app.models.account_holder import AccountHolder
 from app.models.audit_log import AuditLog
 from app.models.card import Card
+from app.models.daily_balance import DailyBalance
 from app.models.transaction import Transaction
 from app.models.transfer import Transfer
 from app.models.user import User
@@ -14,4 +15,5 @@ __all__ = [
     "Transfer",
     "Card",
     "AuditLog",
+    "DailyBalance",
 ]
@@ -1,19 +1,16 @@
-from uuid import uuid4
-
 from sqlalchemy import Enum, ForeignKey, Integer, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.base import Base
 from app.models.enums import AccountStatus, AccountType
-from app.models.mixins import TimestampMixin
+from app.models.mixins import IdMixin, IdType, TimestampMixin
 
 
-class Account(TimestampMixin, Base):
+class Account(IdMixin, TimestampMixin, Base):
     __tablename__ = "accounts"
 
-    id: Mapped[str] = mapped_column(String, primary_key=True, default=lambda: str(uuid4()))
     holder_id: Mapped[str] = mapped_column(
-        String,
+        IdType,
         ForeignKey("account_holders.id", ondelete="CASCADE"),
         index=True,
         nullable=False,
@@ -1,19 +1,17 @@
 from datetime import date
-from uuid import uuid4
 
 from sqlalchemy import Date, ForeignKey, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.base import Base
-from app.models.mixins import TimestampMixin
+from app.models.mixins import IdMixin, IdType, TimestampMixin
 
 
-class AccountHolder(TimestampMixin, Base):
+class AccountHolder(IdMixin, TimestampMixin, Base):
     __tablename__ = "account_holders"
 
-    id: Mapped[str] = mapped_column(String, primary_key=True, default=lambda: str(uuid4()))
     user_id: Mapped[str] = mapped_column(
-        String,
+        IdType,
         ForeignKey("users.id", ondelete="CASCADE"),
         unique=True,
         index=True,
@@ -1,20 +1,23 @@
-from uuid import uuid4
-
-from sqlalchemy import ForeignKey, String
+from sqlalchemy import ForeignKey, Index, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.base import Base
-from app.models.mixins import TimestampMixin
+from app.models.mixins import IdMixin, IdType, TimestampMixin
 
 
-class AuditLog(TimestampMixin, Base):
+class AuditLog(IdMixin, TimestampMixin, Base):
     __tablename__ = "audit_logs"
+    __table_args__ = (
+        # Every audit query is newest-first on (created_at, id) within one of these filters.
+        Index("ix_audit_logs_user_created_id", "user_id", "created_at", "id"),
+        Index("ix_audit_logs_resource_created_id", "resource_type", "resource_id", "created_at", "id"),
+        Index("ix_audit_logs_action_created_id", "action", "created_at", "id"),
+        Index("ix_audit_logs_created_id", "created_at", "id"),
+    )
 
-    id: Mapped[str] = mapped_column(String, primary_key=True, default=lambda: str(uuid4()))
     user_id: Mapped[str] = mapped_column(
-        String,
+        IdType,
         ForeignKey("users.id", ondelete="CASCADE"),
-        index=True,
         nullable=False,
     )
     action: Mapped[str] = mapped_column(String, nullable=False)
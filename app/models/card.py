@@ -1,19 +1,16 @@
-from uuid import uuid4
-
 from sqlalchemy import Enum, ForeignKey, Numeric, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.base import Base
 from app.models.enums import CardStatus, CardType
-from app.models.mixins import TimestampMixin
+from app.models.mixins import IdMixin, IdType, TimestampMixin
 
 
-class Card(TimestampMixin, Base):
+class Card(IdMixin, TimestampMixin, Base):
     __tablename__ = "cards"
 
-    id: Mapped[str] = mapped_column(String, primary_key=True, default=lambda: str(uuid4()))
     account_id: Mapped[str] = mapped_column(
-        String,
+        IdType,
         ForeignKey("accounts.id", ondelete="CASCADE"),
         index=True,
         nullable=False,
@@ -0,0 +1,24 @@
+from datetime import date
+
+from sqlalchemy import Date, ForeignKey, Integer
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+from app.models.mixins import IdType
+
+
+class DailyBalance(Base):
+    """Per-account, per-UTC-day rollup of the transaction ledger."""
+
+    __tablename__ = "daily_balances"
+
+    account_id: Mapped[str] = mapped_column(
+        IdType,
+        ForeignKey("accounts.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    closing_balance_cents: Mapped[int] = mapped_column(Integer, nullable=False)
+    total_deposits_cents: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    total_withdrawals_cents: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    transaction_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
@@ -1,12 +1,65 @@
-from datetime import datetime
+import uuid
+from datetime import datetime, timezone
 
-from sqlalchemy import DateTime, func
+from sqlalchemy import DateTime, LargeBinary, String, func
+from sqlalchemy.dialects import postgresql
 from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.types import TypeDecorator
+
+from app.core.config import settings
+from app.utils.ids import new_id
+
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def as_utc(value: datetime) -> datetime:
+    """Normalise an aware datetime to UTC; naive values are taken to be UTC already."""
+    if value.tzinfo is not None:
+        return value.astimezone(timezone.utc)
+    return value
+
+
+class IdType(TypeDecorator):
+    """A row id: always a UUID string in Python, stored as ID_STORAGE says."""
+
+    impl = String
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if settings.id_storage == "text":
+            return dialect.type_descriptor(String())
+        if dialect.name == "postgresql":
+            return dialect.type_descriptor(postgresql.UUID(as_uuid=False))
+        return dialect.type_descriptor(LargeBinary(16))
+
+    def process_bind_param(self, value, dialect):
+        if value is None or settings.id_storage == "text":
+            return value
+        try:
+            parsed = uuid.UUID(str(value))
+        except ValueError:
+            # Not an id this service issued, so it can match no row.
+            return None
+        return str(parsed) if dialect.name == "postgresql" else parsed.bytes
+
+    def process_result_value(self, value, dialect):
+        if value is None or isinstance(value, str):
+            return value
+        return str(uuid.UUID(bytes=bytes(value)))
+
+
+class IdMixin:
+    id: Mapped[str] = mapped_column(IdType, primary_key=True, default=new_id, sort_order=-1)
 
 
 class TimestampMixin:
+    # Set client-side so rows carry sub-second precision and compare exactly
+    # against bound datetimes; the server default covers raw SQL inserts.
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
+        default=utcnow,
         server_default=func.now(),
         nullable=False,
     )
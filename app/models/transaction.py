@@ -1,28 +1,36 @@
-from uuid import uuid4
-
-from sqlalchemy import Enum, ForeignKey, Integer, String
+from sqlalchemy import Enum, ForeignKey, Index, Integer, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.base import Base
 from app.models.enums import TransactionStatus, TransactionType
-from app.models.mixins import TimestampMixin
+from app.models.mixins import IdMixin, IdType, TimestampMixin
 
 
-class Transaction(TimestampMixin, Base):
+class Transaction(IdMixin, TimestampMixin, Base):
     __tablename__ = "transactions"
+    __table_args__ = (
+        # Serves per-account history scans and keyset pagination on (created_at, id).
+        Index("ix_transactions_account_created_id", "account_id", "created_at", "id"),
+        # One leg per transfer and account, so re-running a settlement cannot post twice.
+        Index(
+            "ux_transactions_account_reference_type",
+            "account_id",
+            "reference_id",
+            "transaction_type",
+            unique=True,
+        ),
+    )
 
-    id: Mapped[str] = mapped_column(String, primary_key=True, default=lambda: str(uuid4()))
     account_id: Mapped[str] = mapped_column(
-        String,
+        IdType,
         ForeignKey("accounts.id", ondelete="CASCADE"),
-        index=True,
         nullable=False,
     )
     transaction_type: Mapped[TransactionType] = mapped_column(Enum(TransactionType), nullable=False)
     amount_cents: Mapped[int] = mapped_column(Integer, nullable=False)
     balance_after_cents: Mapped[int] = mapped_column(Integer, nullable=False)
     description: Mapped[str | None] = mapped_column(String, nullable=True)
-    reference_id: Mapped[str | None] = mapped_column(String, index=True, nullable=True)
+    reference_id: Mapped[str | None] = mapped_column(IdType, index=True, nullable=True)
     status: Mapped[TransactionStatus] = mapped_column(
         Enum(TransactionStatus),
         default=TransactionStatus.posted,
@@ -1,27 +1,25 @@
 from datetime import datetime
-from uuid import uuid4
 
 from sqlalchemy import DateTime, Enum, ForeignKey, Integer, String
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.db.base import Base
 from app.models.enums import TransferStatus
-from app.models.mixins import TimestampMixin
+from app.models.mixins import IdMixin, IdType, TimestampMixin
 
 
-class Transfer(TimestampMixin, Base):
+class Transfer(IdMixin, TimestampMixin, Base):
     __tablename__ = "transfers"
 
-    id: Mapped[str] = mapped_column(String, primary_key=True, default=lambda: str(uuid4()))
     idempotency_key: Mapped[str] = mapped_column(String, unique=True, index=True, nullable=False)
     from_account_id: Mapped[str] = mapped_column(
-        String,
+        IdType,
         ForeignKey("accounts.id", ondelete="CASCADE"),
         index=True,
         nullable=False,
     )
     to_account_id: Mapped[str] = mapped_column(
-        String,
+        IdType,
         ForeignKey("accounts.id", ondelete="CASCADE"),
         index=True,
         nullable=False,
@@ -1,16 +1,31 @@
-from app.schemas.account import AccountCreate, AccountResponse, AccountStatusUpdate
+from app.schemas.account import (
+    AccountCreate,
+    AccountResponse,
+    AccountStatusUpdate,
+    BalanceAsOfResponse,
+    BalanceBatchRequest,
+    BalanceBatchResponse,
+)
 from app.schemas.account_holder import (
     AccountHolderCreate,
     AccountHolderResponse,
     AccountHolderUpdate,
 )
+from app.schemas.audit_log import AuditLogListResponse, AuditLogResponse
 from app.schemas.auth import LoginRequest, RefreshRequest, SignupRequest, TokenResponse
 from app.schemas.card import CardCreate, CardLimitUpdate, CardResponse, CardStatusUpdate
-from app.schemas.statement import StatementResponse
+from app.schemas.statement import ExportFormat, StatementResponse
 from app.schemas.transaction import (
+    BatchItemResult,
+    BatchMode,
+    BatchOperation,
+    BatchOperationType,
     DepositRequest,
+    TransactionBatchRequest,
+    TransactionBatchResponse,
     TransactionListResponse,
     TransactionResponse,
+    TotalMode,
     WithdrawRequest,
 )
 from app.schemas.transfer import TransferCreate, TransferResponse
@@ -26,10 +41,20 @@ __all__ = [
     "AccountCreate",
     "AccountStatusUpdate",
     "AccountResponse",
+    "BalanceAsOfResponse",
+    "BalanceBatchRequest",
+    "BalanceBatchResponse",
     "DepositRequest",
     "WithdrawRequest",
     "TransactionResponse",
     "TransactionListResponse",
+    "TotalMode",
+    "BatchOperationType",
+    "BatchMode",
+    "BatchOperation",
+    "TransactionBatchRequest",
+    "BatchItemResult",
+    "TransactionBatchResponse",
     "TransferCreate",
     "TransferResponse",
     "CardCreate",
@@ -37,4 +62,7 @@ __all__ = [
     "CardStatusUpdate",
     "CardLimitUpdate",
     "StatementResponse",
+    "AuditLogResponse",
+    "AuditLogListResponse",
+    "ExportFormat",
 ]
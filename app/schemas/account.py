@@ -26,3 +26,19 @@ class AccountResponse(BaseModel):
     created_at: datetime
 
     model_config = {"from_attributes": True}
+
+
+class BalanceAsOfResponse(BaseModel):
+    account_id: str
+    as_of: datetime
+    balance_cents: int
+
+
+class BalanceBatchRequest(BaseModel):
+    account_ids: list[str] = Field(min_length=1, max_length=1000)
+    as_of: datetime
+
+
+class BalanceBatchResponse(BaseModel):
+    as_of: datetime
+    balances: list[BalanceAsOfResponse]
@@ -1,12 +1,19 @@
+from enum import Enum
+
 from pydantic import BaseModel
 
 from app.schemas.transaction import TransactionResponse
 
 
+class ExportFormat(str, Enum):
+    csv = "csv"
+    ndjson = "ndjson"
+
+
 class StatementResponse(BaseModel):
     opening_balance_cents: int
     closing_balance_cents: int
     total_deposits_cents: int
     total_withdrawals_cents: int
     transaction_count: int
-    transactions: list[TransactionResponse]
+    transactions: list[TransactionResponse] | None = None
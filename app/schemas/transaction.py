@@ -1,7 +1,9 @@
 from datetime import datetime
+from enum import Enum
 
 from pydantic import BaseModel, Field
 
+from app.core.config import settings
 from app.models.enums import TransactionStatus, TransactionType
 
 
@@ -29,8 +31,51 @@ class TransactionResponse(BaseModel):
     model_config = {"from_attributes": True}
 
 
+class TotalMode(str, Enum):
+    exact = "exact"
+    cached = "cached"
+    none = "none"
+
+
 class TransactionListResponse(BaseModel):
     items: list[TransactionResponse]
     page: int
     page_size: int
-    total: int
+    total: int | None
+    next_cursor: str | None = None
+
+
+class BatchOperationType(str, Enum):
+    deposit = "deposit"
+    withdraw = "withdraw"
+
+
+class BatchMode(str, Enum):
+    atomic = "atomic"
+    best_effort = "best_effort"
+
+
+class BatchOperation(BaseModel):
+    account_id: str
+    type: BatchOperationType
+    amount_cents: int = Field(gt=0)
+    description: str | None = None
+
+
+class TransactionBatchRequest(BaseModel):
+    operations: list[BatchOperation] = Field(min_length=1, max_length=settings.transaction_batch_max_size)
+    mode: BatchMode = BatchMode.atomic
+
+
+class BatchItemResult(BaseModel):
+    index: int
+    applied: bool
+    error: str | None = None
+    transaction: TransactionResponse | None = None
+
+
+class TransactionBatchResponse(BaseModel):
+    mode: BatchMode
+    applied: int
+    failed: int
+    results: list[BatchItemResult]
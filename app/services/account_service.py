@@ -1,17 +1,21 @@
+from datetime import datetime
+
 from fastapi import HTTPException, status
-from sqlalchemy import select
+from sqlalchemy import desc, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.models.account import Account
-from app.models.account_holder import AccountHolder
 from app.models.enums import TransactionType
+from app.models.mixins import as_utc
+from app.models.transaction import Transaction
 from app.services.transaction_service import apply_deposit
 from app.utils.account_number import generate_account_number
 
 
-def _unique_account_number(db: Session) -> str:
+def _unique_account_number(db: Session, number_shard: tuple[int, int]) -> str:
     for _ in range(10):
-        candidate = generate_account_number()
+        candidate = generate_account_number(*number_shard)
         exists = db.scalar(select(Account).where(Account.account_number == candidate))
         if not exists:
             return candidate
@@ -23,14 +27,15 @@ def _unique_account_number(db: Session) -> str:
 
 def create_account(
     db: Session,
-    holder: AccountHolder,
+    holder_id: str,
     account_type,
     currency: str,
     initial_deposit_cents: int | None,
+    number_shard: tuple[int, int] = (0, 1),
 ) -> Account:
-    account_number = _unique_account_number(db)
+    account_number = _unique_account_number(db, number_shard)
     account = Account(
-        holder_id=holder.id,
+        holder_id=holder_id,
         account_number=account_number,
         account_type=account_type,
         currency=currency,
@@ -49,3 +54,47 @@ def create_account(
         )
 
     return account
+
+
+def balances_as_of(
+    db: Session,
+    holder_id: str,
+    account_ids: list[str],
+    as_of: datetime,
+) -> dict[str, int]:
+    """Balance of each of the holder's accounts at ``as_of`` (inclusive), in one query.
+
+    Each account costs a single seek on the (account_id, created_at, id) index:
+    the latest ``balance_after_cents`` at or before the cutoff.
+    """
+    as_of = as_utc(as_of)
+    balance_at = (
+        select(Transaction.balance_after_cents)
+        .where(Transaction.account_id == Account.id, Transaction.created_at <= as_of)
+        .order_by(desc(Transaction.created_at), desc(Transaction.id))
+        .limit(1)
+        .correlate(Account)
+        .scalar_subquery()
+    )
+    rows = db.execute(
+        select(Account.id, func.coalesce(balance_at, 0)).where(
+            Account.id.in_(account_ids), Account.holder_id == holder_id
+        )
+    ).all()
+
+    balances = {account_id: balance for account_id, balance in rows}
+    if len(balances) != len(set(account_ids)):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Account not found",
+        )
+    return balances
+
+
+async def balances_as_of_async(
+    db: AsyncSession,
+    holder_id: str,
+    account_ids: list[str],
+    as_of: datetime,
+) -> dict[str, int]:
+    return await db.run_sync(balances_as_of, holder_id, account_ids, as_of)
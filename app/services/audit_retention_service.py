@@ -0,0 +1,109 @@
+import gzip
+import os
+from datetime import date, datetime, timezone
+from pathlib import Path
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.orm import Session
+
+from app.models.audit_log import AuditLog
+from app.utils.export import iter_ndjson
+
+ARCHIVE_BATCH_SIZE = 1000
+
+
+def _month_start(year: int, month: int) -> datetime:
+    return datetime(year, month, 1, tzinfo=timezone.utc)
+
+
+def _next_month(value: datetime) -> datetime:
+    if value.month == 12:
+        return _month_start(value.year + 1, 1)
+    return _month_start(value.year, value.month + 1)
+
+
+def retention_cutoff(keep_months: int, today: date | None = None) -> datetime:
+    """Start of the oldest month that stays in the hot table."""
+    today = today or datetime.now(timezone.utc).date()
+    months = today.year * 12 + (today.month - 1) - keep_months
+    return _month_start(months // 12, months % 12 + 1)
+
+
+def _archive_path(archive_dir: Path, month_start: datetime) -> Path:
+    stem = f"audit_logs_{month_start:%Y_%m}"
+    path = archive_dir / f"{stem}.ndjson.gz"
+    suffix = 1
+    # A month reopened by late writes gets a second file rather than overwriting the first.
+    while path.exists():
+        path = archive_dir / f"{stem}.{suffix}.ndjson.gz"
+        suffix += 1
+    return path
+
+
+def _iter_month(db: Session, month_start: datetime, month_end: datetime, exported_ids: list):
+    rows = db.execute(
+        select(
+            AuditLog.id,
+            AuditLog.user_id,
+            AuditLog.action,
+            AuditLog.resource_type,
+            AuditLog.resource_id,
+            AuditLog.details,
+            AuditLog.ip_address,
+            AuditLog.created_at,
+        )
+        .where(AuditLog.created_at >= month_start, AuditLog.created_at < month_end)
+        .order_by(AuditLog.created_at, AuditLog.id)
+        .execution_options(yield_per=ARCHIVE_BATCH_SIZE)
+    )
+    for row in rows:
+        exported_ids.append(row.id)
+        record = row._asdict()
+        record["created_at"] = row.created_at.isoformat()
+        yield record
+
+
+def archive_audit_logs(
+    db: Session,
+    archive_dir: Path,
+    keep_months: int,
+    today: date | None = None,
+) -> list[Path]:
+    """Move each closed month older than ``keep_months`` into a gzipped NDJSON file.
+
+    A month's rows are deleted from ``audit_logs`` only after its file has been
+    fully written, synced and renamed into place, and each month commits on
+    its own, so an interrupted run never loses entries. Only the ids written
+    to the file are deleted; entries committed into the month while it was
+    being exported stay for the next run.
+    """
+    cutoff = retention_cutoff(keep_months, today)
+    oldest = db.scalar(select(func.min(AuditLog.created_at)).where(AuditLog.created_at < cutoff))
+    if oldest is None:
+        return []
+
+    archive_dir.mkdir(parents=True, exist_ok=True)
+    written: list[Path] = []
+    month_start = _month_start(oldest.year, oldest.month)
+    while month_start < cutoff:
+        month_end = _next_month(month_start)
+        path = _archive_path(archive_dir, month_start)
+        tmp_path = path.with_name(path.name + ".tmp")
+        exported_ids: list = []
+        with open(tmp_path, "wb") as raw:
+            with gzip.GzipFile(fileobj=raw, mode="wb") as gz:
+                for line in iter_ndjson(_iter_month(db, month_start, month_end, exported_ids)):
+                    gz.write(line.encode("utf-8"))
+            raw.flush()
+            os.fsync(raw.fileno())
+        if exported_ids:
+            tmp_path.rename(path)
+            for i in range(0, len(exported_ids), ARCHIVE_BATCH_SIZE):
+                batch = exported_ids[i:i + ARCHIVE_BATCH_SIZE]
+                db.execute(delete(AuditLog).where(AuditLog.id.in_(batch)))
+            db.commit()
+            written.append(path)
+        else:
+            tmp_path.unlink()
+        month_start = month_end
+    return written
@@ -1,6 +1,16 @@
+from datetime import datetime
+
+from fastapi import HTTPException, status
+from sqlalchemy import and_, insert, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
+from app.core.config import settings
 from app.models.audit_log import AuditLog
+from app.models.mixins import as_utc, utcnow
+from app.services.audit_writer import audit_writer
+from app.utils.ids import new_id
+from app.utils.pagination import decode_cursor, encode_cursor
 
 
 def log_action(
@@ -12,6 +22,7 @@ def log_action(
     details: str | None = None,
     ip_address: str | None = None,
 ) -> AuditLog:
+    """Durable audit entry: commits or rolls back together with the caller's session."""
     entry = AuditLog(
         user_id=user_id,
         action=action,
@@ -22,3 +33,115 @@ def log_action(
     )
     db.add(entry)
     return entry
+
+
+def log_actions(db: Session, entries: list[dict]) -> None:
+    """Durable audit entries for a bulk write, inserted in one statement with the caller's session.
+
+    Each entry holds the keyword arguments of ``log_action``.
+    """
+    if entries:
+        db.execute(insert(AuditLog), entries)
+
+
+def log_event(
+    db: Session | AsyncSession,
+    user_id: str,
+    action: str,
+    resource_type: str,
+    resource_id: str | None = None,
+    details: str | None = None,
+    ip_address: str | None = None,
+) -> None:
+    """Audit entry that does not need to be atomic with a business write.
+
+    Handed to the background batch writer, so callers need no commit of their
+    own. Written immediately in its own transaction when AUDIT_ASYNC_ENABLED is off.
+    """
+    entry = {
+        "id": new_id(),
+        "created_at": utcnow(),
+        "user_id": user_id,
+        "action": action,
+        "resource_type": resource_type,
+        "resource_id": resource_id,
+        "details": details,
+        "ip_address": ip_address,
+    }
+    # Replica and async sessions name the primary the writer thread must use.
+    bind = db.info.get("write_bind") or db.get_bind()
+    if settings.audit_async_enabled:
+        audit_writer.enqueue(bind, entry)
+    else:
+        audit_writer.write(bind, [entry])
+
+
+def list_audit_logs(
+    db: Session,
+    page_size: int = 50,
+    cursor: str | None = None,
+    user_id: str | None = None,
+    resource_type: str | None = None,
+    resource_id: str | None = None,
+    action: str | None = None,
+    start: datetime | None = None,
+    end: datetime | None = None,
+) -> dict:
+    """Newest-first audit entries matching the filters, paged by (created_at, id) keyset."""
+    stmt = select(AuditLog)
+    if user_id is not None:
+        stmt = stmt.where(AuditLog.user_id == user_id)
+    if resource_type is not None:
+        stmt = stmt.where(AuditLog.resource_type == resource_type)
+    if resource_id is not None:
+        stmt = stmt.where(AuditLog.resource_id == resource_id)
+    if action is not None:
+        stmt = stmt.where(AuditLog.action == action)
+    if start is not None:
+        stmt = stmt.where(AuditLog.created_at >= as_utc(start))
+    if end is not None:
+        stmt = stmt.where(AuditLog.created_at <= as_utc(end))
+    if cursor:
+        try:
+            after_created_at, after_id = decode_cursor(cursor)
+        except ValueError as exc:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor",
+            ) from exc
+        # Compares stored strings on SQLite, so it relies on every row sharing the
+        # client's timestamp format (see normalize_sqlite_timestamps).
+        stmt = stmt.where(
+            or_(
+                AuditLog.created_at < after_created_at,
+                and_(AuditLog.created_at == after_created_at, AuditLog.id < after_id),
+            )
+        )
+
+    rows = db.scalars(
+        stmt.order_by(AuditLog.created_at.desc(), AuditLog.id.desc()).limit(page_size + 1)
+    ).all()
+    items = rows[:page_size]
+    next_cursor = None
+    if len(rows) > page_size:
+        next_cursor = encode_cursor(items[-1].created_at, items[-1].id)
+    return {"items": items, "page_size": page_size, "next_cursor": next_cursor}
+
+
+def list_audit_logs_merged(sessions: list[Session], page_size: int = 50, **filters) -> dict:
+    """``list_audit_logs`` over several databases, merged into one keyset page.
+
+    Each source returns its own newest ``page_size`` entries after the cursor,
+    so the newest ``page_size`` of their union is exactly the merged page.
+    """
+    pages = [list_audit_logs(db, page_size=page_size, **filters) for db in sessions]
+    rows = sorted(
+        (row for page in pages for row in page["items"]),
+        key=lambda row: (as_utc(row.created_at), row.id),
+        reverse=True,
+    )
+    items = rows[:page_size]
+    next_cursor = None
+    if len(rows) > page_size or any(page["next_cursor"] for page in pages):
+        next_cursor = encode_cursor(items[-1].created_at, items[-1].id)
+    return {"items": items, "page_size": page_size, "next_cursor": next_cursor}
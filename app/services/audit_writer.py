@@ -0,0 +1,120 @@
+import logging
+import queue
+import threading
+import time
+from collections import defaultdict
+
+from sqlalchemy import insert
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+from app.models.audit_log import AuditLog
+
+logger = logging.getLogger(__name__)
+
+
+class _FlushMarker:
+    def __init__(self):
+        self.done = threading.Event()
+
+
+class AuditWriter:
+    """Buffers audit rows in memory and writes them with multi-row INSERTs.
+
+    A single background thread flushes whenever ``batch_size`` rows are
+    buffered or the oldest buffered row is ``flush_interval_seconds`` old. When the queue is full the
+    caller writes its row synchronously instead, so entries are never dropped.
+    """
+
+    def __init__(self, batch_size: int, flush_interval_seconds: float, max_queue: int):
+        self.batch_size = batch_size
+        self.flush_interval_seconds = flush_interval_seconds
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    def _ensure_started(self) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="audit-writer", daemon=True
+                )
+                self._thread.start()
+
+    def enqueue(self, bind: Engine, entry: dict) -> None:
+        self._ensure_started()
+        try:
+            self._queue.put_nowait((bind, entry))
+        except queue.Full:
+            self.write(bind, [entry])
+
+    def write(self, bind: Engine, rows: list[dict]) -> None:
+        with bind.begin() as conn:
+            conn.execute(insert(AuditLog.__table__).values(rows))
+
+    def _flush(self, batch: list[tuple[Engine, dict]]) -> None:
+        by_bind: dict[Engine, list[dict]] = defaultdict(list)
+        for bind, entry in batch:
+            by_bind[bind].append(entry)
+        for bind, rows in by_bind.items():
+            try:
+                self.write(bind, rows)
+            except Exception:
+                # Isolate the bad row(s) rather than losing the whole batch.
+                logger.exception("Audit batch insert failed; retrying rows individually")
+                for row in rows:
+                    try:
+                        self.write(bind, [row])
+                    except Exception:
+                        logger.exception("Dropping audit entry %s", row)
+
+    def _run(self) -> None:
+        batch: list[tuple[Engine, dict]] = []
+        # Set when the first entry enters an empty buffer, so steady traffic
+        # cannot keep pushing the flush back.
+        deadline: float | None = None
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = _FlushMarker()
+            if item is None:
+                self._flush(batch)
+                return
+            if isinstance(item, _FlushMarker):
+                if batch:
+                    self._flush(batch)
+                    batch, deadline = [], None
+                item.done.set()
+                continue
+            batch.append(item)
+            if deadline is None:
+                deadline = time.monotonic() + self.flush_interval_seconds
+            if len(batch) >= self.batch_size or time.monotonic() >= deadline:
+                self._flush(batch)
+                batch, deadline = [], None
+
+    def drain(self, timeout: float | None = None) -> None:
+        """Block until everything enqueued so far has been written."""
+        with self._lock:
+            running = self._thread is not None and self._thread.is_alive()
+        if not running:
+            return
+        marker = _FlushMarker()
+        self._queue.put(marker)
+        marker.done.wait(timeout)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None and thread.is_alive():
+            self._queue.put(None)
+            thread.join()
+
+
+audit_writer = AuditWriter(
+    batch_size=settings.audit_batch_size,
+    flush_interval_seconds=settings.audit_flush_interval_ms / 1000,
+    max_queue=settings.audit_queue_size,
+)
@@ -0,0 +1,189 @@
+from datetime import date, datetime, timezone
+
+from sqlalchemy import delete, desc, func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.models.daily_balance import DailyBalance
+from app.models.enums import TransactionType
+from app.models.transaction import Transaction
+
+DEPOSIT_TYPES = (TransactionType.deposit, TransactionType.transfer_in)
+WITHDRAWAL_TYPES = (TransactionType.withdrawal, TransactionType.transfer_out, TransactionType.fee)
+
+BACKFILL_BATCH_SIZE = 1000
+
+
+def utc_day(value: datetime) -> date:
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return value.date()
+
+
+def _split_amount(transaction_type: TransactionType, amount_cents: int) -> tuple[int, int]:
+    if transaction_type in DEPOSIT_TYPES:
+        return amount_cents, 0
+    if transaction_type in WITHDRAWAL_TYPES:
+        return 0, amount_cents
+    return 0, 0
+
+
+def _insert(db: Session):
+    if db.get_bind().dialect.name == "postgresql":
+        return postgresql.insert(DailyBalance)
+    return sqlite.insert(DailyBalance)
+
+
+def _upsert_days(db: Session, rows: list[dict]) -> None:
+    stmt = _insert(db)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[DailyBalance.account_id, DailyBalance.day],
+        set_={
+            "closing_balance_cents": stmt.excluded.closing_balance_cents,
+            "total_deposits_cents": DailyBalance.total_deposits_cents + stmt.excluded.total_deposits_cents,
+            "total_withdrawals_cents": (
+                DailyBalance.total_withdrawals_cents + stmt.excluded.total_withdrawals_cents
+            ),
+            "transaction_count": DailyBalance.transaction_count + stmt.excluded.transaction_count,
+        },
+    )
+    db.execute(stmt, rows)
+
+
+def record_daily_activity(
+    db: Session,
+    account_id: str,
+    created_at: datetime,
+    transaction_type: TransactionType,
+    amount_cents: int,
+    balance_after_cents: int,
+) -> None:
+    """Fold one posted transaction into its account's rollup row for the day."""
+    record_daily_activities(db, [{
+        "account_id": account_id,
+        "created_at": created_at,
+        "transaction_type": transaction_type,
+        "amount_cents": amount_cents,
+        "balance_after_cents": balance_after_cents,
+    }])
+
+
+def record_daily_activities(db: Session, transactions: list[dict]) -> None:
+    """Fold posted transactions, given oldest first, into the rollup with one upsert per account-day."""
+    days: dict[tuple[str, date], dict] = {}
+    for tx in transactions:
+        day = utc_day(tx["created_at"])
+        row = days.setdefault((tx["account_id"], day), {
+            "account_id": tx["account_id"],
+            "day": day,
+            "total_deposits_cents": 0,
+            "total_withdrawals_cents": 0,
+            "transaction_count": 0,
+        })
+        deposits, withdrawals = _split_amount(tx["transaction_type"], tx["amount_cents"])
+        row["closing_balance_cents"] = tx["balance_after_cents"]
+        row["total_deposits_cents"] += deposits
+        row["total_withdrawals_cents"] += withdrawals
+        row["transaction_count"] += 1
+    if days:
+        _upsert_days(db, list(days.values()))
+
+
+def summarize_days(db: Session, account_id: str, start_day: date, end_day: date) -> dict:
+    """Opening/closing balances and totals for whole days, read from the rollup only."""
+    in_range = (
+        DailyBalance.account_id == account_id,
+        DailyBalance.day >= start_day,
+        DailyBalance.day <= end_day,
+    )
+    opening = (
+        select(DailyBalance.closing_balance_cents)
+        .where(DailyBalance.account_id == account_id, DailyBalance.day < start_day)
+        .order_by(desc(DailyBalance.day))
+        .limit(1)
+        .scalar_subquery()
+    )
+    closing = (
+        select(DailyBalance.closing_balance_cents)
+        .where(*in_range)
+        .order_by(desc(DailyBalance.day))
+        .limit(1)
+        .scalar_subquery()
+    )
+    row = db.execute(
+        select(
+            func.coalesce(opening, 0),
+            closing,
+            func.coalesce(func.sum(DailyBalance.total_deposits_cents), 0),
+            func.coalesce(func.sum(DailyBalance.total_withdrawals_cents), 0),
+            func.coalesce(func.sum(DailyBalance.transaction_count), 0),
+        ).where(*in_range)
+    ).one()
+    opening_balance_cents, closing_balance_cents, deposits, withdrawals, count = row
+    return {
+        "opening_balance_cents": opening_balance_cents,
+        "closing_balance_cents": (
+            closing_balance_cents if closing_balance_cents is not None else opening_balance_cents
+        ),
+        "total_deposits_cents": deposits,
+        "total_withdrawals_cents": withdrawals,
+        "transaction_count": count,
+    }
+
+
+def backfill_daily_balances(db: Session, account_id: str | None = None) -> int:
+    """Rebuild rollup rows from the raw ledger; returns the number of rows written.
+
+    Streams transactions in (account, time) order so memory is bounded by one
+    batch of rollup rows regardless of history size.
+    """
+    clear = delete(DailyBalance)
+    source = select(
+        Transaction.account_id,
+        Transaction.created_at,
+        Transaction.transaction_type,
+        Transaction.amount_cents,
+        Transaction.balance_after_cents,
+    )
+    if account_id is not None:
+        clear = clear.where(DailyBalance.account_id == account_id)
+        source = source.where(Transaction.account_id == account_id)
+    db.execute(clear)
+
+    rows = db.execute(
+        source.order_by(Transaction.account_id, Transaction.created_at, Transaction.id)
+        .execution_options(yield_per=BACKFILL_BATCH_SIZE)
+    )
+
+    written = 0
+    batch: list[dict] = []
+    current: dict | None = None
+    for row in rows:
+        day = utc_day(row.created_at)
+        if current is None or (current["account_id"], current["day"]) != (row.account_id, day):
+            if current is not None:
+                batch.append(current)
+            current = {
+                "account_id": row.account_id,
+                "day": day,
+                "closing_balance_cents": 0,
+                "total_deposits_cents": 0,
+                "total_withdrawals_cents": 0,
+                "transaction_count": 0,
+            }
+        deposits, withdrawals = _split_amount(row.transaction_type, row.amount_cents)
+        current["total_deposits_cents"] += deposits
+        current["total_withdrawals_cents"] += withdrawals
+        current["transaction_count"] += 1
+        current["closing_balance_cents"] = row.balance_after_cents
+        if len(batch) >= BACKFILL_BATCH_SIZE:
+            db.execute(DailyBalance.__table__.insert(), batch)
+            written += len(batch)
+            batch = []
+
+    if current is not None:
+        batch.append(current)
+    if batch:
+        db.execute(DailyBalance.__table__.insert(), batch)
+        written += len(batch)
+    return written
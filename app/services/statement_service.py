@@ -1,22 +1,84 @@
 from datetime import datetime, time
 
-from sqlalchemy import desc, select
+from sqlalchemy import case, desc, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.models.enums import TransactionType
+from app.core.config import settings
 from app.models.transaction import Transaction
+from app.services.daily_balance_service import DEPOSIT_TYPES, WITHDRAWAL_TYPES, summarize_days
 
+EXPORT_BATCH_SIZE = 1000
 
-def build_statement(db: Session, account_id: str, start_date, end_date):
-    start_dt = datetime.combine(start_date, time.min)
-    end_dt = datetime.combine(end_date, time.max)
 
-    last_before = db.scalar(
-        select(Transaction)
+def _statement_bounds(start_date, end_date) -> tuple[datetime, datetime]:
+    return datetime.combine(start_date, time.min), datetime.combine(end_date, time.max)
+
+
+def _opening_balance_stmt(account_id: str, start_dt: datetime):
+    return (
+        select(Transaction.balance_after_cents)
         .where(Transaction.account_id == account_id, Transaction.created_at < start_dt)
-        .order_by(desc(Transaction.created_at))
+        .order_by(desc(Transaction.created_at), desc(Transaction.id))
+        .limit(1)
     )
-    opening_balance_cents = last_before.balance_after_cents if last_before else 0
+
+
+def _summarize_ledger(db: Session, account_id: str, start_date, end_date) -> dict:
+    """Statement totals aggregated over the raw ledger in a single query."""
+    start_dt, end_dt = _statement_bounds(start_date, end_date)
+    in_range = (
+        Transaction.account_id == account_id,
+        Transaction.created_at >= start_dt,
+        Transaction.created_at <= end_dt,
+    )
+
+    opening = _opening_balance_stmt(account_id, start_dt).scalar_subquery()
+    closing = (
+        select(Transaction.balance_after_cents)
+        .where(*in_range)
+        .order_by(desc(Transaction.created_at), desc(Transaction.id))
+        .limit(1)
+        .scalar_subquery()
+    )
+
+    def _total(types):
+        amount = case((Transaction.transaction_type.in_(types), Transaction.amount_cents), else_=0)
+        return func.coalesce(func.sum(amount), 0)
+
+    row = db.execute(
+        select(
+            func.coalesce(opening, 0),
+            closing,
+            _total(DEPOSIT_TYPES),
+            _total(WITHDRAWAL_TYPES),
+            func.count(Transaction.id),
+        ).where(*in_range)
+    ).one()
+    opening_balance_cents, closing_balance_cents, deposits, withdrawals, count = row
+
+    return {
+        "opening_balance_cents": opening_balance_cents,
+        "closing_balance_cents": (
+            closing_balance_cents if closing_balance_cents is not None else opening_balance_cents
+        ),
+        "total_deposits_cents": deposits,
+        "total_withdrawals_cents": withdrawals,
+        "transaction_count": count,
+    }
+
+
+def _summarize(db: Session, account_id: str, start_date, end_date) -> dict:
+    # Statement ranges are whole days, so the rollup covers them exactly and
+    # the cost is O(days) rather than O(transactions).
+    if settings.statement_use_daily_balances:
+        return summarize_days(db, account_id, start_date, end_date)
+    return _summarize_ledger(db, account_id, start_date, end_date)
+
+
+def build_statement(db: Session, account_id: str, start_date, end_date):
+    start_dt, end_dt = _statement_bounds(start_date, end_date)
+    summary = _summarize(db, account_id, start_date, end_date)
 
     transactions = db.scalars(
         select(Transaction)
@@ -25,28 +87,91 @@ def build_statement(db: Session, account_id: str, start_date, end_date):
             Transaction.created_at >= start_dt,
             Transaction.created_at <= end_dt,
         )
-        .order_by(Transaction.created_at)
+        .order_by(Transaction.created_at, Transaction.id)
     ).all()
 
-    closing_balance_cents = opening_balance_cents
-    if transactions:
-        closing_balance_cents = transactions[-1].balance_after_cents
+    return {**summary, "transactions": transactions}
 
-    deposit_types = {TransactionType.deposit, TransactionType.transfer_in}
-    withdrawal_types = {TransactionType.withdrawal, TransactionType.transfer_out, TransactionType.fee}
 
-    total_deposits_cents = sum(
-        t.amount_cents for t in transactions if t.transaction_type in deposit_types
-    )
-    total_withdrawals_cents = sum(
-        t.amount_cents for t in transactions if t.transaction_type in withdrawal_types
+def build_statement_summary(db: Session, account_id: str, start_date, end_date):
+    """Statement totals without loading any transaction rows."""
+    return {**_summarize(db, account_id, start_date, end_date), "transactions": None}
+
+
+async def build_statement_async(db: AsyncSession, account_id: str, start_date, end_date):
+    return await db.run_sync(build_statement, account_id, start_date, end_date)
+
+
+async def build_statement_summary_async(db: AsyncSession, account_id: str, start_date, end_date):
+    return await db.run_sync(build_statement_summary, account_id, start_date, end_date)
+
+
+def iter_statement_records(db: Session, account_id: str, start_date, end_date):
+    """Yield an opening record, each transaction in the range, then a closing record.
+
+    Rows are read as plain column tuples in ``EXPORT_BATCH_SIZE`` batches and the
+    totals are accumulated while streaming, so memory stays flat however long
+    the range is and the closing record always agrees with the exported rows.
+    """
+    start_dt, end_dt = _statement_bounds(start_date, end_date)
+    if settings.statement_use_daily_balances:
+        opening_balance_cents = summarize_days(db, account_id, start_date, end_date)[
+            "opening_balance_cents"
+        ]
+    else:
+        opening_balance_cents = db.scalar(_opening_balance_stmt(account_id, start_dt)) or 0
+    yield {
+        "record_type": "opening",
+        "created_at": start_dt.isoformat(),
+        "balance_after_cents": opening_balance_cents,
+    }
+
+    rows = db.execute(
+        select(
+            Transaction.id,
+            Transaction.created_at,
+            Transaction.transaction_type,
+            Transaction.amount_cents,
+            Transaction.balance_after_cents,
+            Transaction.description,
+            Transaction.reference_id,
+            Transaction.status,
+        )
+        .where(
+            Transaction.account_id == account_id,
+            Transaction.created_at >= start_dt,
+            Transaction.created_at <= end_dt,
+        )
+        .order_by(Transaction.created_at, Transaction.id)
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
     )
 
-    return {
-        "opening_balance_cents": opening_balance_cents,
-        "closing_balance_cents": closing_balance_cents,
+    closing_balance_cents = opening_balance_cents
+    total_deposits_cents = total_withdrawals_cents = transaction_count = 0
+    for row in rows:
+        if row.transaction_type in DEPOSIT_TYPES:
+            total_deposits_cents += row.amount_cents
+        elif row.transaction_type in WITHDRAWAL_TYPES:
+            total_withdrawals_cents += row.amount_cents
+        closing_balance_cents = row.balance_after_cents
+        transaction_count += 1
+        yield {
+            "record_type": "transaction",
+            "id": row.id,
+            "created_at": row.created_at.isoformat(),
+            "transaction_type": row.transaction_type.value,
+            "amount_cents": row.amount_cents,
+            "balance_after_cents": row.balance_after_cents,
+            "description": row.description,
+            "reference_id": row.reference_id,
+            "status": row.status.value,
+        }
+
+    yield {
+        "record_type": "closing",
+        "created_at": end_dt.isoformat(),
+        "balance_after_cents": closing_balance_cents,
         "total_deposits_cents": total_deposits_cents,
         "total_withdrawals_cents": total_withdrawals_cents,
-        "transaction_count": len(transactions),
-        "transactions": transactions,
+        "transaction_count": transaction_count,
     }
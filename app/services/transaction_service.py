@@ -1,9 +1,22 @@
 from fastapi import HTTPException, status
+from sqlalchemy import and_, func, insert, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
 
+from app.core.config import settings
+from app.core.metrics import INSUFFICIENT_FUNDS
 from app.models.account import Account
 from app.models.enums import AccountStatus, TransactionStatus, TransactionType
+from app.models.mixins import utcnow
 from app.models.transaction import Transaction
+from app.schemas.transaction import BatchOperation, BatchOperationType, TotalMode
+from app.services.daily_balance_service import record_daily_activities, record_daily_activity
+from app.utils.cache import TTLCache
+from app.utils.ids import new_id
+from app.utils.pagination import decode_cursor, encode_cursor
+
+_count_cache = TTLCache(maxsize=10_000, ttl_seconds=settings.transaction_count_cache_ttl_seconds)
 
 
 def _ensure_active(account: Account) -> None:
@@ -14,64 +27,278 @@ def _ensure_active(account: Account) -> None:
         )
 
 
-def apply_deposit(
-    db: Session,
-    account: Account,
-    amount_cents: int,
-    description: str | None = None,
-    transaction_type: TransactionType = TransactionType.deposit,
-    reference_id: str | None = None,
-) -> Transaction:
-    _ensure_active(account)
+def _ensure_positive(amount_cents: int) -> None:
     if amount_cents <= 0:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Amount must be greater than zero",
         )
-    new_balance = account.balance_cents + amount_cents
-    account.balance_cents = new_balance
+
+
+def _apply_balance_delta(db: Session, account: Account, delta_cents: int) -> int | None:
+    """Move the balance by ``delta_cents`` in a single conditional UPDATE.
+
+    The arithmetic runs inside the database so concurrent writers cannot lose
+    each other's updates. Debits only match while the balance covers them.
+    Returns the new balance, or None when no row matched.
+    """
+    stmt = update(Account).where(Account.id == account.id)
+    if delta_cents < 0:
+        stmt = stmt.where(Account.balance_cents >= -delta_cents)
+    stmt = (
+        stmt.values(balance_cents=Account.balance_cents + delta_cents)
+        .returning(Account.balance_cents)
+        .execution_options(synchronize_session=False)
+    )
+    new_balance = db.execute(stmt).scalar_one_or_none()
+    if new_balance is not None:
+        # Keep the in-session object current without scheduling another UPDATE.
+        set_committed_value(account, "balance_cents", new_balance)
+    return new_balance
+
+
+def _record_transaction(
+    db: Session,
+    account: Account,
+    transaction_type: TransactionType,
+    amount_cents: int,
+    balance_after_cents: int,
+    description: str | None,
+    reference_id: str | None,
+) -> Transaction:
     tx = Transaction(
         account_id=account.id,
         transaction_type=transaction_type,
         amount_cents=amount_cents,
-        balance_after_cents=new_balance,
+        balance_after_cents=balance_after_cents,
         description=description,
         reference_id=reference_id,
         status=TransactionStatus.posted,
+        created_at=utcnow(),
     )
     db.add(tx)
+    record_daily_activity(
+        db, account.id, tx.created_at, transaction_type, amount_cents, balance_after_cents
+    )
     return tx
 
 
-def apply_withdrawal(
+def apply_deposit(
     db: Session,
     account: Account,
     amount_cents: int,
     description: str | None = None,
-    transaction_type: TransactionType = TransactionType.withdrawal,
+    transaction_type: TransactionType = TransactionType.deposit,
     reference_id: str | None = None,
 ) -> Transaction:
     _ensure_active(account)
-    if amount_cents <= 0:
+    _ensure_positive(amount_cents)
+    new_balance = _apply_balance_delta(db, account, amount_cents)
+    if new_balance is None:
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Amount must be greater than zero",
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Account not found",
         )
-    if account.balance_cents < amount_cents:
+    return _record_transaction(
+        db, account, transaction_type, amount_cents, new_balance, description, reference_id
+    )
+
+
+def apply_reversal(
+    db: Session,
+    account: Account,
+    amount_cents: int,
+    description: str | None = None,
+    reference_id: str | None = None,
+) -> Transaction:
+    """Credit back a debit that could not complete.
+
+    Unlike apply_deposit this skips the status check: the money belongs to
+    the holder, and freezing or closing the account in the meantime must
+    not strand it.
+    """
+    _ensure_positive(amount_cents)
+    new_balance = _apply_balance_delta(db, account, amount_cents)
+    if new_balance is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Account not found",
+        )
+    return _record_transaction(
+        db, account, TransactionType.transfer_in, amount_cents, new_balance, description, reference_id
+    )
+
+
+def apply_withdrawal(
+    db: Session,
+    account: Account,
+    amount_cents: int,
+    description: str | None = None,
+    transaction_type: TransactionType = TransactionType.withdrawal,
+    reference_id: str | None = None,
+) -> Transaction:
+    _ensure_active(account)
+    _ensure_positive(amount_cents)
+    new_balance = _apply_balance_delta(db, account, -amount_cents)
+    if new_balance is None:
+        INSUFFICIENT_FUNDS.inc()
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Insufficient funds",
         )
-    new_balance = account.balance_cents - amount_cents
-    account.balance_cents = new_balance
-    tx = Transaction(
-        account_id=account.id,
-        transaction_type=transaction_type,
-        amount_cents=amount_cents,
-        balance_after_cents=new_balance,
-        description=description,
-        reference_id=reference_id,
-        status=TransactionStatus.posted,
+    return _record_transaction(
+        db, account, transaction_type, amount_cents, new_balance, description, reference_id
     )
-    db.add(tx)
-    return tx
+
+
+def _lock_balances(db: Session, account_ids: set[str]) -> dict[str, tuple[int, AccountStatus]]:
+    """Current balance and status of each account, read under a write lock.
+
+    A no-op UPDATE takes the row locks (the database lock on SQLite) before the
+    balances are read, so nothing can change them until the batch commits.
+    """
+    if not account_ids:
+        return {}
+    rows = db.execute(
+        update(Account)
+        .where(Account.id.in_(account_ids))
+        .values(balance_cents=Account.balance_cents)
+        .returning(Account.id, Account.balance_cents, Account.status)
+        .execution_options(synchronize_session=False)
+    )
+    return {account_id: (balance, account_status) for account_id, balance, account_status in rows}
+
+
+def apply_batch(
+    db: Session,
+    operations: list[BatchOperation],
+    account_ids: set[str],
+    atomic: bool,
+) -> list[dict]:
+    """Apply deposits and withdrawals in order with one statement per table.
+
+    ``account_ids`` are the accounts the caller owns; operations on any other
+    account fail. Each operation sees the balance left by the ones before it.
+    Returns one result per operation. When ``atomic`` and any operation fails,
+    nothing is written.
+    """
+    balances = _lock_balances(db, account_ids)
+    results, rows = [], []
+    for index, op in enumerate(operations):
+        state = balances.get(op.account_id)
+        error = None
+        if state is None:
+            error = "Account not found"
+        elif state[1] in {AccountStatus.frozen, AccountStatus.closed}:
+            error = "Account is not active"
+        elif op.type == BatchOperationType.withdraw and state[0] < op.amount_cents:
+            error = "Insufficient funds"
+        if error:
+            results.append({"index": index, "applied": False, "error": error})
+            continue
+
+        if op.type == BatchOperationType.deposit:
+            transaction_type, delta = TransactionType.deposit, op.amount_cents
+        else:
+            transaction_type, delta = TransactionType.withdrawal, -op.amount_cents
+        balance = state[0] + delta
+        balances[op.account_id] = (balance, state[1])
+        row = {
+            "id": new_id(),
+            "account_id": op.account_id,
+            "transaction_type": transaction_type,
+            "amount_cents": op.amount_cents,
+            "balance_after_cents": balance,
+            "description": op.description,
+            "reference_id": None,
+            "status": TransactionStatus.posted,
+            "created_at": utcnow(),
+        }
+        rows.append(row)
+        results.append({"index": index, "applied": True, "transaction": row})
+
+    if atomic and len(rows) < len(operations):
+        for result in results:
+            result["applied"] = False
+            result.pop("transaction", None)
+        return results
+    if rows:
+        touched = {row["account_id"] for row in rows}
+        db.execute(
+            update(Account),
+            [{"id": account_id, "balance_cents": balances[account_id][0]} for account_id in touched],
+        )
+        db.execute(insert(Transaction), rows)
+        record_daily_activities(db, rows)
+    return results
+
+
+def _count_transactions(db: Session, stmt, cache_key, total_mode: TotalMode) -> int | None:
+    if total_mode == TotalMode.none:
+        return None
+    if total_mode == TotalMode.cached:
+        cached = _count_cache.get(cache_key)
+        if cached is not None:
+            return cached
+    total = db.scalar(select(func.count()).select_from(stmt.subquery())) or 0
+    _count_cache.set(cache_key, total)
+    return total
+
+
+def list_transactions_page(
+    db: Session,
+    account_id: str,
+    page: int = 1,
+    page_size: int = 20,
+    transaction_type: TransactionType | None = None,
+    cursor: str | None = None,
+    total_mode: TotalMode = TotalMode.exact,
+) -> dict:
+    """Newest-first page of an account's transactions.
+
+    With ``cursor`` the page is located by a keyset seek on (created_at, id)
+    instead of OFFSET, so deep pages cost the same as the first one.
+    """
+    stmt = select(Transaction).where(Transaction.account_id == account_id)
+    if transaction_type:
+        stmt = stmt.where(Transaction.transaction_type == transaction_type)
+
+    total = _count_transactions(db, stmt, (account_id, transaction_type), total_mode)
+
+    page_stmt = stmt.order_by(Transaction.created_at.desc(), Transaction.id.desc())
+    if cursor:
+        try:
+            after_created_at, after_id = decode_cursor(cursor)
+        except ValueError as exc:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor",
+            ) from exc
+        page_stmt = page_stmt.where(
+            or_(
+                Transaction.created_at < after_created_at,
+                and_(Transaction.created_at == after_created_at, Transaction.id < after_id),
+            )
+        )
+    else:
+        page_stmt = page_stmt.offset((page - 1) * page_size)
+
+    rows = db.scalars(page_stmt.limit(page_size + 1)).all()
+    items = rows[:page_size]
+    next_cursor = None
+    if len(rows) > page_size:
+        last = items[-1]
+        next_cursor = encode_cursor(last.created_at, last.id)
+
+    return {
+        "items": items,
+        "page": page,
+        "page_size": page_size,
+        "total": total,
+        "next_cursor": next_cursor,
+    }
+
+
+async def list_transactions_page_async(db: AsyncSession, account_id: str, **kwargs) -> dict:
+    """``list_transactions_page`` with its queries awaited on the event loop."""
+    return await db.run_sync(list_transactions_page, account_id, **kwargs)
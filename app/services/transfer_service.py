@@ -1,23 +1,18 @@
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 
 from fastapi import HTTPException, status
-from sqlalchemy import select
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from app.models.account import Account
 from app.models.enums import AccountStatus, TransactionType, TransferStatus
+from app.models.mixins import utcnow
 from app.models.transfer import Transfer
-from app.services.transaction_service import apply_deposit, apply_withdrawal
+from app.services.transaction_service import apply_deposit, apply_reversal, apply_withdrawal
 
 
-def create_transfer(
-    db: Session,
-    from_account: Account,
-    to_account: Account,
-    idempotency_key: str,
-    amount_cents: int,
-    description: str | None,
-) -> Transfer:
+def _validate_transfer(from_account: Account, to_account: Account, amount_cents: int) -> None:
     if from_account.id == to_account.id:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -39,9 +34,34 @@ def create_transfer(
             detail="Destination account is not active",
         )
 
+
+def _lock_accounts(db: Session, account_ids: set[str]) -> None:
+    """Take the accounts' row locks in id order before either balance changes.
+
+    The debit and credit UPDATEs would otherwise lock source then destination,
+    so concurrent A->B and B->A transfers could each hold one row and wait on
+    the other. SQLite drops FOR UPDATE; its single write lock already
+    serialises them.
+    """
+    db.execute(
+        select(Account.id).where(Account.id.in_(account_ids)).order_by(Account.id).with_for_update()
+    )
+
+
+def _debit_leg(
+    db: Session,
+    from_account: Account,
+    to_account: Account,
+    idempotency_key: str,
+    amount_cents: int,
+    description: str | None,
+) -> tuple[Transfer, bool]:
+    """Create the transfer and debit the source; returns (transfer, created)."""
+    _validate_transfer(from_account, to_account, amount_cents)
+
     existing = db.scalar(select(Transfer).where(Transfer.idempotency_key == idempotency_key))
     if existing:
-        return existing
+        return existing, False
 
     transfer = Transfer(
         idempotency_key=idempotency_key,
@@ -62,6 +82,24 @@ def create_transfer(
         transaction_type=TransactionType.transfer_out,
         reference_id=transfer.id,
     )
+    return transfer, True
+
+
+def create_transfer(
+    db: Session,
+    from_account: Account,
+    to_account: Account,
+    idempotency_key: str,
+    amount_cents: int,
+    description: str | None,
+) -> Transfer:
+    _lock_accounts(db, {from_account.id, to_account.id})
+    transfer, created = _debit_leg(
+        db, from_account, to_account, idempotency_key, amount_cents, description
+    )
+    if not created:
+        return transfer
+
     apply_deposit(
         db,
         to_account,
@@ -74,3 +112,93 @@ def create_transfer(
     transfer.status = TransferStatus.completed
     transfer.completed_at = datetime.now(timezone.utc)
     return transfer
+
+
+def open_cross_shard_transfer(
+    db: Session,
+    from_account: Account,
+    to_account: Account,
+    idempotency_key: str,
+    amount_cents: int,
+    description: str | None,
+) -> Transfer:
+    """First leg of a transfer whose destination is on another shard.
+
+    Debits the source and leaves the transfer ``pending`` in the same source
+    shard transaction. Pending transfers act as the outbox: ``settle_transfer``
+    credits the destination and completes them, and can safely run again.
+    """
+    transfer, _ = _debit_leg(db, from_account, to_account, idempotency_key, amount_cents, description)
+    return transfer
+
+
+def _close_transfer(source: Session, transfer_id: str, new_status: TransferStatus) -> bool:
+    """Move a pending transfer to ``new_status``; False if another settler got there first."""
+    result = source.execute(
+        update(Transfer)
+        .where(Transfer.id == transfer_id, Transfer.status == TransferStatus.pending)
+        .values(status=new_status, completed_at=utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount == 1
+
+
+def settle_transfer(source: Session, destination: Session, transfer_id: str) -> Transfer:
+    """Credit the destination of a pending cross-shard transfer and complete it.
+
+    The credit carries the transfer id as its reference, and the unique
+    (account_id, reference_id, transaction_type) index turns a repeated
+    credit into an IntegrityError, so retries never pay twice. A credit the
+    destination refuses (closed or frozen account) reverses the debit, even
+    if the source account has since been frozen or closed too.
+    """
+    transfer = source.get(Transfer, transfer_id)
+    if transfer is None or transfer.status != TransferStatus.pending:
+        return transfer
+
+    credited = True
+    try:
+        to_account = destination.get(Account, transfer.to_account_id)
+        if to_account is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Destination account not found",
+            )
+        apply_deposit(
+            destination,
+            to_account,
+            amount_cents=transfer.amount_cents,
+            description=transfer.description or "Transfer in",
+            transaction_type=TransactionType.transfer_in,
+            reference_id=transfer.id,
+        )
+        destination.commit()
+    except IntegrityError:
+        # An earlier attempt already credited the destination.
+        destination.rollback()
+    except HTTPException:
+        destination.rollback()
+        credited = False
+
+    if credited:
+        _close_transfer(source, transfer.id, TransferStatus.completed)
+    elif _close_transfer(source, transfer.id, TransferStatus.failed):
+        apply_reversal(
+            source,
+            source.get(Account, transfer.from_account_id),
+            amount_cents=transfer.amount_cents,
+            description="Transfer reversal",
+            reference_id=transfer.id,
+        )
+    source.commit()
+    source.refresh(transfer)
+    return transfer
+
+
+def pending_transfer_ids(db: Session, older_than_seconds: int) -> list[str]:
+    cutoff = utcnow() - timedelta(seconds=older_than_seconds)
+    return db.scalars(
+        select(Transfer.id)
+        .where(Transfer.status == TransferStatus.pending, Transfer.created_at < cutoff)
+        .order_by(Transfer.created_at)
+    ).all()
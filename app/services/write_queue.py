@@ -0,0 +1,173 @@
+import contextvars
+import logging
+import queue
+import threading
+import time
+from collections import defaultdict
+from collections.abc import Callable
+from concurrent.futures import Future
+from typing import TypeVar
+
+from fastapi import HTTPException, status
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class WriteQueueFullError(Exception):
+    pass
+
+
+class _Job:
+    def __init__(self, bind: Engine, fn: Callable[[Session], object]):
+        self.bind = bind
+        self.fn = fn
+        self.future: Future = Future()
+        # Runs in the submitter's context so per-request state (query stats) follows it.
+        self.context = contextvars.copy_context()
+
+
+class WriteQueue:
+    """Funnels mutating units of work through one writer thread.
+
+    Jobs that arrive while the previous batch is committing are run in a single
+    transaction, each inside its own SAVEPOINT, and committed once (group
+    commit). A job that raises is rolled back to its savepoint and only its
+    caller sees the error. Results are returned detached with every column
+    loaded, so callers can serialise them without the writer's session.
+    """
+
+    def __init__(self, max_batch: int, max_wait_seconds: float, max_queue: int):
+        self.max_batch = max_batch
+        self.max_wait_seconds = max_wait_seconds
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    def _ensure_started(self) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="write-queue", daemon=True
+                )
+                self._thread.start()
+
+    def submit(self, bind: Engine, fn: Callable[[Session], T]) -> "Future[T]":
+        self._ensure_started()
+        job = _Job(bind, fn)
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            raise WriteQueueFullError from None
+        return job.future
+
+    def _collect(self, first: _Job) -> tuple[list[_Job], bool]:
+        batch, stopping = [first], False
+        deadline = time.monotonic() + self.max_wait_seconds
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                job = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if job is None:
+                stopping = True
+                break
+            batch.append(job)
+        return batch, stopping
+
+    def _commit_group(self, bind: Engine, jobs: list[_Job]) -> None:
+        outcomes: list[tuple[_Job, object, BaseException | None]] = []
+        session = Session(bind=bind, autoflush=False, expire_on_commit=False)
+        try:
+            if bind.dialect.name == "sqlite":
+                # pysqlite only opens a transaction before DML, so a leading
+                # SAVEPOINT would run in autocommit and every RELEASE would commit.
+                session.connection().exec_driver_sql("BEGIN IMMEDIATE")
+            for job in jobs:
+                savepoint = session.begin_nested()
+                try:
+                    result = job.context.run(job.fn, session)
+                    savepoint.commit()
+                except Exception as exc:
+                    savepoint.rollback()
+                    outcomes.append((job, None, exc))
+                else:
+                    outcomes.append((job, result, None))
+            session.commit()
+        except Exception as exc:
+            session.rollback()
+            session.close()
+            if len(jobs) > 1:
+                # Nothing from this batch was written; retry each job on its own
+                # so one bad row cannot fail its neighbours.
+                logger.exception("Group commit of %d writes failed; retrying individually", len(jobs))
+                for job in jobs:
+                    self._commit_group(bind, [job])
+            else:
+                jobs[0].future.set_exception(exc)
+            return
+        session.close()
+        for job, result, exc in outcomes:
+            if exc is None:
+                job.future.set_result(result)
+            else:
+                job.future.set_exception(exc)
+
+    def _process(self, batch: list[_Job]) -> None:
+        by_bind: dict[Engine, list[_Job]] = defaultdict(list)
+        for job in batch:
+            by_bind[job.bind].append(job)
+        for bind, jobs in by_bind.items():
+            self._commit_group(bind, jobs)
+
+    def _run(self) -> None:
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            batch, stopping = self._collect(job)
+            self._process(batch)
+            if stopping:
+                return
+
+    def shutdown(self) -> None:
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None and thread.is_alive():
+            self._queue.put(None)
+            thread.join()
+
+
+write_queue = WriteQueue(
+    max_batch=settings.write_queue_max_batch,
+    max_wait_seconds=settings.write_queue_max_wait_ms / 1000,
+    max_queue=settings.write_queue_size,
+)
+
+
+def run_write(db: Session, fn: Callable[[Session], T]) -> T:
+    """Run a mutating unit of work and commit it.
+
+    ``fn`` receives the session to write with and must load what it changes
+    through that session. With WRITE_QUEUE_ENABLED it runs on the writer thread
+    and shares a commit with concurrent requests; otherwise it runs on ``db``.
+    """
+    if not settings.write_queue_enabled:
+        result = fn(db)
+        db.commit()
+        return result
+    try:
+        future = write_queue.submit(db.get_bind(), fn)
+    except WriteQueueFullError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many pending writes, retry shortly",
+            headers={"Retry-After": "1"},
+        )
+    return future.result()
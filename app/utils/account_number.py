@@ -1,5 +1,13 @@
 import secrets
 
+ACCOUNT_NUMBER_SPACE = 10**10
 
-def generate_account_number() -> str:
-    return f"{secrets.randbelow(10**10):010d}"
+
+def generate_account_number(shard: int = 0, shards: int = 1) -> str:
+    """Random 10-digit number congruent to ``shard`` modulo ``shards``.
+
+    Each shard only checks its own accounts for duplicates, so shards draw
+    from disjoint residue classes instead of a shared range.
+    """
+    number = secrets.randbelow(ACCOUNT_NUMBER_SPACE // shards) * shards + shard
+    return f"{number:010d}"
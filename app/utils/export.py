@@ -0,0 +1,38 @@
+import csv
+import io
+import json
+from typing import Iterable, Iterator
+
+STATEMENT_CSV_FIELDS = [
+    "record_type",
+    "id",
+    "created_at",
+    "transaction_type",
+    "amount_cents",
+    "balance_after_cents",
+    "description",
+    "reference_id",
+    "status",
+    "total_deposits_cents",
+    "total_withdrawals_cents",
+    "transaction_count",
+]
+
+
+def iter_ndjson(records: Iterable[dict]) -> Iterator[str]:
+    for record in records:
+        yield json.dumps(record, separators=(",", ":")) + "\n"
+
+
+def iter_csv(records: Iterable[dict], fieldnames: list[str]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fieldnames)
+    writer.writeheader()
+    for record in records:
+        writer.writerow(record)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    # Header-only output when no records were produced.
+    if buffer.getvalue():
+        yield buffer.getvalue()
@@ -0,0 +1,28 @@
+import secrets
+import time
+import uuid
+
+from app.core.config import settings
+
+
+def uuid7() -> uuid.UUID:
+    """RFC 9562 UUIDv7: 48-bit Unix milliseconds, then 12 bits of sub-millisecond
+    time and 62 random bits, so later keys sort after earlier ones."""
+    nanos = time.time_ns()
+    millis, remainder = divmod(nanos, 1_000_000)
+    sub_millis = remainder * 4096 // 1_000_000
+    value = (
+        (millis & 0xFFFF_FFFF_FFFF) << 80
+        | 0x7 << 76
+        | sub_millis << 64
+        | 0b10 << 62
+        | secrets.randbits(62)
+    )
+    return uuid.UUID(int=value)
+
+
+def new_id() -> str:
+    """Primary key for a new row in the canonical 36-character UUID form."""
+    if settings.id_strategy == "uuid4":
+        return str(uuid.uuid4())
+    return str(uuid7())
@@ -7,29 +7,36 @@ Architecture notes:
 - OAuth2PasswordBearer: missing token → 401, bad token → 401
 - Duplicate email → 400
 """
+import os
+from contextlib import contextmanager
+
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine, event
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import async_sessionmaker
 from sqlalchemy.orm import sessionmaker
 
-from app.core.deps import get_db
+from app.core.config import settings
+from app.core.deps import get_async_db, get_async_read_db, get_db, get_read_db
+from app.core.principal import principal_cache
 from app.db.base import Base
+from app.db.routing import clear_pins
+from app.db.session import create_async_db_engine, create_db_engine
 from app.main import app
+from app.services.audit_writer import audit_writer
 
-# ── In-memory test DB ────────────────────────────────────────────────────────
-TEST_DB = "sqlite:///./test_banking.db"
-_engine = create_engine(TEST_DB, connect_args={"check_same_thread": False})
-
-
-@event.listens_for(_engine, "connect")
-def _pragmas(conn, _):
-    cur = conn.cursor()
-    cur.execute("PRAGMA foreign_keys=ON")
-    cur.execute("PRAGMA journal_mode=WAL")
-    cur.close()
+# ── Test DB ──────────────────────────────────────────────────────────────────
+# Defaults to a local SQLite file; point TEST_DATABASE_URL at PostgreSQL (e.g. the
+# docker-compose "postgres" service) to run the same suite against that backend.
+TEST_DB = os.environ.get("TEST_DATABASE_URL", "sqlite:///./test_banking.db")
+_engine = create_db_engine(TEST_DB)
 
+_async_engine = create_async_db_engine(TEST_DB)
 
-_Session = sessionmaker(bind=_engine, autocommit=False, autoflush=False)
+_Session = sessionmaker(bind=_engine, autocommit=False, autoflush=False, expire_on_commit=False)
+_AsyncSession = async_sessionmaker(
+    _async_engine, autoflush=False, expire_on_commit=False, info={"write_bind": _engine}
+)
 
 
 @pytest.fixture(autouse=True)
@@ -37,7 +44,16 @@ def _reset_db():
     import app.models  # noqa: ensure all models registered
     Base.metadata.create_all(bind=_engine)
     yield
+    audit_writer.drain()
     Base.metadata.drop_all(bind=_engine)
+    principal_cache.clear()
+    clear_pins()
+
+
+@pytest.fixture(autouse=True)
+def _strict_query_budgets(monkeypatch):
+    # An endpoint running more SQL than its query_budget fails the test.
+    monkeypatch.setattr(settings, "query_budget_strict", True)
 
 
 @pytest.fixture()
@@ -49,11 +65,62 @@ def db(_reset_db):
         session.close()
 
 
+@pytest.fixture()
+def session_factory(_reset_db):
+    """Independent sessions on the test DB, e.g. one per worker thread."""
+    return _Session
+
+
+@pytest.fixture()
+def queries():
+    """Context manager collecting the SQL the sync test engine runs, with COMMIT markers."""
+
+    @contextmanager
+    def capture():
+        statements: list[str] = []
+
+        def _record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        def _commit(conn):
+            statements.append("COMMIT")
+
+        event.listen(_engine, "before_cursor_execute", _record)
+        event.listen(_engine, "commit", _commit)
+        try:
+            yield statements
+        finally:
+            event.remove(_engine, "before_cursor_execute", _record)
+            event.remove(_engine, "commit", _commit)
+
+    return capture
+
+
 @pytest.fixture()
 def client(db):
-    app.dependency_overrides[get_db] = lambda: db
+    def _get_test_db():
+        # Mirror get_db: a request never leaves its transaction open.
+        try:
+            yield db
+        finally:
+            db.rollback()
+
+    async def _get_test_async_db():
+        async with _AsyncSession() as session:
+            try:
+                yield session
+            finally:
+                await session.rollback()
+
+    # The suite has no replica: reads use the same test database as writes.
+    app.dependency_overrides[get_db] = _get_test_db
+    app.dependency_overrides[get_read_db] = _get_test_db
+    app.dependency_overrides[get_async_db] = _get_test_async_db
+    app.dependency_overrides[get_async_read_db] = _get_test_async_db
     with TestClient(app, raise_server_exceptions=True) as c:
         yield c
+        # Pooled async connections belong to this client's event loop.
+        c.portal.call(_async_engine.dispose)
     app.dependency_overrides.clear()
 
 
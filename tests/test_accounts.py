@@ -1,5 +1,17 @@
 """Account management tests."""
+from datetime import datetime, timezone
+
 import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.core import deps
+from app.core.principal import principal_cache
+from app.core.security import decode_token
+from app.db.base import Base
+from app.db.routing import clear_pins
+from app.db.session import create_async_db_engine, create_db_engine
+from app.main import app
+from tests import conftest
 from tests.conftest import auth, make_account, USER1
 
 
@@ -90,3 +102,84 @@ class TestAccountStatus:
         r = client.patch(f"/api/v1/accounts/{savings2['id']}/status",
                          json={"status": "frozen"}, headers=auth(token1))
         assert r.status_code == 404
+
+
+class TestBalanceAsOf:
+    def test_balance_as_of_past_and_present(self, client, token1, checking):
+        acc_id = checking["id"]
+        cutoff = datetime.now(timezone.utc)
+        client.post(f"/api/v1/transactions/{acc_id}/deposit",
+                    json={"amount_cents": 5000}, headers=auth(token1))
+
+        r = client.get(f"/api/v1/accounts/{acc_id}/balance",
+                       params={"as_of": cutoff.isoformat()}, headers=auth(token1))
+        assert r.status_code == 200
+        assert r.json()["balance_cents"] == 100000
+
+        now = datetime.now(timezone.utc).isoformat()
+        r = client.get(f"/api/v1/accounts/{acc_id}/balance",
+                       params={"as_of": now}, headers=auth(token1))
+        assert r.json()["balance_cents"] == 105000
+
+    def test_balance_before_any_history_is_zero(self, client, token1, checking):
+        r = client.get(f"/api/v1/accounts/{checking['id']}/balance",
+                       params={"as_of": "2000-01-01T00:00:00Z"}, headers=auth(token1))
+        assert r.json()["balance_cents"] == 0
+
+    def test_batch_balances(self, client, token1, checking):
+        other = make_account(client, token1, "savings", initial_deposit_cents=2500)
+        r = client.post("/api/v1/accounts/balances", json={
+            "account_ids": [checking["id"], other["id"]],
+            "as_of": datetime.now(timezone.utc).isoformat(),
+        }, headers=auth(token1))
+        assert r.status_code == 200
+        balances = {b["account_id"]: b["balance_cents"] for b in r.json()["balances"]}
+        assert balances == {checking["id"]: 100000, other["id"]: 2500}
+
+    def test_batch_with_non_owned_account_fails(self, client, token1, checking, savings2):
+        r = client.post("/api/v1/accounts/balances", json={
+            "account_ids": [checking["id"], savings2["id"]],
+            "as_of": datetime.now(timezone.utc).isoformat(),
+        }, headers=auth(token1))
+        assert r.status_code == 404
+
+
+class TestReadReplicaRouting:
+    @pytest.fixture()
+    def replica(self, client, tmp_path, monkeypatch):
+        """An empty second database standing in for a replica that has not caught up."""
+        url = f"sqlite:///{tmp_path / 'replica.db'}"
+        sync_engine = create_db_engine(url)
+        Base.metadata.create_all(bind=sync_engine)
+        async_engine = create_async_db_engine(url)
+        monkeypatch.setattr(deps, "AsyncSessionLocal", conftest._AsyncSession)
+        monkeypatch.setattr(
+            deps, "AsyncReadSessionLocal", async_sessionmaker(async_engine, expire_on_commit=False)
+        )
+        monkeypatch.delitem(app.dependency_overrides, deps.get_async_read_db)
+        yield
+        client.portal.call(async_engine.dispose)
+        sync_engine.dispose()
+
+    def test_recent_writer_reads_from_primary(self, client, token1, checking, replica):
+        r = client.get("/api/v1/accounts/", headers=auth(token1))
+        assert r.status_code == 200
+        assert [a["id"] for a in r.json()] == [checking["id"]]
+
+    def test_reads_use_replica_once_window_passes(self, client, token1, checking, replica):
+        clear_pins()
+        r = client.get("/api/v1/accounts/", headers=auth(token1))
+        assert r.status_code == 200
+        assert r.json() == []
+
+    def test_principal_resolved_from_primary(self, client, token1, checking, replica):
+        clear_pins()
+        principal_cache.clear()
+        r = client.get("/api/v1/accounts/", headers=auth(token1))
+        assert r.status_code == 200
+        assert r.json() == []
+        assert principal_cache.get(decode_token(token1)["sub"]).holder_id is not None
+
+    def test_anonymous_reads_use_replica(self, client, token1, checking, replica):
+        r = client.get("/api/v1/accounts/all")
+        assert r.json() == []
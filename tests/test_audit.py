@@ -0,0 +1,208 @@
+"""Audit logging tests."""
+import gzip
+import json
+import time
+from datetime import date, datetime, timezone
+
+from sqlalchemy import event, func, select, text
+
+from app.core.config import settings
+from app.core.security import decode_token
+from app.db.session import normalize_sqlite_timestamps
+from app.models.audit_log import AuditLog
+from app.models.mixins import utcnow
+from app.models.user import User
+from app.services.audit_retention_service import archive_audit_logs
+from app.services.audit_writer import AuditWriter, audit_writer
+from app.utils.ids import new_id
+from tests.conftest import auth, USER1, USER2
+
+
+def _actions(db):
+    return [a for (a,) in db.execute(select(AuditLog.action).order_by(AuditLog.created_at))]
+
+
+class TestBatchedAuditWriter:
+    def test_login_audit_written_in_background(self, client, token1, db):
+        r = client.post("/api/v1/auth/login", json={"email": USER1[0], "password": USER1[1]})
+        assert r.status_code == 200
+        audit_writer.drain()
+        assert _actions(db) == ["signup", "login"]
+
+    def test_financial_audit_commits_with_business_write(self, client, token1, checking, db):
+        client.post(f"/api/v1/transactions/{checking['id']}/deposit",
+                    json={"amount_cents": 100}, headers=auth(token1))
+        # Durable entries are visible without waiting for the writer.
+        assert "deposit" in _actions(db)
+
+    def test_sync_mode_writes_immediately(self, client, token1, db, monkeypatch):
+        monkeypatch.setattr(settings, "audit_async_enabled", False)
+        client.post("/api/v1/auth/login", json={"email": USER1[0], "password": USER1[1]})
+        assert "login" in _actions(db)
+
+    def test_batches_use_multi_row_inserts(self, client, token1, db):
+        writer = AuditWriter(batch_size=50, flush_interval_seconds=60, max_queue=1000)
+        user_id = db.scalar(select(User.id))
+        statements = []
+        bind = db.get_bind()
+
+        @event.listens_for(bind, "before_cursor_execute")
+        def _capture(conn, cursor, statement, parameters, context, executemany):
+            if statement.startswith("INSERT INTO audit_logs"):
+                statements.append(statement)
+
+        try:
+            for i in range(120):
+                writer.enqueue(bind, {
+                    "id": new_id(), "user_id": user_id, "action": "bulk",
+                    "resource_type": "test", "created_at": utcnow(),
+                })
+            writer.shutdown()
+        finally:
+            event.remove(bind, "before_cursor_execute", _capture)
+
+        assert db.scalar(select(func.count()).where(AuditLog.action == "bulk")) == 120
+        assert len(statements) == 3  # 50 + 50 + 20 rows
+
+    def test_steady_trickle_flushes_on_interval(self, client, token1, db):
+        writer = AuditWriter(batch_size=200, flush_interval_seconds=0.2, max_queue=1000)
+        user_id = db.scalar(select(User.id))
+        bind = db.get_bind()
+        try:
+            # Entries arrive faster than the interval, so the queue never goes idle.
+            for i in range(10):
+                writer.enqueue(bind, {
+                    "id": new_id(), "user_id": user_id, "action": "trickle",
+                    "resource_type": "test", "created_at": utcnow(),
+                })
+                time.sleep(0.1)
+            written = db.scalar(select(func.count()).where(AuditLog.action == "trickle"))
+        finally:
+            writer.shutdown()
+        assert written >= 5
+
+    def test_queue_overflow_falls_back_to_sync_write(self, client, token1, db):
+        writer = AuditWriter(batch_size=50, flush_interval_seconds=60, max_queue=1)
+        user_id = db.scalar(select(User.id))
+        bind = db.get_bind()
+        for i in range(5):
+            writer.enqueue(bind, {
+                "id": new_id(), "user_id": user_id, "action": "overflow",
+                "resource_type": "test", "created_at": utcnow(),
+            })
+        writer.shutdown()
+        assert db.scalar(select(func.count()).where(AuditLog.action == "overflow")) == 5
+
+
+class TestAuditLogQuery:
+    def test_user_sees_only_own_entries(self, client, token1, token2, checking, db):
+        audit_writer.drain()
+        r = client.get("/api/v1/audit-logs/", headers=auth(token1))
+        assert r.status_code == 200
+        user_ids = {e["user_id"] for e in r.json()["items"]}
+        assert user_ids == {decode_token(token1)["sub"]}
+
+    def test_non_admin_cannot_query_other_user(self, client, token1, token2):
+        other = decode_token(token2)["sub"]
+        r = client.get("/api/v1/audit-logs/", params={"user_id": other}, headers=auth(token1))
+        assert r.status_code == 403
+
+    def test_admin_filters_and_pages(self, client, token1, token2, checking, monkeypatch):
+        monkeypatch.setattr(settings, "admin_emails", [USER2[0]])
+        for _ in range(3):
+            client.post(f"/api/v1/transactions/{checking['id']}/deposit",
+                        json={"amount_cents": 100}, headers=auth(token1))
+
+        seen, cursor = [], None
+        while True:
+            params = {"action": "deposit", "resource_type": "transaction", "page_size": 2}
+            if cursor:
+                params["cursor"] = cursor
+            r = client.get("/api/v1/audit-logs/", params=params, headers=auth(token2))
+            assert r.status_code == 200
+            seen.extend(r.json()["items"])
+            cursor = r.json()["next_cursor"]
+            if not cursor:
+                break
+        assert len(seen) == 3
+        assert all(e["action"] == "deposit" for e in seen)
+
+    def test_cursor_walks_second_precision_rows(self, client, token1, db):
+        user_id = decode_token(token1)["sub"]
+        for _ in range(5):
+            db.add(AuditLog(user_id=user_id, action="legacy", resource_type="test",
+                            created_at=datetime(2026, 1, 1, tzinfo=timezone.utc)))
+        db.commit()
+        # As SQLite's CURRENT_TIMESTAMP default stored them before created_at was set client-side.
+        db.execute(text("UPDATE audit_logs SET created_at = '2026-01-01 10:00:00' WHERE action = 'legacy'"))
+        if db.get_bind().dialect.name == "sqlite":
+            db.execute(text("PRAGMA user_version = 0"))
+        db.commit()
+        normalize_sqlite_timestamps(db.get_bind())
+
+        seen, cursor = [], None
+        for _ in range(5):
+            params = {"action": "legacy", "page_size": 2, **({"cursor": cursor} if cursor else {})}
+            data = client.get("/api/v1/audit-logs/", params=params, headers=auth(token1)).json()
+            seen.extend(e["id"] for e in data["items"])
+            cursor = data["next_cursor"]
+            if not cursor:
+                break
+        assert len(seen) == len(set(seen)) == 5
+
+    def test_time_range_filter(self, client, token1):
+        audit_writer.drain()
+        r = client.get("/api/v1/audit-logs/", params={"end": "2000-01-01T00:00:00Z"},
+                       headers=auth(token1))
+        assert r.json()["items"] == []
+
+
+class TestAuditRetention:
+    def _add(self, db, user_id, created_at, action="old"):
+        db.add(AuditLog(user_id=user_id, action=action, resource_type="test",
+                        created_at=created_at))
+
+    def test_closed_months_archived_and_removed(self, client, token1, db, tmp_path):
+        user_id = decode_token(token1)["sub"]
+        self._add(db, user_id, datetime(2026, 1, 15, tzinfo=timezone.utc))
+        self._add(db, user_id, datetime(2026, 1, 31, 23, 59, tzinfo=timezone.utc))
+        self._add(db, user_id, datetime(2026, 3, 2, tzinfo=timezone.utc))
+        self._add(db, user_id, datetime(2026, 5, 1, tzinfo=timezone.utc), action="recent")
+        db.commit()
+
+        paths = archive_audit_logs(db, tmp_path, keep_months=1, today=date(2026, 6, 10))
+
+        assert [p.name for p in paths] == ["audit_logs_2026_01.ndjson.gz",
+                                           "audit_logs_2026_03.ndjson.gz"]
+        with gzip.open(paths[0], "rt") as fh:
+            records = [json.loads(line) for line in fh]
+        assert len(records) == 2 and {r["action"] for r in records} == {"old"}
+        assert db.scalar(select(func.count()).where(AuditLog.action == "old")) == 0
+        assert db.scalar(select(func.count()).where(AuditLog.action == "recent")) == 1
+
+    def test_entries_written_during_export_are_kept(self, client, token1, db, tmp_path, monkeypatch):
+        from app.services import audit_retention_service
+
+        user_id = decode_token(token1)["sub"]
+        self._add(db, user_id, datetime(2026, 1, 15, tzinfo=timezone.utc))
+        db.commit()
+        export = audit_retention_service.iter_ndjson
+        late_written = []
+
+        def export_then_late_write(records):
+            yield from export(records)
+            if not late_written:
+                self._add(db, user_id, datetime(2026, 1, 20, tzinfo=timezone.utc), action="late")
+                db.flush()
+                late_written.append(True)
+
+        monkeypatch.setattr(audit_retention_service, "iter_ndjson", export_then_late_write)
+        paths = archive_audit_logs(db, tmp_path, keep_months=1, today=date(2026, 6, 10))
+
+        with gzip.open(paths[0], "rt") as fh:
+            assert [json.loads(line)["action"] for line in fh] == ["old"]
+        assert db.scalar(select(func.count()).where(AuditLog.action == "old")) == 0
+        assert db.scalar(select(func.count()).where(AuditLog.action == "late")) == 1
+
+    def test_nothing_to_archive(self, client, token1, db, tmp_path):
+        assert archive_audit_logs(db, tmp_path, keep_months=1) == []
@@ -1,6 +1,13 @@
 """Auth endpoint tests."""
 import pytest
-from tests.conftest import auth, signup_and_login, USER1, USER2
+from passlib.context import CryptContext
+from sqlalchemy import select
+
+from app.core.hashing import password_hasher
+from app.core.principal import principal_cache
+from app.core.security import calibrate_bcrypt_rounds, decode_token, password_needs_rehash
+from app.models.user import User
+from tests.conftest import auth, make_holder, signup_and_login, USER1, USER2
 
 
 class TestSignup:
@@ -78,3 +85,74 @@ class TestTokens:
     def test_refresh_with_access_token_rejected(self, client, token1):
         r = client.post("/api/v1/auth/refresh", json={"refresh_token": token1})
         assert r.status_code == 401
+
+
+class TestPrincipalCache:
+    def test_principal_cached_after_first_request(self, client, token1):
+        client.get("/api/v1/auth/me", headers=auth(token1))
+        user_id = decode_token(token1)["sub"]
+        assert principal_cache.get(user_id).id == user_id
+
+    def test_deactivation_invalidates_cached_principal(self, client, token1, db):
+        assert client.get("/api/v1/auth/me", headers=auth(token1)).status_code == 200
+        user = db.get(User, decode_token(token1)["sub"])
+        user.is_active = False
+        db.commit()
+        r = client.get("/api/v1/auth/me", headers=auth(token1))
+        assert r.status_code == 401
+
+    def test_holder_creation_refreshes_principal(self, client, token1):
+        r = client.get("/api/v1/account-holders/me", headers=auth(token1))
+        assert r.status_code == 404
+        make_holder(client, token1)
+        user_id = decode_token(token1)["sub"]
+        assert principal_cache.get(user_id) is None
+        r = client.get("/api/v1/account-holders/me", headers=auth(token1))
+        assert r.status_code == 200
+        assert principal_cache.get(user_id).holder_id == r.json()["id"]
+
+
+class TestPasswordHashing:
+    def test_hashing_runs_on_dedicated_pool(self, client, token1):
+        before = password_hasher.stats()["completed"]
+        r = client.post("/api/v1/auth/login", json={"email": USER1[0], "password": USER1[1]})
+        assert r.status_code == 200
+        stats = password_hasher.stats()
+        assert stats["completed"] == before + 1
+        assert stats["hash_seconds_total"] > 0
+        assert stats["queue_depth"] == stats["in_flight"] == 0
+
+    def test_saturated_hasher_returns_429(self, client, token1, monkeypatch):
+        monkeypatch.setattr(password_hasher, "capacity", 0)
+        r = client.post("/api/v1/auth/login", json={"email": USER1[0], "password": USER1[1]})
+        assert r.status_code == 429
+        assert r.headers["retry-after"] == "1"
+
+
+class TestBcryptCost:
+    def test_calibration_respects_bounds(self):
+        assert calibrate_bcrypt_rounds(target_ms=0, min_rounds=4, max_rounds=12) == 4
+        assert calibrate_bcrypt_rounds(target_ms=10**9, min_rounds=4, max_rounds=6) == 6
+
+    def test_weak_hash_upgraded_on_login(self, client, token1, db):
+        user = db.scalar(select(User).where(User.email == USER1[0]))
+        weak = CryptContext(schemes=["bcrypt"], bcrypt__rounds=4).hash(USER1[1])
+        user.hashed_password = weak
+        db.commit()
+        assert password_needs_rehash(weak)
+
+        r = client.post("/api/v1/auth/login", json={"email": USER1[0], "password": USER1[1]})
+        assert r.status_code == 200
+
+        db.expire_all()
+        upgraded = db.scalar(select(User.hashed_password).where(User.email == USER1[0]))
+        assert upgraded != weak
+        assert not password_needs_rehash(upgraded)
+        r = client.post("/api/v1/auth/login", json={"email": USER1[0], "password": USER1[1]})
+        assert r.status_code == 200
+
+    def test_current_cost_hash_left_alone(self, client, token1, db):
+        before = db.scalar(select(User.hashed_password).where(User.email == USER1[0]))
+        client.post("/api/v1/auth/login", json={"email": USER1[0], "password": USER1[1]})
+        db.expire_all()
+        assert db.scalar(select(User.hashed_password).where(User.email == USER1[0])) == before
@@ -0,0 +1,130 @@
+"""Per-backend engine profiles and row id storage."""
+import asyncio
+import uuid
+
+from sqlalchemy import text
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.db.base import Base
+from app.db.checkpoint import WalCheckpointer
+from app.db.session import (
+    _engine_options,
+    async_database_url,
+    create_async_db_engine,
+    create_db_engine,
+    sqlite_pragmas,
+)
+from app.models import User
+from app.utils.ids import new_id, uuid7
+
+
+class TestEngineProfiles:
+    def test_sqlite_has_no_server_pool_options(self):
+        options = _engine_options("sqlite:///./x.db")
+        assert options == {"connect_args": {"check_same_thread": False}}
+
+    def test_postgres_gets_pool_and_statement_timeout(self):
+        options = _engine_options("postgresql+psycopg2://u:p@db/banking")
+        assert options["pool_size"] == settings.db_pool_size
+        assert options["max_overflow"] == settings.db_max_overflow
+        assert options["pool_pre_ping"] is settings.db_pool_pre_ping
+        assert f"statement_timeout={settings.db_statement_timeout_ms}" in options["connect_args"]["options"]
+
+    def test_sqlite_engine_applies_pragmas(self, tmp_path):
+        engine = create_db_engine(f"sqlite:///{tmp_path / 'p.db'}")
+        with engine.connect() as conn:
+            assert conn.execute(text("PRAGMA foreign_keys")).scalar() == 1
+            assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+            # NORMAL == 1
+            assert conn.execute(text("PRAGMA synchronous")).scalar() == 1
+            assert conn.execute(text("PRAGMA busy_timeout")).scalar() == settings.sqlite_busy_timeout_ms
+            assert conn.execute(text("PRAGMA cache_size")).scalar() == -settings.sqlite_cache_size_kib
+        engine.dispose()
+
+    def test_explicit_pragmas_replace_profile(self, tmp_path):
+        engine = create_db_engine(f"sqlite:///{tmp_path / 'p.db'}", pragmas={"synchronous": "FULL"})
+        with engine.connect() as conn:
+            assert conn.execute(text("PRAGMA synchronous")).scalar() == 2
+            assert conn.execute(text("PRAGMA journal_mode")).scalar() == "delete"
+        engine.dispose()
+
+    def test_profile_puts_busy_timeout_before_journal_mode(self):
+        names = list(sqlite_pragmas())
+        assert names.index("busy_timeout") < names.index("journal_mode")
+
+
+class TestAsyncEngine:
+    def test_async_driver_swapped_in(self):
+        assert async_database_url("sqlite:///./x.db") == "sqlite+aiosqlite:///./x.db"
+        assert (
+            async_database_url("postgresql+psycopg2://u:p@db/banking")
+            == "postgresql+asyncpg://u:p@db/banking"
+        )
+
+    def test_async_sqlite_engine_applies_pragmas(self, tmp_path):
+        engine = create_async_db_engine(f"sqlite:///{tmp_path / 'a.db'}")
+
+        async def read_pragmas():
+            async with engine.connect() as conn:
+                fk = (await conn.execute(text("PRAGMA foreign_keys"))).scalar()
+                mode = (await conn.execute(text("PRAGMA journal_mode"))).scalar()
+            await engine.dispose()
+            return fk, mode
+
+        assert asyncio.run(read_pragmas()) == (1, "wal")
+
+
+class TestWalCheckpointer:
+    def test_checkpoint_flushes_wal(self, tmp_path):
+        engine = create_db_engine(f"sqlite:///{tmp_path / 'c.db'}")
+        with engine.begin() as conn:
+            conn.execute(text("CREATE TABLE t (x INTEGER)"))
+            conn.execute(text("INSERT INTO t VALUES (1)"))
+        busy, log, checkpointed = WalCheckpointer(engine, 60, "TRUNCATE").checkpoint()
+        assert busy == 0
+        assert checkpointed == log
+        assert (tmp_path / "c.db-wal").stat().st_size == 0
+        engine.dispose()
+
+    def test_start_and_shutdown(self, tmp_path):
+        engine = create_db_engine(f"sqlite:///{tmp_path / 'c.db'}")
+        checkpointer = WalCheckpointer(engine, 0.01)
+        checkpointer.start()
+        checkpointer.start()
+        checkpointer.shutdown()
+        assert checkpointer._thread is None
+        engine.dispose()
+
+
+class TestRowIds:
+    def test_uuid7_is_canonical_and_time_ordered(self):
+        ids = [uuid7() for _ in range(1_000)]
+        assert all(i.version == 7 and i.variant == uuid.RFC_4122 for i in ids)
+        assert len(str(ids[0])) == 36
+        # The leading 48 bits are Unix milliseconds.
+        assert [i.int >> 80 for i in ids] == sorted(i.int >> 80 for i in ids)
+
+    def test_strategy_setting(self, monkeypatch):
+        assert uuid.UUID(new_id()).version == 7
+        monkeypatch.setattr(settings, "id_strategy", "uuid4")
+        assert uuid.UUID(new_id()).version == 4
+
+    def test_binary_storage_keeps_string_ids(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(settings, "id_storage", "binary")
+        engine = create_db_engine(f"sqlite:///{tmp_path / 'ids.db'}")
+        Base.metadata.create_all(bind=engine, tables=[User.__table__])
+        Session = sessionmaker(bind=engine)
+        with Session() as db:
+            user = User(email="ids@example.com", hashed_password="x")
+            db.add(user)
+            db.commit()
+            user_id = user.id
+        with engine.connect() as conn:
+            stored = conn.execute(text("SELECT typeof(id), length(id) FROM users")).one()
+        assert tuple(stored) == ("blob", 16)
+        with Session() as db:
+            assert db.get(User, user_id).email == "ids@example.com"
+            # Anything that is not a UUID simply matches nothing.
+            assert db.get(User, "not-a-uuid") is None
+        engine.dispose()
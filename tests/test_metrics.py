@@ -0,0 +1,119 @@
+"""Prometheus /metrics endpoint."""
+import os
+import subprocess
+import sys
+import uuid
+from pathlib import Path
+
+from prometheus_client import REGISTRY
+
+from app.core.hashing import password_hasher
+from tests.conftest import USER1, auth
+
+
+def _sample(name: str, **labels) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+class TestMetricsEndpoint:
+    def test_exposes_preallocated_route_histograms(self, client):
+        r = client.get("/metrics")
+        assert r.status_code == 200
+        assert r.headers["content-type"].startswith("text/plain")
+        # Present before any request has hit the route.
+        assert 'http_request_duration_seconds_count{method="POST",route="/api/v1/transfers/"}' in r.text
+        assert "http_requests_in_progress" in r.text
+
+    def test_requests_are_labelled_by_route_template(self, client, token1, checking):
+        labels = {"method": "GET", "route": "/api/v1/accounts/{account_id}"}
+        before = _sample("http_request_duration_seconds_count", **labels)
+        client.get(f"/api/v1/accounts/{checking['id']}", headers=auth(token1))
+        assert _sample("http_request_duration_seconds_count", **labels) == before + 1
+        assert _sample("http_requests_total", status="200", **labels) >= 1
+
+    def test_unknown_paths_share_one_label(self, client):
+        before = _sample("http_request_duration_seconds_count", method="GET", route="unmatched")
+        client.get(f"/no-such-page/{uuid.uuid4()}")
+        assert _sample("http_request_duration_seconds_count", method="GET", route="unmatched") == before + 1
+
+    def test_database_timings(self, client, token1, checking):
+        commits = _sample("db_commit_duration_seconds_count")
+        checkouts = _sample("db_pool_checkout_wait_seconds_count")
+        client.post(f"/api/v1/transactions/{checking['id']}/deposit",
+                    json={"amount_cents": 100}, headers=auth(token1))
+        assert _sample("db_commit_duration_seconds_count") > commits
+        assert _sample("db_pool_checkout_wait_seconds_count") > checkouts
+
+
+class TestBusinessCounters:
+    def test_money_movements_are_counted(self, client, token1, checking, savings2):
+        deposits = _sample("bank_deposits_total")
+        withdrawals = _sample("bank_withdrawals_total")
+        refused = _sample("bank_insufficient_funds_total")
+        completed = _sample("bank_transfers_total", status="completed")
+
+        client.post(f"/api/v1/transactions/{checking['id']}/deposit",
+                    json={"amount_cents": 100}, headers=auth(token1))
+        client.post(f"/api/v1/transactions/{checking['id']}/withdraw",
+                    json={"amount_cents": 100}, headers=auth(token1))
+        r = client.post(f"/api/v1/transactions/{checking['id']}/withdraw",
+                        json={"amount_cents": 10_000_000}, headers=auth(token1))
+        assert r.status_code == 400
+        client.post("/api/v1/transfers/", json={
+            "idempotency_key": str(uuid.uuid4()),
+            "from_account_id": checking["id"],
+            "to_account_id": savings2["id"],
+            "amount_cents": 100,
+        }, headers=auth(token1))
+
+        assert _sample("bank_deposits_total") == deposits + 1
+        assert _sample("bank_withdrawals_total") == withdrawals + 1
+        assert _sample("bank_insufficient_funds_total") == refused + 1
+        assert _sample("bank_transfers_total", status="completed") == completed + 1
+
+    def test_refusals_in_a_rolled_back_batch_are_not_counted(self, client, token1, checking):
+        operations = [
+            {"account_id": checking["id"], "type": "deposit", "amount_cents": 100},
+            {"account_id": checking["id"], "type": "withdraw", "amount_cents": 10_000_000},
+        ]
+        refused = _sample("bank_insufficient_funds_total")
+        r = client.post("/api/v1/transactions/batch", json={"operations": operations, "mode": "atomic"},
+                        headers=auth(token1))
+        assert r.status_code == 400
+        assert _sample("bank_insufficient_funds_total") == refused
+
+        r = client.post("/api/v1/transactions/batch", json={"operations": operations, "mode": "best_effort"},
+                        headers=auth(token1))
+        assert r.json()["failed"] == 1
+        assert _sample("bank_insufficient_funds_total") == refused + 1
+
+
+class TestPasswordHashMetrics:
+    def test_hash_timings_and_rejections(self, client, token1, monkeypatch):
+        hashes = _sample("password_hash_duration_seconds_count")
+        waits = _sample("password_hash_wait_seconds_count")
+        rejected = _sample("password_hash_rejected_total")
+        login = {"email": USER1[0], "password": USER1[1]}
+
+        assert client.post("/api/v1/auth/login", json=login).status_code == 200
+        monkeypatch.setattr(password_hasher, "capacity", 0)
+        assert client.post("/api/v1/auth/login", json=login).status_code == 429
+
+        assert _sample("password_hash_duration_seconds_count") == hashes + 1
+        assert _sample("password_hash_wait_seconds_count") == waits + 1
+        assert _sample("password_hash_rejected_total") == rejected + 1
+        assert _sample("password_hash_queue_depth") == _sample("password_hash_in_progress") == 0
+
+
+class TestMultipleWorkers:
+    def test_scrape_aggregates_every_worker(self, tmp_path):
+        env = {**os.environ, "PROMETHEUS_MULTIPROC_DIR": str(tmp_path)}
+        root = Path(__file__).resolve().parents[1]
+        worker = "from app.core.metrics import DEPOSITS; DEPOSITS.inc(2)"
+        for _ in range(2):
+            subprocess.run([sys.executable, "-c", worker], env=env, cwd=root, check=True)
+        scrape = "from app.core.metrics import render_metrics; print(render_metrics()[0].decode())"
+        out = subprocess.run(
+            [sys.executable, "-c", scrape], env=env, cwd=root, check=True, capture_output=True, text=True
+        ).stdout
+        assert "bank_deposits_total 4.0" in out
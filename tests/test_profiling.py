@@ -0,0 +1,137 @@
+"""Stack sampler, admin profile endpoint and the X-Profile request header."""
+import asyncio
+import sys
+import threading
+import time
+
+import pytest
+
+from app.core import middleware
+from app.core.config import settings
+from app.core.profiling import StackSampler, profile_lock
+from app.services.transaction_service import apply_deposit
+from tests.conftest import USER2, auth
+
+
+def _spin(stop: threading.Event) -> None:
+    while not stop.is_set():
+        sum(range(1000))
+
+
+@pytest.fixture
+def spinning():
+    stop = threading.Event()
+    thread = threading.Thread(target=_spin, args=(stop,), name="spinner")
+    thread.start()
+    yield
+    stop.set()
+    thread.join()
+
+
+class TestStackSampler:
+    def test_collapsed_stacks_root_at_thread_name(self, spinning):
+        out = StackSampler(interval=0.001, app_only=False).run(0.05)
+        lines = [line for line in out.splitlines() if "_spin" in line]
+        assert lines
+        stack, count = lines[0].rsplit(" ", 1)
+        assert stack.startswith("spinner;")
+        assert "_spin (tests/test_profiling.py:" in stack
+        assert int(count) >= 1
+
+    def test_app_only_drops_stacks_outside_the_app(self, spinning):
+        out = StackSampler(interval=0.001).run(0.05)
+        assert "_spin" not in out
+
+    def test_background_sampling(self):
+        switch_interval = sys.getswitchinterval()
+        sampler = StackSampler(interval=0.001, app_only=False).start()
+        assert sys.getswitchinterval() < switch_interval
+        time.sleep(0.02)
+        out = sampler.stop()
+        assert sys.getswitchinterval() == switch_interval
+        assert sampler.samples >= 1
+        assert "stack-sampler" not in out
+        assert "test_background_sampling" in out
+
+    def test_labels_use_qualified_names(self):
+        sampler = StackSampler()
+        assert sampler._label(apply_deposit.__code__).startswith(
+            "apply_deposit (app/services/transaction_service.py:"
+        )
+
+
+class TestProfileEndpoint:
+    def test_requires_admin(self, client, token1):
+        r = client.get("/api/v1/admin/profile", params={"seconds": 0.01}, headers=auth(token1))
+        assert r.status_code == 403
+
+    def test_returns_collapsed_stacks(self, client, token2, monkeypatch):
+        monkeypatch.setattr(settings, "admin_emails", [USER2[0]])
+        r = client.get("/api/v1/admin/profile", params={"seconds": 0.05, "app_only": False},
+                       headers=auth(token2))
+        assert r.status_code == 200
+        assert r.headers["content-type"].startswith("text/plain")
+        assert all(line.rsplit(" ", 1)[1].isdigit() for line in r.text.splitlines())
+        # The handler's own thread is not sampled.
+        assert "profile_worker" not in r.text
+
+    def test_duration_is_capped(self, client, token2, monkeypatch):
+        monkeypatch.setattr(settings, "admin_emails", [USER2[0]])
+        monkeypatch.setattr(settings, "profiling_max_seconds", 1)
+        r = client.get("/api/v1/admin/profile", params={"seconds": 5}, headers=auth(token2))
+        assert r.status_code == 422
+
+    def test_one_profile_at_a_time(self, client, token2, monkeypatch):
+        monkeypatch.setattr(settings, "admin_emails", [USER2[0]])
+        with profile_lock:
+            r = client.get("/api/v1/admin/profile", params={"seconds": 0.01}, headers=auth(token2))
+        assert r.status_code == 409
+
+
+class TestProfileHeader:
+    @pytest.fixture(autouse=True)
+    def _secret(self, monkeypatch, tmp_path):
+        monkeypatch.setattr(settings, "profiling_header_secret", "s3cret")
+        monkeypatch.setattr(settings, "profile_dir", str(tmp_path))
+
+    def test_profiled_request_is_saved(self, client, token1, token2, checking, monkeypatch, tmp_path):
+        r = client.get(f"/api/v1/statements/{checking['id']}",
+                       params={"start": "2000-01-01T00:00:00Z", "end": "2100-01-01T00:00:00Z"},
+                       headers={**auth(token1), "X-Profile": "s3cret"})
+        assert r.status_code == 200
+        profile_id = r.headers["X-Profile-Id"]
+
+        monkeypatch.setattr(settings, "admin_emails", [USER2[0]])
+        r = client.get(f"/api/v1/admin/profiles/{profile_id}", headers=auth(token2))
+        assert r.status_code == 200
+        assert r.headers["content-type"].startswith("text/plain")
+        assert (tmp_path / f"{profile_id}.folded").exists()
+
+    def test_profile_is_saved_off_the_event_loop(self, client, token1, monkeypatch):
+        save_profile = middleware.save_profile
+        on_event_loop = []
+
+        def _save(*args):
+            try:
+                asyncio.get_running_loop()
+                on_event_loop.append(True)
+            except RuntimeError:
+                on_event_loop.append(False)
+            return save_profile(*args)
+
+        monkeypatch.setattr(middleware, "save_profile", _save)
+        r = client.get("/api/v1/auth/me", headers={**auth(token1), "X-Profile": "s3cret"})
+        assert r.status_code == 200
+        assert on_event_loop == [False]
+
+    def test_wrong_secret_is_ignored(self, client, token1, tmp_path):
+        r = client.get("/api/v1/auth/me", headers={**auth(token1), "X-Profile": "guess"})
+        assert r.status_code == 200
+        assert "X-Profile-Id" not in r.headers
+        assert not list(tmp_path.iterdir())
+
+    def test_unknown_profile(self, client, token2, monkeypatch):
+        monkeypatch.setattr(settings, "admin_emails", [USER2[0]])
+        for profile_id in ("00000000-0000-0000-0000-000000000000", "..%2Fsecrets"):
+            r = client.get(f"/api/v1/admin/profiles/{profile_id}", headers=auth(token2))
+            assert r.status_code == 404
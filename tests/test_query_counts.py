@@ -0,0 +1,195 @@
+"""Statement budgets for write endpoints and the per-request query accounting middleware."""
+import logging
+import re
+import uuid
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.middleware import QueryStatsMiddleware
+from app.db.query_stats import QueryBudgetExceededError, query_budget
+from tests.conftest import USER1, auth
+from tests.test_cards import _issue
+
+
+@pytest.fixture(autouse=True)
+def _sync_audit(monkeypatch):
+    # Background audit batches would land in the capture at random points.
+    monkeypatch.setattr(settings, "audit_async_enabled", False)
+
+
+def _run(queries, call, status_code):
+    with queries() as statements:
+        r = call()
+    assert r.status_code == status_code, r.text
+    after_commit = statements[statements.index("COMMIT"):]
+    assert not [s for s in after_commit if s.lstrip().upper().startswith("SELECT")], statements
+    return statements
+
+
+class TestAuthWrites:
+    def test_signup(self, client, queries):
+        statements = _run(queries, lambda: client.post(
+            "/api/v1/auth/signup", json={"email": "new@example.com", "password": "NewPass1!"}), 201)
+        # duplicate-email check, INSERT user, COMMIT, signup audit, COMMIT
+        assert len(statements) == 5, statements
+
+    def test_login(self, client, token1, queries):
+        statements = _run(queries, lambda: client.post(
+            "/api/v1/auth/login", json={"email": USER1[0], "password": USER1[1]}), 200)
+        assert len(statements) == 3, statements
+
+
+class TestHolderWrites:
+    def test_create_holder(self, client, token1, queries):
+        statements = _run(queries, lambda: client.post("/api/v1/account-holders/", json={
+            "first_name": "Alice",
+            "last_name": "Smith",
+            "date_of_birth": "1990-01-15",
+            "phone": "+14155550100",
+            "address": "1 Market St, San Francisco, CA 94105",
+            "ssn_last_four": "1234",
+        }, headers=auth(token1)), 201)
+        # The first authenticated call after signup loads the principal.
+        assert len(statements) == 6, statements
+
+    def test_update_holder(self, client, token1, holder1, queries):
+        statements = _run(queries, lambda: client.put(
+            "/api/v1/account-holders/me", json={"phone": "+14155550111"}, headers=auth(token1)), 200)
+        # Creating the holder invalidated the cached principal, so it is loaded again.
+        assert len(statements) == 5, statements
+
+
+class TestAccountWrites:
+    def test_create_account(self, client, token1, holder1, queries):
+        statements = _run(queries, lambda: client.post(
+            "/api/v1/accounts/", json={"account_type": "checking", "initial_deposit_cents": 1000},
+            headers=auth(token1)), 201)
+        assert len(statements) == 8, statements
+
+    def test_update_status(self, client, token1, checking, queries):
+        statements = _run(queries, lambda: client.patch(
+            f"/api/v1/accounts/{checking['id']}/status", json={"status": "frozen"},
+            headers=auth(token1)), 200)
+        assert len(statements) == 4, statements
+
+    def test_account_deposit(self, client, token1, checking, queries):
+        statements = _run(queries, lambda: client.post(
+            f"/api/v1/accounts/{checking['id']}/deposit", json={"amount_cents": 100},
+            headers=auth(token1)), 200)
+        assert len(statements) == 6, statements
+
+
+class TestMoneyMovementWrites:
+    def test_deposit(self, client, token1, checking, queries):
+        statements = _run(queries, lambda: client.post(
+            f"/api/v1/transactions/{checking['id']}/deposit", json={"amount_cents": 100},
+            headers=auth(token1)), 200)
+        assert len(statements) == 6, statements
+
+    def test_withdraw(self, client, token1, checking, queries):
+        statements = _run(queries, lambda: client.post(
+            f"/api/v1/transactions/{checking['id']}/withdraw", json={"amount_cents": 100},
+            headers=auth(token1)), 200)
+        assert len(statements) == 6, statements
+
+    def test_transfer(self, client, token1, checking, savings2, queries):
+        statements = _run(queries, lambda: client.post("/api/v1/transfers/", json={
+            "idempotency_key": str(uuid.uuid4()),
+            "from_account_id": checking["id"],
+            "to_account_id": savings2["id"],
+            "amount_cents": 100,
+        }, headers=auth(token1)), 201)
+        assert len(statements) == 14, statements
+        # Both accounts are locked in id order before either balance UPDATE.
+        lock = next(i for i, s in enumerate(statements) if "ORDER BY accounts.id" in s)
+        first_update = next(i for i, s in enumerate(statements) if s.startswith("UPDATE accounts"))
+        assert lock < first_update, statements
+
+    @pytest.mark.parametrize("size", [1, 50])
+    def test_batch_is_constant_in_size(self, client, token1, checking, queries, size):
+        operations = [{"account_id": checking["id"], "type": "deposit", "amount_cents": 1}] * size
+        statements = _run(queries, lambda: client.post(
+            "/api/v1/transactions/batch", json={"operations": operations}, headers=auth(token1)), 200)
+        # ownership, lock, balances, transactions, daily_balances, audit, COMMIT
+        assert len(statements) == 7, statements
+
+
+class TestCardWrites:
+    def test_issue_card(self, client, token1, checking, queries):
+        statements = _run(queries, lambda: _issue(client, token1, checking["id"]), 201)
+        assert len(statements) == 5, statements
+
+    def test_update_card_status(self, client, token1, checking, queries):
+        card = _issue(client, token1, checking["id"]).json()
+        statements = _run(queries, lambda: client.patch(
+            f"/api/v1/cards/{card['id']}/status", json={"status": "frozen"}, headers=auth(token1)), 200)
+        assert len(statements) == 4, statements
+
+    def test_update_card_limit(self, client, token1, checking, queries):
+        card = _issue(client, token1, checking["id"]).json()
+        statements = _run(queries, lambda: client.patch(
+            f"/api/v1/cards/{card['id']}/limit", json={"daily_limit": 750.0}, headers=auth(token1)), 200)
+        assert len(statements) == 4, statements
+
+    def test_delete_card(self, client, token1, checking, queries):
+        card = _issue(client, token1, checking["id"]).json()
+        statements = _run(queries, lambda: client.delete(
+            f"/api/v1/cards/{card['id']}", headers=auth(token1)), 204)
+        assert len(statements) == 4, statements
+
+
+def _server_timing_queries(response) -> int:
+    match = re.search(r'db;dur=[\d.]+;desc="(\d+) queries"', response.headers["server-timing"])
+    return int(match.group(1))
+
+
+def _app_running(db, statements: int, budget: int) -> FastAPI:
+    mini = FastAPI()
+    mini.add_middleware(QueryStatsMiddleware)
+
+    @mini.get("/run", dependencies=[Depends(query_budget(budget))])
+    def _run_statements():
+        for _ in range(statements):
+            db.execute(text("SELECT 1"))
+        return {}
+
+    return mini
+
+
+class TestQueryStatsMiddleware:
+    def test_server_timing_reports_request_queries(self, client, token1, checking):
+        r = client.get(f"/api/v1/accounts/{checking['id']}", headers=auth(token1))
+        assert 1 <= _server_timing_queries(r) <= 3
+        assert "app;dur=" in r.headers["server-timing"]
+
+    def test_queued_writes_count_towards_their_request(self, client, token1, checking, monkeypatch):
+        monkeypatch.setattr(settings, "write_queue_enabled", True)
+        r = client.post(f"/api/v1/transactions/{checking['id']}/deposit",
+                        json={"amount_cents": 100}, headers=auth(token1))
+        # Account lookup on the request thread plus the ledger writes on the writer thread.
+        assert _server_timing_queries(r) >= 4
+
+    def test_strict_mode_fails_over_budget(self, db):
+        with TestClient(_app_running(db, statements=3, budget=2)) as mini:
+            with pytest.raises(QueryBudgetExceededError, match="ran 3 SQL statements, budget is 2"):
+                mini.get("/run")
+
+    def test_strict_mode_fails_before_the_response_is_sent(self, db):
+        with TestClient(_app_running(db, statements=3, budget=2), raise_server_exceptions=False) as mini:
+            assert mini.get("/run").status_code == 500
+
+    def test_over_budget_is_logged_when_not_strict(self, db, monkeypatch, caplog):
+        monkeypatch.setattr(settings, "query_budget_strict", False)
+        with TestClient(_app_running(db, statements=3, budget=2)) as mini, caplog.at_level(logging.WARNING):
+            assert mini.get("/run").status_code == 200
+        assert "budget is 2" in caplog.text
+
+    def test_repeated_statement_is_flagged_as_n_plus_one(self, db, monkeypatch, caplog):
+        monkeypatch.setattr(settings, "n_plus_one_threshold", 5)
+        with TestClient(_app_running(db, statements=5, budget=10)) as mini, caplog.at_level(logging.WARNING):
+            mini.get("/run")
+        assert "Possible N+1 in GET /run: ran 5 times: SELECT 1" in caplog.text
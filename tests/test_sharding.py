@@ -0,0 +1,194 @@
+"""Holder-based sharding: placement, routing and cross-shard transfers."""
+import uuid
+
+import pytest
+from sqlalchemy import select, update
+
+from app.db.sharding import shard_router
+from app.models.account import Account
+from app.models.enums import TransferStatus
+from app.models.transaction import Transaction
+from app.models.transfer import Transfer
+from app.services.audit_writer import audit_writer
+from app.services.transfer_service import open_cross_shard_transfer, settle_transfer
+from tests.conftest import auth, make_account
+
+
+@pytest.fixture()
+def placement(client, tmp_path, monkeypatch):
+    """Two SQLite shards; maps holder id -> shard index, hashing any holder not listed."""
+    shard_router.configure([f"sqlite:///{tmp_path}/shard{i}.db" for i in range(2)])
+    shard_router.init_schema()
+    mapping: dict[str, int] = {}
+    index_for = shard_router.index_for
+    monkeypatch.setattr(shard_router, "index_for", lambda holder_id: mapping.get(holder_id, index_for(holder_id)))
+    yield mapping
+    audit_writer.drain()
+    for engine in shard_router.async_engines:
+        client.portal.call(engine.dispose)
+    for engine in shard_router.engines:
+        engine.dispose()
+    shard_router.configure([])
+
+
+def _shard_rows(index, model, *where):
+    with shard_router.session(index) as db:
+        return db.scalars(select(model).where(*where)).all()
+
+
+def _transfer(client, token, from_id, to_id, amount_cents, key=None):
+    return client.post("/api/v1/transfers/", json={
+        "idempotency_key": key or str(uuid.uuid4()),
+        "from_account_id": from_id,
+        "to_account_id": to_id,
+        "amount_cents": amount_cents,
+    }, headers=auth(token))
+
+
+@pytest.fixture()
+def split(placement, client, token1, token2, holder1, holder2):
+    """holder1 on shard 0 and holder2 on shard 1, each with a funded account."""
+    placement[holder1["id"]] = 0
+    placement[holder2["id"]] = 1
+    return (
+        make_account(client, token1, "checking", initial_deposit_cents=100_000),
+        make_account(client, token2, "savings", initial_deposit_cents=50_000),
+    )
+
+
+class TestPlacementAndRouting:
+    def test_accounts_live_on_the_holders_shard(self, client, split, db):
+        checking, savings = split
+        assert [a.id for a in _shard_rows(0, Account)] == [checking["id"]]
+        assert [a.id for a in _shard_rows(1, Account)] == [savings["id"]]
+        assert db.scalar(select(Account.id)) is None
+
+    def test_requests_are_served_from_the_callers_shard(self, client, token1, split):
+        checking, _ = split
+        r = client.post(f"/api/v1/transactions/{checking['id']}/deposit",
+                        json={"amount_cents": 2500}, headers=auth(token1))
+        assert r.status_code == 200, r.text
+
+        account = client.get(f"/api/v1/accounts/{checking['id']}", headers=auth(token1)).json()
+        assert account["balance_cents"] == 102_500
+        txs = client.get(f"/api/v1/transactions/{checking['id']}", headers=auth(token1)).json()
+        assert txs["total"] == 2
+        assert [a["id"] for a in client.get("/api/v1/accounts/", headers=auth(token1)).json()] == [checking["id"]]
+
+    def test_other_holders_account_is_not_found(self, client, token1, split):
+        _, savings = split
+        r = client.get(f"/api/v1/accounts/{savings['id']}", headers=auth(token1))
+        assert r.status_code == 404
+
+    def test_shards_issue_disjoint_account_numbers(self, client, token1, token2, split):
+        for _ in range(3):
+            make_account(client, token1, "savings")
+            make_account(client, token2, "checking")
+        for index in shard_router.indexes:
+            numbers = [a.account_number for a in _shard_rows(index, Account)]
+            assert len(numbers) == 4
+            assert all(int(number) % 2 == index for number in numbers)
+
+    def test_audit_trail_merges_primary_and_shard(self, client, token1, split):
+        checking, _ = split
+        client.post(f"/api/v1/transactions/{checking['id']}/deposit",
+                    json={"amount_cents": 100}, headers=auth(token1))
+        audit_writer.drain()
+        r = client.get("/api/v1/audit-logs/?page_size=2", headers=auth(token1))
+        first = r.json()
+        assert [e["action"] for e in first["items"]] == ["deposit", "create_account"]
+        rest = client.get(f"/api/v1/audit-logs/?page_size=50&cursor={first['next_cursor']}",
+                          headers=auth(token1)).json()
+        actions = [e["action"] for e in rest["items"]]
+        assert actions == ["create_account_holder", "signup"]
+        assert rest["next_cursor"] is None
+
+
+class TestCrossShardTransfer:
+    def test_transfer_completes_across_shards(self, client, token1, token2, split):
+        checking, savings = split
+        r = _transfer(client, token1, checking["id"], savings["id"], 20_000)
+        assert r.status_code == 201, r.text
+        assert r.json()["status"] == "completed"
+
+        sender = client.get(f"/api/v1/accounts/{checking['id']}", headers=auth(token1)).json()
+        receiver = client.get(f"/api/v1/accounts/{savings['id']}", headers=auth(token2)).json()
+        assert sender["balance_cents"] == 80_000
+        assert receiver["balance_cents"] == 70_000
+        # The transfer row stays with the source; the credit with the destination.
+        assert len(_shard_rows(0, Transfer)) == 1
+        assert _shard_rows(1, Transfer) == []
+        assert len(_shard_rows(1, Transaction, Transaction.reference_id == r.json()["id"])) == 1
+
+    def test_replay_does_not_debit_twice(self, client, token1, split):
+        checking, savings = split
+        key = str(uuid.uuid4())
+        r1 = _transfer(client, token1, checking["id"], savings["id"], 10_000, key)
+        r2 = _transfer(client, token1, checking["id"], savings["id"], 10_000, key)
+        assert r1.json()["id"] == r2.json()["id"]
+        sender = client.get(f"/api/v1/accounts/{checking['id']}", headers=auth(token1)).json()
+        assert sender["balance_cents"] == 90_000
+
+    def test_refused_credit_reverses_the_debit(self, client, token1, split):
+        checking, savings = split
+        # The destination is frozen after the debit commits but before settlement.
+        with shard_router.session(0) as source, shard_router.session(1) as destination:
+            transfer = open_cross_shard_transfer(
+                source,
+                source.get(Account, checking["id"]),
+                destination.get(Account, savings["id"]),
+                idempotency_key=str(uuid.uuid4()),
+                amount_cents=10_000,
+                description=None,
+            )
+            source.commit()
+            destination.execute(update(Account).where(Account.id == savings["id"]).values(status="frozen"))
+            destination.commit()
+            transfer = settle_transfer(source, destination, transfer.id)
+
+        assert transfer.status == TransferStatus.failed
+        sender = client.get(f"/api/v1/accounts/{checking['id']}", headers=auth(token1)).json()
+        assert sender["balance_cents"] == 100_000
+
+    def test_reversal_reaches_a_frozen_source(self, client, token1, split):
+        checking, savings = split
+        with shard_router.session(0) as source, shard_router.session(1) as destination:
+            transfer = open_cross_shard_transfer(
+                source,
+                source.get(Account, checking["id"]),
+                destination.get(Account, savings["id"]),
+                idempotency_key=str(uuid.uuid4()),
+                amount_cents=10_000,
+                description=None,
+            )
+            source.execute(update(Account).where(Account.id == checking["id"]).values(status="frozen"))
+            source.commit()
+            destination.execute(update(Account).where(Account.id == savings["id"]).values(status="closed"))
+            destination.commit()
+            transfer = settle_transfer(source, destination, transfer.id)
+
+        assert transfer.status == TransferStatus.failed
+        sender = client.get(f"/api/v1/accounts/{checking['id']}", headers=auth(token1)).json()
+        assert sender["balance_cents"] == 100_000
+
+    def test_settling_again_does_not_credit_twice(self, client, token1, split):
+        checking, savings = split
+        transfer_id = _transfer(client, token1, checking["id"], savings["id"], 5_000).json()["id"]
+        # As if the settler crashed after crediting but before completing the transfer.
+        with shard_router.session(0) as db:
+            db.execute(update(Transfer).values(status=TransferStatus.pending))
+            db.commit()
+
+        with shard_router.session(0) as source, shard_router.session(1) as destination:
+            transfer = settle_transfer(source, destination, transfer_id)
+        assert transfer.status == TransferStatus.completed
+        with shard_router.session(1) as db:
+            assert db.get(Account, savings["id"]).balance_cents == 55_000
+
+    def test_same_shard_transfer_stays_atomic(self, client, token1, token2, placement, holder1, holder2):
+        placement[holder1["id"]] = placement[holder2["id"]] = 1
+        checking = make_account(client, token1, "checking", initial_deposit_cents=10_000)
+        savings = make_account(client, token2, "savings")
+        r = _transfer(client, token1, checking["id"], savings["id"], 4_000)
+        assert r.json()["status"] == "completed"
+        assert _shard_rows(0, Account) == []
@@ -1,9 +1,24 @@
 """Statement endpoint tests."""
+import csv
+import io
+import json
+
 import pytest
 from datetime import date, timedelta
+from sqlalchemy import delete, event, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.daily_balance import DailyBalance
+from app.services.daily_balance_service import backfill_daily_balances
 from tests.conftest import auth
 
 
+@pytest.fixture(autouse=True, params=[True, False], ids=["rollup", "ledger"])
+def _summary_source(request, monkeypatch):
+    monkeypatch.setattr(settings, "statement_use_daily_balances", request.param)
+
+
 def _today():
     return date.today().isoformat()
 
@@ -61,3 +76,138 @@ class TestStatements:
         r = client.get(f"/api/v1/statements/{checking['id']}",
                        params={"start": _past(), "end": _future()})
         assert r.status_code == 401
+
+
+class TestStatementSummary:
+    def test_summary_matches_full_statement(self, client, token1, checking):
+        acc_id = checking["id"]
+        client.post(f"/api/v1/transactions/{acc_id}/deposit",
+                    json={"amount_cents": 40000}, headers=auth(token1))
+        client.post(f"/api/v1/transactions/{acc_id}/withdraw",
+                    json={"amount_cents": 10000}, headers=auth(token1))
+        params = {"start": _past(), "end": _future()}
+
+        full = client.get(f"/api/v1/statements/{acc_id}", params=params,
+                          headers=auth(token1)).json()
+        r = client.get(f"/api/v1/statements/{acc_id}", params={**params, "summary_only": True},
+                       headers=auth(token1))
+        assert r.status_code == 200
+        summary = r.json()
+        assert summary["transactions"] is None
+        full.pop("transactions")
+        summary.pop("transactions")
+        assert summary == full
+
+    def test_summary_opening_balance_carries_prior_history(self, client, token1, checking):
+        acc_id = checking["id"]
+        r = client.get(f"/api/v1/statements/{acc_id}",
+                       params={"start": _future(1), "end": _future(30), "summary_only": True},
+                       headers=auth(token1))
+        data = r.json()
+        assert data["transaction_count"] == 0
+        assert data["opening_balance_cents"] == 100000
+        assert data["closing_balance_cents"] == 100000
+        assert data["total_deposits_cents"] == 0
+
+
+class TestStatementExport:
+    def _export(self, client, token, acc_id, fmt):
+        return client.get(f"/api/v1/statements/{acc_id}/export",
+                          params={"start": _past(), "end": _future(), "format": fmt},
+                          headers=auth(token))
+
+    def test_ndjson_export_has_opening_rows_and_closing(self, client, token1, checking):
+        acc_id = checking["id"]
+        client.post(f"/api/v1/transactions/{acc_id}/withdraw",
+                    json={"amount_cents": 10000}, headers=auth(token1))
+
+        r = self._export(client, token1, acc_id, "ndjson")
+        assert r.status_code == 200
+        assert r.headers["content-type"].startswith("application/x-ndjson")
+        records = [json.loads(line) for line in r.text.splitlines()]
+        assert [rec["record_type"] for rec in records] == [
+            "opening", "transaction", "transaction", "closing",
+        ]
+        assert records[0]["balance_after_cents"] == 0
+        closing = records[-1]
+        assert closing["balance_after_cents"] == 90000
+        assert closing["total_deposits_cents"] == 100000
+        assert closing["total_withdrawals_cents"] == 10000
+        assert closing["transaction_count"] == 2
+
+    def test_csv_export(self, client, token1, checking):
+        r = self._export(client, token1, checking["id"], "csv")
+        assert r.status_code == 200
+        assert r.headers["content-type"].startswith("text/csv")
+        rows = list(csv.DictReader(io.StringIO(r.text)))
+        assert [row["record_type"] for row in rows] == ["opening", "transaction", "closing"]
+        assert rows[1]["transaction_type"] == "deposit"
+        assert rows[-1]["balance_after_cents"] == "100000"
+
+    def test_export_streams_through_its_own_session(self, client, token1, checking, db):
+        sessions = []
+
+        def _record(state):
+            if "transactions" in str(state.statement):
+                sessions.append(state.session)
+
+        event.listen(Session, "do_orm_execute", _record)
+        try:
+            r = self._export(client, token1, checking["id"], "ndjson")
+        finally:
+            event.remove(Session, "do_orm_execute", _record)
+        assert r.status_code == 200
+        assert sessions and db not in sessions
+
+    def test_export_non_owned_account_fails(self, client, token1, savings2):
+        r = self._export(client, token1, savings2["id"], "csv")
+        assert r.status_code == 404
+
+    def test_export_unknown_format_rejected(self, client, token1, checking):
+        r = self._export(client, token1, checking["id"], "xml")
+        assert r.status_code == 422
+
+
+class TestDailyBalanceRollup:
+    def _rollup(self, db):
+        rows = db.execute(select(DailyBalance).order_by(DailyBalance.account_id)).scalars().all()
+        return [
+            (r.account_id, r.day, r.closing_balance_cents, r.total_deposits_cents,
+             r.total_withdrawals_cents, r.transaction_count)
+            for r in rows
+        ]
+
+    def test_write_path_maintains_rollup(self, client, token1, checking, db):
+        acc_id = checking["id"]
+        client.post(f"/api/v1/transactions/{acc_id}/withdraw",
+                    json={"amount_cents": 2500}, headers=auth(token1))
+        [(account_id, day, closing, deposits, withdrawals, count)] = self._rollup(db)
+        assert account_id == acc_id
+        assert (closing, deposits, withdrawals, count) == (97500, 100000, 2500, 2)
+
+    def test_backfill_rebuilds_identical_rows(self, client, token1, token2, checking, savings2, db):
+        client.post("/api/v1/transfers/", json={
+            "from_account_id": checking["id"],
+            "to_account_id": savings2["id"],
+            "amount_cents": 1234,
+        }, headers=auth(token1))
+        maintained = self._rollup(db)
+
+        db.execute(delete(DailyBalance))
+        assert backfill_daily_balances(db) == 2
+        db.commit()
+        assert self._rollup(db) == maintained
+
+    def test_rollup_and_ledger_summaries_agree(self, client, token1, checking, monkeypatch):
+        acc_id = checking["id"]
+        client.post(f"/api/v1/transactions/{acc_id}/withdraw",
+                    json={"amount_cents": 700}, headers=auth(token1))
+        params = {"start": _past(), "end": _future(), "summary_only": True}
+
+        monkeypatch.setattr(settings, "statement_use_daily_balances", True)
+        from_rollup = client.get(f"/api/v1/statements/{acc_id}", params=params,
+                                 headers=auth(token1)).json()
+        monkeypatch.setattr(settings, "statement_use_daily_balances", False)
+        from_ledger = client.get(f"/api/v1/statements/{acc_id}", params=params,
+                                 headers=auth(token1)).json()
+        assert from_rollup == from_ledger
@@ -1,5 +1,21 @@
 """Deposit, withdrawal and transaction listing tests."""
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
 import pytest
+from fastapi import HTTPException
+from sqlalchemy import event, select, text
+
+from app.core.config import settings
+from app.db.session import normalize_sqlite_timestamps
+from app.models.account import Account
+from app.models.audit_log import AuditLog
+from app.models.transaction import Transaction
+from app.services import write_queue as write_queue_module
+from app.services.transaction_service import apply_deposit, apply_withdrawal
+from app.services.write_queue import WriteQueue, WriteQueueFullError
 from tests.conftest import auth, make_account
 
 
@@ -116,3 +132,302 @@ class TestTransactionList:
     def test_non_owned_account_returns_404(self, client, token1, savings2):
         r = client.get(f"/api/v1/transactions/{savings2['id']}", headers=auth(token1))
         assert r.status_code == 404
+
+
+def _batch(client, token, operations, mode="best_effort"):
+    return client.post("/api/v1/transactions/batch",
+                       json={"operations": operations, "mode": mode}, headers=auth(token))
+
+
+def _balance(client, token, account_id):
+    return client.get(f"/api/v1/accounts/{account_id}", headers=auth(token)).json()["balance_cents"]
+
+
+class TestTransactionBatch:
+    def test_best_effort_applies_in_order(self, client, token1, checking, savings2):
+        acc_id = checking["id"]
+        r = _batch(client, token1, [
+            {"account_id": acc_id, "type": "deposit", "amount_cents": 50_000},
+            # Only covered thanks to the deposit above (balance starts at 100_000).
+            {"account_id": acc_id, "type": "withdraw", "amount_cents": 140_000},
+            {"account_id": acc_id, "type": "withdraw", "amount_cents": 20_000},
+            {"account_id": savings2["id"], "type": "deposit", "amount_cents": 100},
+            {"account_id": acc_id, "type": "deposit", "amount_cents": 500, "description": "Payroll"},
+        ])
+        assert r.status_code == 200, r.text
+        body = r.json()
+        assert (body["applied"], body["failed"]) == (3, 2)
+        results = body["results"]
+        assert [x["applied"] for x in results] == [True, True, False, False, True]
+        assert results[2]["error"] == "Insufficient funds"
+        assert results[3]["error"] == "Account not found"
+        assert [x["transaction"]["balance_after_cents"] for x in results if x["applied"]] == [
+            150_000, 10_000, 10_500,
+        ]
+        assert results[4]["transaction"]["description"] == "Payroll"
+        assert _balance(client, token1, acc_id) == 10_500
+
+        r = client.get(f"/api/v1/transactions/{acc_id}", headers=auth(token1))
+        assert r.json()["items"][0]["id"] == results[4]["transaction"]["id"]
+        today = date.today().isoformat()
+        r = client.get(f"/api/v1/statements/{acc_id}", params={"start": today, "end": today},
+                       headers=auth(token1))
+        statement = r.json()
+        assert statement["closing_balance_cents"] == 10_500
+        assert statement["total_deposits_cents"] == 100_000 + 50_000 + 500
+        assert statement["total_withdrawals_cents"] == 140_000
+        assert statement["transaction_count"] == 4
+
+    def test_atomic_failure_applies_nothing(self, client, token1, checking):
+        r = _batch(client, token1, [
+            {"account_id": checking["id"], "type": "deposit", "amount_cents": 500},
+            {"account_id": checking["id"], "type": "withdraw", "amount_cents": 10**9},
+        ], mode="atomic")
+        assert r.status_code == 400
+        results = r.json()["results"]
+        assert r.json()["applied"] == 0
+        assert [x["applied"] for x in results] == [False, False]
+        assert results[0]["error"] is None and results[0]["transaction"] is None
+        assert results[1]["error"] == "Insufficient funds"
+        assert _balance(client, token1, checking["id"]) == 100_000
+
+    def test_atomic_success_is_audited_in_bulk(self, client, token1, checking, db):
+        second = make_account(client, token1, account_type="savings")
+        r = _batch(client, token1, [
+            {"account_id": checking["id"], "type": "withdraw", "amount_cents": 30_000},
+            {"account_id": second["id"], "type": "deposit", "amount_cents": 30_000},
+        ], mode="atomic")
+        assert r.status_code == 200, r.text
+        assert _balance(client, token1, checking["id"]) == 70_000
+        assert _balance(client, token1, second["id"]) == 30_000
+        logged = db.execute(
+            select(AuditLog.action, AuditLog.resource_id).where(AuditLog.details.like("% batch"))
+        ).all()
+        ids = [x["transaction"]["id"] for x in r.json()["results"]]
+        assert sorted(logged) == sorted([("withdraw", ids[0]), ("deposit", ids[1])])
+
+    def test_inactive_account_is_refused(self, client, token1, checking):
+        client.patch(f"/api/v1/accounts/{checking['id']}/status",
+                     json={"status": "frozen"}, headers=auth(token1))
+        r = _batch(client, token1, [{"account_id": checking["id"], "type": "deposit", "amount_cents": 1}])
+        assert r.json()["results"][0]["error"] == "Account is not active"
+
+    def test_batch_size_is_limited(self, client, token1, checking):
+        op = {"account_id": checking["id"], "type": "deposit", "amount_cents": 1}
+        assert _batch(client, token1, []).status_code == 422
+        assert _batch(client, token1, [op] * (settings.transaction_batch_max_size + 1)).status_code == 422
+
+    def test_through_write_queue(self, client, token1, checking, monkeypatch):
+        monkeypatch.setattr(settings, "write_queue_enabled", True)
+        r = _batch(client, token1, [
+            {"account_id": checking["id"], "type": "deposit", "amount_cents": 1} for _ in range(20)
+        ])
+        assert r.json()["applied"] == 20
+        assert _balance(client, token1, checking["id"]) == 100_020
+
+
+class TestCursorPagination:
+    def test_cursor_walks_every_transaction_once(self, client, token1, checking):
+        acc_id = checking["id"]
+        for _ in range(6):
+            client.post(f"/api/v1/transactions/{acc_id}/deposit",
+                        json={"amount_cents": 100}, headers=auth(token1))
+
+        seen, cursor = [], None
+        while True:
+            params = {"page_size": 3}
+            if cursor:
+                params["cursor"] = cursor
+            r = client.get(f"/api/v1/transactions/{acc_id}", params=params, headers=auth(token1))
+            assert r.status_code == 200
+            data = r.json()
+            seen.extend(t["id"] for t in data["items"])
+            cursor = data["next_cursor"]
+            if not cursor:
+                break
+
+        assert len(seen) == len(set(seen)) == 7  # 6 deposits + initial deposit
+
+    def test_cursor_walks_second_precision_rows(self, client, token1, checking, db):
+        acc_id = checking["id"]
+        for _ in range(4):
+            client.post(f"/api/v1/transactions/{acc_id}/deposit",
+                        json={"amount_cents": 100}, headers=auth(token1))
+        # Rows from before created_at was set client-side, as SQLite's default wrote them.
+        ids = db.scalars(select(Transaction.id).where(Transaction.account_id == acc_id)).all()
+        for i, tx_id in enumerate(ids):
+            db.execute(text("UPDATE transactions SET created_at = :at WHERE id = :id"),
+                       {"at": f"2026-01-01 10:00:0{i // 2}", "id": tx_id})
+        if db.get_bind().dialect.name == "sqlite":
+            db.execute(text("PRAGMA user_version = 0"))
+        db.commit()
+        normalize_sqlite_timestamps(db.get_bind())
+
+        seen, cursor = [], None
+        for _ in range(len(ids)):
+            params = {"page_size": 2, **({"cursor": cursor} if cursor else {})}
+            data = client.get(f"/api/v1/transactions/{acc_id}", params=params, headers=auth(token1)).json()
+            seen.extend(t["id"] for t in data["items"])
+            cursor = data["next_cursor"]
+            if not cursor:
+                break
+        assert sorted(seen) == sorted(ids)
+
+    def test_last_page_has_no_next_cursor(self, client, token1, checking):
+        r = client.get(f"/api/v1/transactions/{checking['id']}?page_size=5", headers=auth(token1))
+        assert r.json()["next_cursor"] is None
+
+    def test_total_can_be_skipped(self, client, token1, checking):
+        r = client.get(f"/api/v1/accounts/{checking['id']}/transactions?total_mode=none",
+                       headers=auth(token1))
+        assert r.status_code == 200
+        assert r.json()["total"] is None
+        assert len(r.json()["items"]) == 1
+
+    def test_cached_total(self, client, token1, checking):
+        r = client.get(f"/api/v1/transactions/{checking['id']}?total_mode=cached",
+                       headers=auth(token1))
+        assert r.status_code == 200
+        assert r.json()["total"] == 1
+
+    def test_invalid_cursor_rejected(self, client, token1, checking):
+        r = client.get(f"/api/v1/transactions/{checking['id']}?cursor=not-a-cursor",
+                       headers=auth(token1))
+        assert r.status_code == 400
+
+
+class TestConcurrentBalanceUpdates:
+    THREADS = 16
+    OPS_PER_THREAD = 10
+
+    def _run(self, session_factory, account_id, op, amount_cents):
+        def worker():
+            outcomes = []
+            for _ in range(self.OPS_PER_THREAD):
+                session = session_factory()
+                try:
+                    account = session.get(Account, account_id)
+                    tx = op(session, account, amount_cents)
+                    session.commit()
+                    outcomes.append(tx.balance_after_cents)
+                except HTTPException:
+                    session.rollback()
+                    outcomes.append(None)
+                finally:
+                    session.close()
+            return outcomes
+
+        with ThreadPoolExecutor(max_workers=self.THREADS) as pool:
+            futures = [pool.submit(worker) for _ in range(self.THREADS)]
+            return [o for f in futures for o in f.result()]
+
+    def test_concurrent_deposits_lose_no_updates(self, client, token1, checking, session_factory):
+        outcomes = self._run(session_factory, checking["id"], apply_deposit, 100)
+        total_ops = self.THREADS * self.OPS_PER_THREAD
+        expected = 100_000 + total_ops * 100
+
+        assert None not in outcomes
+        # Each deposit observed a distinct balance, ending at the expected total.
+        assert len(set(outcomes)) == total_ops
+        assert max(outcomes) == expected
+
+        r = client.get(f"/api/v1/accounts/{checking['id']}", headers=auth(token1))
+        assert r.json()["balance_cents"] == expected
+
+    def test_concurrent_withdrawals_never_overdraw(self, client, token1, checking, session_factory):
+        # 100000 cents covers exactly 100 of the 160 attempted 1000-cent withdrawals.
+        outcomes = self._run(session_factory, checking["id"], apply_withdrawal, 1000)
+        succeeded = [o for o in outcomes if o is not None]
+
+        assert len(succeeded) == 100
+        assert sorted(succeeded) == list(range(0, 100_000, 1000))
+
+        r = client.get(f"/api/v1/accounts/{checking['id']}", headers=auth(token1))
+        assert r.json()["balance_cents"] == 0
+
+
+class TestWriteQueue:
+    @pytest.fixture()
+    def queue(self):
+        q = WriteQueue(max_batch=64, max_wait_seconds=0, max_queue=100)
+        yield q
+        q.shutdown()
+
+    @staticmethod
+    def _job(op, account_id, amount_cents):
+        def run(session):
+            return op(session, session.get(Account, account_id), amount_cents)
+        return run
+
+    def _submit_behind_gate(self, queue, bind, jobs):
+        """Hold the writer on a first job so ``jobs`` pile up into one batch."""
+        gate = threading.Event()
+        blocker = queue.submit(bind, lambda session: gate.wait(5))
+        futures = [queue.submit(bind, job) for job in jobs]
+        gate.set()
+        blocker.result(timeout=10)
+        return futures
+
+    def test_queued_writes_share_a_commit(self, queue, checking, session_factory):
+        bind = session_factory.kw["bind"]
+        commits = []
+        listener = commits.append
+        event.listen(bind, "commit", listener)
+        try:
+            deposit = self._job(apply_deposit, checking["id"], 100)
+            futures = self._submit_behind_gate(queue, bind, [deposit] * 10)
+            balances = [f.result(timeout=10).balance_after_cents for f in futures]
+        finally:
+            event.remove(bind, "commit", listener)
+
+        assert sorted(balances) == list(range(100_100, 101_100, 100))
+        assert len(commits) <= 2
+        with session_factory() as session:
+            assert session.get(Account, checking["id"]).balance_cents == 101_000
+
+    def test_failed_write_is_rolled_back_alone(self, queue, checking, session_factory):
+        bind = session_factory.kw["bind"]
+        deposit = self._job(apply_deposit, checking["id"], 100)
+        overdraw = self._job(apply_withdrawal, checking["id"], 10**9)
+        futures = self._submit_behind_gate(queue, bind, [deposit, overdraw, deposit])
+
+        assert futures[0].result(timeout=10).balance_after_cents == 100_100
+        with pytest.raises(HTTPException) as exc:
+            futures[1].result(timeout=10)
+        assert exc.value.status_code == 400
+        assert futures[2].result(timeout=10).balance_after_cents == 100_200
+
+    def test_endpoints_through_queue(self, client, token1, token2, checking, savings2, monkeypatch):
+        monkeypatch.setattr(settings, "write_queue_enabled", True)
+        r = client.post(f"/api/v1/transactions/{checking['id']}/deposit",
+                        json={"amount_cents": 500}, headers=auth(token1))
+        assert r.status_code == 200, r.text
+        assert r.json()["balance_after_cents"] == 100_500
+
+        r = client.post(f"/api/v1/transactions/{checking['id']}/withdraw",
+                        json={"amount_cents": 10**9}, headers=auth(token1))
+        assert r.status_code == 400
+
+        r = client.post("/api/v1/transfers/", json={
+            "idempotency_key": str(uuid.uuid4()),
+            "from_account_id": checking["id"],
+            "to_account_id": savings2["id"],
+            "amount_cents": 20_000,
+        }, headers=auth(token1))
+        assert r.status_code == 201, r.text
+        assert r.json()["status"] == "completed"
+
+        r = client.get(f"/api/v1/accounts/{checking['id']}", headers=auth(token1))
+        assert r.json()["balance_cents"] == 80_500
+
+    def test_full_queue_returns_503(self, client, token1, checking, monkeypatch):
+        monkeypatch.setattr(settings, "write_queue_enabled", True)
+
+        def _full(bind, fn):
+            raise WriteQueueFullError
+
+        monkeypatch.setattr(write_queue_module.write_queue, "submit", _full)
+        r = client.post(f"/api/v1/transactions/{checking['id']}/deposit",
+                        json={"amount_cents": 500}, headers=auth(token1))
+        assert r.status_code == 503
+        assert r.headers["retry-after"] == "1"